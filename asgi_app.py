@@ -0,0 +1,302 @@
+"""
+asgi_app.py - Module for serving the Battleships game from an asyncio event loop
+
+This module provides the '/placement', '/', '/attack', '/shot', '/state', '/events' and
+'/metrics' routes of main.py as a plain
+ASGI application, so the game can be served by any ASGI server, e.g.
+'uvicorn asgi_app:app'. It uses the same BattleshipsGame objects and GameStore as
+the Flask app. Waiting connections cost the event loop nothing, so one process can
+hold many mostly idle games open, while game setup, restoring saved games, AI moves
+and template rendering are run on a thread pool of config.ASGI_WORKERS threads to
+keep the loop responsive.
+
+Each browser is given a random game id in the config.ASGI_COOKIE cookie. The id is
+long and random, so unlike the Flask session cookie it does not need to be signed.
+
+The main and placement pages are cached as in main.py, and sent with an ETag, so a
+browser revalidating an unchanged page is answered with 304 Not Modified.
+
+The '/events' stream waits on the event loop rather than on a thread, by registering
+a listener with the game which wakes the stream whenever an event is published.
+
+Functions:
+- app: The ASGI application.
+- stream_events: Streams the events of a game as Server-Sent Events.
+- read_body: Reads the whole body of an HTTP request.
+- send_response: Sends an HTTP response.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Union
+from urllib.parse import parse_qs
+import asyncio
+import json
+import logging
+import secrets
+import time
+
+from flask import render_template
+
+import config
+import main
+import metrics
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+executor = ThreadPoolExecutor(config.ASGI_WORKERS, thread_name_prefix='battleships')
+
+async def read_body(receive: Callable[[], Awaitable[Dict[str, Any]]]) -> bytes:
+    """
+    Reads the whole body of an HTTP request.
+
+    Args:
+        receive (Callable[[], Awaitable[Dict[str, Any]]]): The ASGI receive channel.
+
+    Returns:
+        bytes: The body of the request.
+    """
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+async def send_response(send: Callable[[Dict[str, Any]], Awaitable[None]], status: int,
+                        body: Union[str, bytes], content_type: str = 'text/html; charset=utf-8',
+                        headers: List[Tuple[bytes, bytes]] = None) -> None:
+    """
+    Sends an HTTP response.
+
+    Args:
+        send (Callable[[Dict[str, Any]], Awaitable[None]]): The ASGI send channel.
+        status (int): The HTTP status code.
+        body (Union[str, bytes]): The body of the response.
+        content_type (str, optional): The content type of the body. Defaults to HTML.
+        headers (List[Tuple[bytes, bytes]], optional): Any further headers.
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    response_headers = [(b'content-type', content_type.encode('latin-1')),
+                        (b'content-length', str(len(body)).encode('latin-1'))]
+    response_headers.extend(headers or [])
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+def _render(template: str, **context: Any) -> str:
+    with main.app.app_context():
+        return render_template(template, **context)
+
+def _placement_page(game: main.BattleshipsGame) -> Tuple[str, str]:
+    game.new_placement()
+    return main.placement_page(_render)
+
+def _page_response(scope: Dict[str, Any], page: str,
+                   etag: str) -> Tuple[int, Union[str, bytes], str, List]:
+    """
+    Returns a rendered page with its ETag, or 304 Not Modified if the browser sent
+    the same ETag in If-None-Match.
+    """
+    headers = [(b'etag', f'"{etag}"'.encode('latin-1')), (b'cache-control', b'no-cache')]
+    for name, value in scope['headers']:
+        if name == b'if-none-match':
+            tags = [tag.strip() for tag in value.decode('latin-1').split(',')]
+            if '*' in tags or any(tag.lstrip('W/').strip('"') == etag for tag in tags):
+                return 304, b'', 'text/html; charset=utf-8', headers
+    return 200, page, 'text/html; charset=utf-8', headers
+
+def _game_id(scope: Dict[str, Any]) -> Union[str, None]:
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            cookie = SimpleCookie(value.decode('latin-1'))
+            if config.ASGI_COOKIE in cookie:
+                return cookie[config.ASGI_COOKIE].value
+    return None
+
+async def _handle(method: str, path: str, scope: Dict[str, Any],
+                  receive: Callable[[], Awaitable[Dict[str, Any]]],
+                  game: main.BattleshipsGame) -> Tuple[int, Union[str, bytes], str, List]:
+    """
+    Runs one route for a game, returning the status, body, content type and headers.
+    Anything which takes the game's lock runs on the executor, so a long AI move
+    never blocks the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    json_type = 'application/json'
+
+    if path == '/placement' and method == 'GET':
+        page, etag = await loop.run_in_executor(executor, _placement_page, game)
+        return _page_response(scope, page, etag)
+
+    if path == '/placement' and method == 'POST':
+        try:
+            data = json.loads(await read_body(receive))
+        except ValueError:
+            logging.error('Invalid placement JSON')
+            return 400, json.dumps({'message': 'Invalid JSON'}), json_type, []
+        await loop.run_in_executor(executor, game.place, data)
+        return 200, json.dumps({'message': 'Received'}), json_type, []
+
+    if path == '/' and method == 'GET':
+        page = await loop.run_in_executor(executor, game.main_page, _render)
+        if page is None:
+            logging_message = f'Redirecting to {config.PLACEMENT_HTML} for ship placement'
+            logging.info(logging_message)
+            return 302, b'', 'text/html; charset=utf-8', [(b'location', b'/placement')]
+        return _page_response(scope, *page)
+
+    if path == '/attack' and method == 'GET':
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            x_coordinate, y_coordinate = int(query['x'][0]), int(query['y'][0])
+        except (KeyError, ValueError):
+            logging.error('Attack without valid x and y coordinates')
+            return 400, json.dumps({'message': 'x and y must be integers'}), json_type, []
+        response, status = await loop.run_in_executor(executor, game.play_turn,
+                                                      x_coordinate, y_coordinate)
+        return status, json.dumps(response), json_type, []
+
+    if path == '/shot' and method == 'POST':
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            x_coordinate, y_coordinate = int(query['x'][0]), int(query['y'][0])
+        except (KeyError, ValueError):
+            logging.error('Shot without valid x and y coordinates')
+            return 400, json.dumps({'message': 'x and y must be integers'}), json_type, []
+        response, status = game.submit_shot(x_coordinate, y_coordinate)
+        return status, json.dumps(response), json_type, []
+
+    if path == '/state' and method == 'GET':
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            logging.error('State requested without a valid since')
+            return 400, json.dumps({'message': 'since must be an integer'}), json_type, []
+        response, status = await loop.run_in_executor(executor, game.state_since, since)
+        return status, json.dumps(response), json_type, []
+
+    return 404, json.dumps({'message': 'Not found'}), json_type, []
+
+async def stream_events(scope: Dict[str, Any], receive: Callable[[], Awaitable[Dict[str, Any]]],
+                        send: Callable[[Dict[str, Any]], Awaitable[None]],
+                        game: main.BattleshipsGame, headers: List[Tuple[bytes, bytes]]) -> None:
+    """
+    Streams the events of a game as Server-Sent Events, until the game is over or the
+    browser disconnects. The stream resumes after the Last-Event-ID header, or from
+    the 'since' query parameter.
+
+    Args:
+        scope (Dict[str, Any]): The ASGI connection scope.
+        receive (Callable[[], Awaitable[Dict[str, Any]]]): The ASGI receive channel.
+        send (Callable[[Dict[str, Any]], Awaitable[None]]): The ASGI send channel.
+        game (main.BattleshipsGame): The game to stream.
+        headers (List[Tuple[bytes, bytes]]): Any further headers, e.g. a new cookie.
+    """
+    request_headers = dict(scope['headers'])
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    try:
+        if b'last-event-id' in request_headers:
+            since = int(request_headers[b'last-event-id']) + 1
+        else:
+            since = int(query.get('since', ['0'])[0])
+    except ValueError:
+        await send_response(send, 400, json.dumps({'message': 'Invalid event id'}),
+                            'application/json', headers)
+        return
+
+    await read_body(receive)
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    def listener() -> None:
+        loop.call_soon_threadsafe(wake.set)
+    game.listeners.add(listener)
+    disconnected = asyncio.ensure_future(receive())
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/event-stream'),
+                                (b'cache-control', b'no-cache')] + headers})
+        while True:
+            wake.clear()
+            events = game.events_since(since)
+            if events:
+                body = ''.join(main.format_event(event) for event in events)
+                since = events[-1]['id'] + 1
+                finished = events[-1]['event'] == 'game_over'
+                await send({'type': 'http.response.body', 'body': body.encode('utf-8'),
+                            'more_body': not finished})
+                if finished:
+                    return
+                continue
+            if game.events_finished(since):
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+            woken = asyncio.ensure_future(wake.wait())
+            done, _ = await asyncio.wait({woken, disconnected}, timeout=config.SSE_KEEPALIVE,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            woken.cancel()
+            if disconnected in done:
+                return
+            if not done:
+                await send({'type': 'http.response.body', 'body': b': keep-alive\n\n',
+                            'more_body': True})
+    finally:
+        game.listeners.discard(listener)
+        disconnected.cancel()
+
+async def app(scope: Dict[str, Any], receive: Callable[[], Awaitable[Dict[str, Any]]],
+              send: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+    """
+    The ASGI application, serving the '/placement', '/', '/attack', '/shot', '/state',
+    '/events' and '/metrics' routes.
+
+    Args:
+        scope (Dict[str, Any]): The ASGI connection scope.
+        receive (Callable[[], Awaitable[Dict[str, Any]]]): The ASGI receive channel.
+        send (Callable[[Dict[str, Any]], Awaitable[None]]): The ASGI send channel.
+    """
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    if scope['path'] == '/metrics' and scope['method'] == 'GET':
+        await send_response(send, 200, metrics.exposition(), metrics.CONTENT_TYPE)
+        return
+    start = time.perf_counter()
+
+    headers = []
+    game_id = _game_id(scope)
+    if game_id is None:
+        game_id = secrets.token_urlsafe(16)
+        headers.append((b'set-cookie', f'{config.ASGI_COOKIE}={game_id}; Path=/; '
+                                       f'HttpOnly; SameSite=Lax'.encode('latin-1')))
+        game = main.games.get(game_id, new=True)
+    else:
+        # Looking up a known id may restore a saved game, which must not block the loop
+        game = await asyncio.get_running_loop().run_in_executor(executor, main.games.get,
+                                                                game_id)
+    if scope['path'] == '/events' and scope['method'] == 'GET':
+        await stream_events(scope, receive, send, game, headers)
+        return
+    status, body, content_type, route_headers = await _handle(
+        scope['method'], scope['path'], scope, receive, game)
+    await send_response(send, status, body, content_type, headers + route_headers)
+    if scope['path'] in config.METRICS_ROUTES:
+        metrics.request_seconds.observe(time.perf_counter() - start, scope['path'])
+
+if __name__ == "__main__":
+    try:
+        import uvicorn # pylint: disable=import-outside-toplevel
+    except ImportError:
+        logging.error('Serving the ASGI app directly needs uvicorn, run: pip install uvicorn')
+        raise
+    uvicorn.run(app)
@@ -0,0 +1,263 @@
+"""
+benchmark.py - Module for benchmarking the core Battleships functions
+
+This module times the core functions of the game across board sizes, and saves the
+results as JSON so runs from different commits can be compared to catch performance
+regressions. Each benchmark is a setup function, which is not timed, and a function
+which is timed. Calls are made in doubling batches until BENCHMARK_MIN_TIME seconds
+have been timed, or BENCHMARK_MAX_TIME seconds have passed including the setups,
+and the fastest and median time per call are reported.
+
+Run 'python benchmark.py -o results.json' to save a run, and add
+'--compare baseline.json' to report (and exit with status 1 on) any benchmark which
+has become slower than the baseline by more than the threshold.
+
+Functions:
+- run_benchmark: Times one benchmark at one board size.
+- run_benchmarks: Times every benchmark across the board sizes.
+- compare_results: Finds the benchmarks which are slower than in a baseline run.
+- main: Command line interface for running and comparing benchmarks.
+
+Classes:
+- Benchmark: The setup and timed function of a benchmark.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+import argparse
+import itertools
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import config
+from components import initialise_board, create_battleships, place_battleships, check_empty
+from game_engine import attack
+from mp_game_engine import generate_attack, AttackGenerator, Game
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BENCHMARK_SIZES = (10, 100, 1000) # board sizes each benchmark is run at
+BENCHMARK_MIN_TIME = 0.2 # seconds of timed calls per benchmark and size
+BENCHMARK_MAX_CALLS = 100000 # upper limit on timed calls per benchmark and size
+BENCHMARK_MAX_TIME = 2.0 # upper limit on seconds per benchmark and size, including setup
+BENCHMARK_THRESHOLD = 0.25 # fraction slower than the baseline that counts as a regression
+
+class Benchmark(NamedTuple):
+    """
+    The setup and timed function of a benchmark.
+
+    Attributes:
+    - setup (Callable[[int], Any]): Builds the state for a board size. Not timed.
+    - run (Callable[[Any], Any]): The timed call, given the state from setup.
+    - calls_per_setup (Callable[[int], int]): How many calls one state can serve,
+      0 meaning any number. setup is called again (untimed) once a state is used up.
+    - scales (bool): False if the function does not depend on the board size,
+      so it is only run at the first size.
+    """
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    calls_per_setup: Callable[[int], int] = lambda size: 0
+    scales: bool = True
+
+def _placement_benchmark(algorithm: str) -> Benchmark:
+    return Benchmark(lambda size: (initialise_board(size, config.BOARD_BACKEND),
+                                   create_battleships()),
+                     lambda state: place_battleships(state[0], state[1], algorithm),
+                     lambda size: 1)
+
+def _attack_setup(size: int) -> Tuple[Any, Dict[str, int], Iterator[Tuple[int, int]]]:
+    ships = create_battleships()
+    board = place_battleships(initialise_board(size, config.BOARD_BACKEND), ships,
+                              config.ALGORITHM_RANDOM)
+    return board, dict(ships), itertools.cycle([generate_attack(size) for _ in range(1024)])
+
+def _attack_run(state: Tuple[Any, Dict[str, int], Iterator[Tuple[int, int]]]) -> bool:
+    board, ships, targets = state
+    return attack(next(targets), board, ships)
+
+def _route_setup(size: int) -> Tuple[Any, AttackGenerator]:
+    import main # pylint: disable=import-outside-toplevel
+    game = main.BattleshipsGame()
+    game.ships = create_battleships()
+    game.state = Game(size, game.ships, player_algorithm=config.ALGORITHM_RANDOM,
+                      backend=config.BOARD_BACKEND)
+    client = main.app.test_client()
+    with client.session_transaction() as session:
+        session['game_id'] = f'benchmark-{size}'
+    main.games.put(f'benchmark-{size}', game)
+    return client, AttackGenerator(size)
+
+def _route_run(state: Tuple[Any, AttackGenerator]) -> Any:
+    client, targets = state
+    x_coordinate, y_coordinate = next(targets)
+    return client.get(f'/attack?x={x_coordinate}&y={y_coordinate}')
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'initialise_board': Benchmark(lambda size: size,
+                                  lambda size: initialise_board(size, config.BOARD_BACKEND)),
+    'create_battleships': Benchmark(lambda size: None, lambda state: create_battleships(),
+                                    scales=False),
+    'place_battleships_simple': _placement_benchmark(config.ALGORITHM_SIMPLE),
+    'place_battleships_random': _placement_benchmark(config.ALGORITHM_RANDOM),
+    'place_battleships_custom': _placement_benchmark(config.ALGORITHM_CUSTOM),
+    'attack': Benchmark(_attack_setup, _attack_run),
+    'check_empty': Benchmark(lambda size: initialise_board(size, config.BOARD_BACKEND),
+                             check_empty),
+    'generate_attack': Benchmark(lambda size: size, generate_attack),
+    'attack_route': Benchmark(_route_setup, _route_run,
+                              lambda size: min(size * size // 2, BENCHMARK_MAX_CALLS)),
+}
+
+def run_benchmark(benchmark: Benchmark, size: int, min_time: float = BENCHMARK_MIN_TIME,
+                  max_calls: int = BENCHMARK_MAX_CALLS) -> Dict[str, Any]:
+    """
+    Times one benchmark at one board size, in doubling batches of calls.
+
+    Args:
+        benchmark (Benchmark): The benchmark to run.
+        size (int): The size of the game board.
+        min_time (float, optional): The number of seconds of calls to time.
+            Defaults to BENCHMARK_MIN_TIME.
+        max_calls (int, optional): The most calls to make, even if min_time is not reached.
+            Defaults to BENCHMARK_MAX_CALLS. Calls also stop after BENCHMARK_MAX_TIME seconds,
+            which matters for benchmarks with a slow setup per call.
+
+    Returns:
+        Dict[str, Any]: The number of timed calls, and the fastest and median
+        batch time per call in microseconds.
+    """
+    random.seed(size)
+    limit = benchmark.calls_per_setup(size)
+    per_call: List[float] = []
+    state, used, calls, total, batch = None, 0, 0, 0.0, 1
+    deadline = time.perf_counter() + max(BENCHMARK_MAX_TIME, min_time)
+    while total < min_time and calls < max_calls:
+        if calls and time.perf_counter() > deadline:
+            break
+        batch = min(batch, max_calls - calls, limit or batch)
+        if state is None or (limit and used + batch > limit):
+            state, used = benchmark.setup(size), 0
+        start = time.perf_counter()
+        for _ in range(batch):
+            benchmark.run(state)
+        elapsed = time.perf_counter() - start
+        per_call.append(elapsed / batch)
+        used += batch
+        calls += batch
+        total += elapsed
+        batch *= 2
+    return {'calls': calls,
+            'best_us': min(per_call) * 1e6,
+            'median_us': statistics.median(per_call) * 1e6}
+
+def run_benchmarks(names: Iterable[str] = None, sizes: Iterable[int] = BENCHMARK_SIZES,
+                   min_time: float = BENCHMARK_MIN_TIME) -> Dict[str, Any]:
+    """
+    Times every benchmark across the board sizes. Logging is disabled while timing.
+
+    Args:
+        names (Iterable[str], optional): The benchmarks to run. Defaults to all of BENCHMARKS.
+        sizes (Iterable[int], optional): The board sizes to run at.
+            Defaults to BENCHMARK_SIZES.
+        min_time (float, optional): The number of seconds of calls to time per benchmark
+            and size. Defaults to BENCHMARK_MIN_TIME.
+
+    Returns:
+        Dict[str, Any]: 'meta' describing the run, and 'results' mapping each benchmark
+        name to a dictionary of results keyed by board size (as a string, as in JSON).
+    """
+    sizes = list(sizes)
+    results: Dict[str, Dict[str, Any]] = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        for name in (names if names is not None else BENCHMARKS):
+            benchmark = BENCHMARKS[name]
+            results[name] = {str(size): run_benchmark(benchmark, size, min_time)
+                             for size in (sizes if benchmark.scales else sizes[:1])}
+    finally:
+        logging.disable(logging.NOTSET)
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    meta = {'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'backend': config.BOARD_BACKEND,
+            'ai_strategy': config.AI_STRATEGY, 'timestamp': time.time()}
+    return {'meta': meta, 'results': results}
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = BENCHMARK_THRESHOLD) -> List[Tuple[str, str, float]]:
+    """
+    Finds the benchmarks which are slower than in a baseline run, by their best time.
+    Benchmarks and sizes missing from either run are skipped.
+
+    Args:
+        baseline (Dict[str, Any]): The results of the baseline run.
+        current (Dict[str, Any]): The results of the run being checked.
+        threshold (float, optional): The fraction slower that counts as a regression.
+            Defaults to BENCHMARK_THRESHOLD.
+
+    Returns:
+        List[Tuple[str, str, float]]: The name, board size and ratio of current to
+        baseline time of each regression.
+    """
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, result in sizes.items():
+            previous = baseline['results'].get(name, {}).get(size)
+            if previous is None or previous['best_us'] <= 0:
+                continue
+            ratio = result['best_us'] / previous['best_us']
+            if ratio > 1 + threshold:
+                regressions.append((name, size, ratio))
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    """
+    Command line interface for running and comparing benchmarks.
+
+    Args:
+        argv (List[str], optional): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: The exit status, 1 if any benchmark regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the core Battleships functions.')
+    parser.add_argument('-o', '--output', help='file to save the JSON results to')
+    parser.add_argument('-c', '--compare', help='baseline JSON results to compare against')
+    parser.add_argument('-b', '--benchmark', action='append', choices=sorted(BENCHMARKS),
+                        help='benchmark to run (repeatable), defaults to all')
+    parser.add_argument('-s', '--size', action='append', type=int,
+                        help=f'board size to run at (repeatable), defaults to {BENCHMARK_SIZES}')
+    parser.add_argument('--min-time', type=float, default=BENCHMARK_MIN_TIME,
+                        help='seconds of timed calls per benchmark and size')
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_THRESHOLD,
+                        help='fraction slower than the baseline that counts as a regression')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.benchmark, args.size or BENCHMARK_SIZES, args.min_time)
+    for name, sizes in current['results'].items():
+        for size, result in sizes.items():
+            print(f'{name:<26} {size:>5} {result["best_us"]:>14.2f} us '
+                  f'(median {result["median_us"]:.2f} us, {result["calls"]} calls)')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(current, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare_results(baseline, current, args.threshold)
+        for name, size, ratio in regressions:
+            print(f'Regression: {name} at size {size} is {ratio:.2f}x slower than the baseline')
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
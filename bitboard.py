@@ -0,0 +1,256 @@
+"""
+bitboard.py - Module for the bitboard representation of a Battleships board
+
+This module provides an alternative board backend which stores the occupancy of each
+ship as a single integer bitmask. Cell (x, y) on a board of size n is bit y * n + x,
+so overlap tests, hits and emptiness checks are bitwise operations on Python integers
+rather than loops over nested lists.
+
+The board implements the same small interface as the other board backends
+(can_place, place, hit, is_empty, occupied_cells, to_list), which is what
+components.py and game_engine.py use whenever they are given a board that is
+not a 2-d list.
+
+Functions:
+- column_mask: Returns the bitmask of a vertical ship placed at the origin.
+
+Classes:
+- BitBoard: A square game board stored as one bitmask per ship.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple, Union
+import logging
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+@lru_cache(maxsize=None)
+def column_mask(size: int, boat_size: int) -> int:
+    """
+    Returns the bitmask of a vertical ship placed at the origin of a board.
+    Cached because there are only a handful of ship lengths per board size.
+
+    Args:
+        size (int): The size of the game board.
+        boat_size (int): The length of the ship.
+
+    Returns:
+        int: A bitmask with one bit set in each of the first boat_size rows of column 0.
+    """
+    mask = 0
+    for i in range(boat_size):
+        mask |= 1 << (i * size)
+    return mask
+
+class BitBoard:
+    """
+    A square game board where each ship is stored as an integer bitmask.
+
+    Attributes:
+    - size (int): The width and height of the board.
+    - occupied (int): The union of all ship bitmasks, one bit per occupied cell.
+    - ships (Dict[str, int]): Maps each ship name to the bitmask of its remaining cells.
+
+    Methods:
+    - ship_mask(): Returns the bitmask for a ship at a given position.
+    - can_place(): Check if a ship fits on the board without overlapping another.
+    - place(): Place a ship on the board.
+    - hit(): Clear a cell and return the name of the ship that was there.
+    - is_empty(): Check if every ship has been removed from the board.
+    - cell(): Returns the name of the ship on a cell without changing the board.
+    - occupied_cells(): Yields the coordinates of every occupied cell.
+    - to_list(): Convert the board into the 2-d list format.
+    - from_list(): Build a board from the 2-d list format.
+    """
+
+    __slots__ = ('size', 'occupied', 'ships')
+
+    def __init__(self, size: int = 10):
+        """
+        Initializes an empty bitboard of the given size.
+
+        Args:
+            size (int): The size of the game board. Defaults to 10.
+
+        Raises:
+            ValueError: If the size is less than 1 or not an integer.
+        """
+        if isinstance(size, int) is False or size < 1:
+            logging.error('Size must be a positive integer')
+            raise ValueError('Size must be a positive integer')
+        self.size: int = size
+        self.occupied: int = 0
+        self.ships: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def ship_mask(self, x_coordinate: int, y_coordinate: int,
+                  boat_size: int, orientation: str) -> Union[int, None]:
+        """
+        Returns the bitmask for a ship at a given position.
+
+        Args:
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Returns:
+            Union[int, None]: The bitmask of the ship, or None if it does not fit on the board.
+        """
+        if x_coordinate < 0 or y_coordinate < 0:
+            return None
+        offset = y_coordinate * self.size + x_coordinate
+        if orientation == 'h':
+            if x_coordinate + boat_size > self.size or y_coordinate >= self.size:
+                return None
+            return ((1 << boat_size) - 1) << offset
+        if y_coordinate + boat_size > self.size or x_coordinate >= self.size:
+            return None
+        return column_mask(self.size, boat_size) << offset
+
+    def can_place(self, x_coordinate: int, y_coordinate: int,
+                  boat_size: int, orientation: str) -> bool:
+        """
+        Check if a ship fits on the board without overlapping another ship.
+
+        Args:
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Returns:
+            bool: True if the ship can be placed, False otherwise.
+        """
+        mask = self.ship_mask(x_coordinate, y_coordinate, boat_size, orientation)
+        return mask is not None and not self.occupied & mask
+
+    def place(self, boat_name: str, x_coordinate: int, y_coordinate: int,
+              boat_size: int, orientation: str) -> None:
+        """
+        Place a ship on the board. The caller is expected to have checked can_place().
+
+        Args:
+            boat_name (str): The name of the ship to be placed.
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Raises:
+            ValueError: If the ship does not fit on the board.
+        """
+        mask = self.ship_mask(x_coordinate, y_coordinate, boat_size, orientation)
+        if mask is None:
+            logging.error('Invalid placement')
+            raise ValueError('Invalid placement')
+        self.ships[boat_name] = self.ships.get(boat_name, 0) | mask
+        self.occupied |= mask
+
+    def hit(self, x_coordinate: int, y_coordinate: int) -> Union[str, None]:
+        """
+        Clear a cell and return the name of the ship that was there.
+
+        Args:
+            x_coordinate (int): The column of the attacked cell.
+            y_coordinate (int): The row of the attacked cell.
+
+        Returns:
+            Union[str, None]: The name of the ship that was hit, or None for a miss.
+
+        Raises:
+            IndexError: If the cell is not on the board.
+        """
+        if not (0 <= x_coordinate < self.size and 0 <= y_coordinate < self.size):
+            error_message = f'Attack off the board: {x_coordinate}, {y_coordinate}'
+            logging.error(error_message)
+            raise IndexError(error_message)
+        bit = 1 << (y_coordinate * self.size + x_coordinate)
+        if not self.occupied & bit:
+            return None
+        self.occupied &= ~bit
+        for boat_name, mask in self.ships.items():
+            if mask & bit:
+                self.ships[boat_name] = mask & ~bit
+                return boat_name
+        return None
+
+    def is_empty(self) -> bool:
+        """
+        Check if every ship has been removed from the board.
+
+        Returns:
+            bool: True if the board is empty, False otherwise.
+        """
+        return self.occupied == 0
+
+    def cell(self, x_coordinate: int, y_coordinate: int) -> Union[str, None]:
+        """
+        Returns the name of the ship on a cell without changing the board.
+
+        Args:
+            x_coordinate (int): The column of the cell.
+            y_coordinate (int): The row of the cell.
+
+        Returns:
+            Union[str, None]: The name of the ship on the cell, or None if it is empty.
+        """
+        bit = 1 << (y_coordinate * self.size + x_coordinate)
+        if not self.occupied & bit:
+            return None
+        for boat_name, mask in self.ships.items():
+            if mask & bit:
+                return boat_name
+        return None
+
+    def occupied_cells(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the coordinates of every occupied cell, lowest bit first.
+
+        Returns:
+            Iterator[Tuple[int, int]]: The x and y coordinates of each occupied cell.
+        """
+        mask = self.occupied
+        while mask:
+            low_bit = mask & -mask
+            index = low_bit.bit_length() - 1
+            yield index % self.size, index // self.size
+            mask ^= low_bit
+
+    def to_list(self) -> List[List[Union[str, None]]]:
+        """
+        Convert the board into the 2-d list format used by the rest of the game.
+
+        Returns:
+            List[List[Union[str, None]]]: The board as a 2-d list of ship names and None.
+        """
+        board = [[None for _ in range(self.size)] for _ in range(self.size)]
+        for boat_name, mask in self.ships.items():
+            while mask:
+                low_bit = mask & -mask
+                index = low_bit.bit_length() - 1
+                board[index // self.size][index % self.size] = boat_name
+                mask ^= low_bit
+        return board
+
+    @classmethod
+    def from_list(cls, board: List[List[Union[str, None]]]) -> 'BitBoard':
+        """
+        Build a bitboard from the 2-d list format.
+
+        Args:
+            board (List[List[Union[str, None]]]): The game board represented as a 2-d list.
+
+        Returns:
+            BitBoard: A bitboard holding the same ships.
+        """
+        bitboard = cls(len(board))
+        for y_coordinate, row in enumerate(board):
+            for x_coordinate, boat_name in enumerate(row):
+                if boat_name is not None:
+                    bit = 1 << (y_coordinate * bitboard.size + x_coordinate)
+                    bitboard.ships[boat_name] = bitboard.ships.get(boat_name, 0) | bit
+                    bitboard.occupied |= bit
+        return bitboard
@@ -0,0 +1,75 @@
+"""
+cell_codec.py - Module for compactly encoding sets of board cells
+
+This module encodes a set of cells, each given as its index y * size + x, as a short
+base64 string for the '/state' route. The cells are sorted, and each is written as the
+run of unlisted cells since the previous one, as a variable-length integer of 7 bits
+per byte. Runs shorter than 128 cells take one byte, so a handful of shots on a large
+board encodes to a few bytes rather than a bit for every cell of the grid.
+
+Functions:
+- encode_cells: Encodes a set of cell indices as a base64 string.
+- decode_cells: Decodes a base64 string back to the sorted cell indices.
+"""
+
+from typing import Iterable, List
+import base64
+import logging
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def encode_cells(cells: Iterable[int]) -> str:
+    """
+    Encodes a set of cell indices as a base64 string of the runs between them.
+
+    Args:
+        cells (Iterable[int]): The cell indices, as y * size + x. Repeats are ignored.
+
+    Returns:
+        str: The encoded cells, an empty string if there are none.
+
+    Raises:
+        ValueError: If a cell index is negative.
+    """
+    encoded = bytearray()
+    previous = -1
+    for cell in sorted(set(cells)):
+        if cell < 0:
+            error_message = f'Cell indices must not be negative: {cell}'
+            logging.error(error_message)
+            raise ValueError(error_message)
+        run = cell - previous - 1
+        previous = cell
+        while run >= 0x80:
+            encoded.append(run & 0x7f | 0x80)
+            run >>= 7
+        encoded.append(run)
+    return base64.b64encode(bytes(encoded)).decode('ascii')
+
+def decode_cells(data: str) -> List[int]:
+    """
+    Decodes a base64 string made by encode_cells() back to the cell indices.
+
+    Args:
+        data (str): The encoded cells.
+
+    Returns:
+        List[int]: The cell indices, in ascending order.
+
+    Raises:
+        ValueError: If the data is not valid base64 or ends part way through a run.
+    """
+    cells = []
+    previous = -1
+    run = shift = 0
+    for byte in base64.b64decode(data, validate=True):
+        run |= (byte & 0x7f) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+        previous += run + 1
+        cells.append(previous)
+        run = shift = 0
+    if shift:
+        raise ValueError('Encoded cells end part way through a run')
+    return cells
@@ -5,37 +5,68 @@ This module provides functions for managing game components such as initializing
 creating battleships, placing battleships on the board, and checking if the board is empty.
 
 Functions:
-- initialise_board: Initializes a square game board of a specified size.
+- initialise_board: Initializes a square game board of a specified size and backend.
+- load_fleet: Returns the cached, immutable fleet read from a battleships file.
 - create_battleships: Reads a file containing battleship names and their lengths,
   and returns a dictionary mapping each battleship to its length.
+- all_ships_sunk: Check if every ship in a fleet has been sunk.
 - place_battleships: Generates the placement of battleships on the board
   according to the specified algorithm.
+- save_placements: Writes custom ship placements to a JSON file.
 - place_custom_single_ship: Place a single custom ship on the board.
+- ship_fits: Check if a ship can be placed on the board without overlapping another ship.
+- place_ship_cells: Write a ship onto the board.
 - place_random_single_ship: Randomly places a single ship on the board.
 - check_empty: Check if the given board is empty.
+- generate_fleets: Generates many independent random fleets as one array.
+- board_to_list: Returns any board in the 2-d list format.
+- board_window: Returns a rectangular part of any board in the 2-d list format.
+
+Classes:
+- Fleet: A dictionary of ship lengths which keeps count of the remaining cells and ships.
+
+Boards are either the default 2-d list of ship names, or one of the alternative
+backends (bitboard.BitBoard, numpy_board.NumpyBoard, sparse_board.SparseBoard)
+which provide can_place, place, hit, is_empty, occupied_cells and to_list.
 """
 
-from typing import List, Dict, Tuple, Union
+from typing import Any, List, Dict, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
 import random
 import json
 import logging
+import os
+import time
 import config
+import metrics
+from bitboard import BitBoard
+from placement import PlacementIndex
+from sparse_board import SparseBoard
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def initialise_board(size: int = 10) -> List[List[Union[str, None]]]:
+# Running totals for generate_fleets(), so fleet throughput can be tracked over a session
+fleet_stats: Dict[str, float] = {'fleets': 0, 'seconds': 0.0, 'fleets_per_second': 0.0}
+
+# Fleets read by load_fleet(), keyed on path and validated against the file's mtime and size
+_fleet_cache: Dict[str, Tuple[Tuple[int, int], Tuple[Tuple[str, int], ...]]] = {}
+
+def initialise_board(size: int = 10, backend: str = config.BOARD_LIST) -> Any:
     """
     Initializes a square game board of a specified size.
 
     Args:
         size (int): The size of the game board. Defaults = 10.
+        backend (str, optional): The board representation to use.
+        Defaults to 'list' which is stored in the config.
 
     Returns:
         List[List[Union[str, None]]]: A 2D list representing the game board,
-        with each element initialized to None.
+        with each element initialized to None. For the 'bitboard', 'numpy' and 'sparse'
+        backends an empty BitBoard, NumpyBoard or SparseBoard is returned instead.
 
     Raises:
-        ValueError: If the size is less than 1 or not an integer.
+        ValueError: If the size is less than 1 or not an integer, or the backend is unknown.
     """
     if isinstance(size, int) is False:
         logging.error('Size must be an integer')
@@ -43,30 +74,127 @@ def initialise_board(size: int = 10) -> List[List[Union[str, None]]]:
     if size < 1:
         logging.error('Size must be a positive integer')
         raise ValueError('Size must be a positive integer')
+    if backend == config.BOARD_BITBOARD:
+        return BitBoard(size)
+    if backend == config.BOARD_NUMPY:
+        from numpy_board import NumpyBoard # pylint: disable=import-outside-toplevel
+        return NumpyBoard(size)
+    if backend == config.BOARD_SPARSE:
+        return SparseBoard(size)
+    if backend != config.BOARD_LIST:
+        error_message = f'Unknown board backend: {backend}'
+        logging.error(error_message)
+        raise ValueError(error_message)
     board = [[None for _ in range(size)] for _ in range(size)]
     return board
 
-def create_battleships(filename: str = config.BATTLESHIPS) -> Dict[str, int]:
+class Fleet(dict):
     """
-    Reads a file containing battleship names and their lengths, and returns a dictionary
-    mapping each battleship to its length.
+    A dictionary mapping each ship name to its remaining length, as returned by
+    create_battleships(). It also keeps live totals of the remaining cells and
+    ships afloat, updated whenever a length is changed (e.g. by attack()),
+    so checking for the end of a game does not need to look at every ship.
+    Copies, pickles and merges with | are Fleets with their own correct totals.
+
+    Attributes:
+    - remaining_cells (int): The sum of the remaining lengths of all ships.
+    - remaining_ships (int): The number of ships with cells left.
+    """
+
+    __slots__ = ('remaining_cells', 'remaining_ships')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.remaining_cells: int = sum(self.values())
+        self.remaining_ships: int = sum(1 for value in self.values() if value > 0)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        old_value = self.get(key, 0)
+        super().__setitem__(key, value)
+        self.remaining_cells += value - old_value
+        self.remaining_ships += (value > 0) - (old_value > 0)
+
+    def __delitem__(self, key: str) -> None:
+        self[key] = 0
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs) -> None: # pylint: disable=arguments-differ
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: str, default: int = 0) -> int:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *default: int) -> int: # pylint: disable=arguments-differ
+        if key not in self:
+            return super().pop(key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self) -> Tuple[str, int]:
+        key, value = super().popitem()
+        self.remaining_cells -= value
+        self.remaining_ships -= value > 0
+        return key, value
+
+    def clear(self) -> None:
+        super().clear()
+        self.remaining_cells = 0
+        self.remaining_ships = 0
+
+    def __ior__(self, other: Dict[str, int]) -> 'Fleet':
+        self.update(other)
+        return self
+
+    def __or__(self, other: Dict[str, int]) -> 'Fleet':
+        merged = Fleet(self)
+        merged.update(other)
+        return merged
+
+    def copy(self) -> 'Fleet':
+        return Fleet(self)
+
+    def __copy__(self) -> 'Fleet':
+        return Fleet(self)
+
+    # Rebuilt from the ship lengths alone, so copies and pickles recount the totals
+    # instead of replaying each item on top of them
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, int]]]:
+        return Fleet, (dict(self),)
+
+def load_fleet(filename: str = config.BATTLESHIPS) -> Tuple[Tuple[str, int], ...]:
+    """
+    Returns the fleet described by a battleships file as an immutable tuple of
+    (name, length) pairs. The parsed fleet is cached per path, and only re-read
+    when the modification time or size of the file changes.
 
     Args:
         filename (str, optional): The path to the file containing the battleships data.
             Defaults to 'battleships.txt' which is stored in the config.
 
     Returns:
-        Dict[str, int]: A dictionary mapping each battleship name to its length.
+        Tuple[Tuple[str, int], ...]: The name and length of each battleship, in file order.
 
     Raises:
         FileNotFoundError: If the specified file is not found.
-        Exception: If an error occurs while creating the battleships dictionary.
+        Exception: If an error occurs while reading the battleships file.
     """
-    ships = {}
     try:
+        stat = os.stat(filename)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = _fleet_cache.get(filename)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        ships = {}
         with open(filename, 'r', encoding='utf-8') as file_in:
             for line in file_in:
                 ships[line.split(":")[0]] = int(line.split(":")[1])
+        fleet = tuple(ships.items())
+        _fleet_cache[filename] = (key, fleet)
         logging_message = f'Battleships loaded from: {filename}'
         logging.info(logging_message)
 
@@ -79,10 +207,49 @@ def create_battleships(filename: str = config.BATTLESHIPS) -> Dict[str, int]:
         error_message = f'An error occured while creating battlefships: {exception}'
         logging.error(error_message)
         raise exception
-    return ships
+    return fleet
+
+def create_battleships(filename: str = config.BATTLESHIPS) -> Dict[str, int]:
+    """
+    Reads a file containing battleship names and their lengths, and returns a dictionary
+    mapping each battleship to its length.
+
+    The file is only parsed when it has changed (see load_fleet()), and every call
+    returns a new Fleet, so each game can count down its own copy.
+
+    Args:
+        filename (str, optional): The path to the file containing the battleships data.
+            Defaults to 'battleships.txt' which is stored in the config.
+
+    Returns:
+        Dict[str, int]: A dictionary (Fleet) mapping each battleship name to its length.
+
+    Raises:
+        FileNotFoundError: If the specified file is not found.
+        Exception: If an error occurs while creating the battleships dictionary.
+    """
+    return Fleet(load_fleet(filename))
+
+def all_ships_sunk(battleships: Dict[str, int]) -> bool:
+    """
+    Check if every ship in a fleet has been sunk. This is constant time for a Fleet,
+    and falls back to checking each ship for a plain dictionary.
+
+    Args:
+        battleships (Dict[str, int]): A dictionary mapping the name of each battleship
+        to its remaining length.
+
+    Returns:
+        bool: True if no ship has any cells left, False otherwise.
+    """
+    if isinstance(battleships, Fleet):
+        return battleships.remaining_cells == 0
+    return all(value == 0 for value in battleships.values())
 
 def place_battleships(board: List[List[Union[str, None]]], ships: Dict[str, int],
-                      algorithm: str = config.ALGORITHM_SIMPLE) -> List[List[Union[str, None]]]:
+                      algorithm: str = config.ALGORITHM_SIMPLE,
+                      placements: Dict[str, Tuple[str, str, str]] = None
+                      ) -> List[List[Union[str, None]]]:
     """
     Generates the placement of battleships on the board according to the specified algorithm.
 
@@ -92,36 +259,61 @@ def place_battleships(board: List[List[Union[str, None]]], ships: Dict[str, int]
         and the number of each ship as values.
         algorithm (str, optional): The algorithm to use for placing the ships.
         Defaults to 'simple' which is stored in the config.
+        placements (Dict[str, Tuple[str, str, str]], optional): The (x, y, orientation)
+        of each ship for the 'custom' algorithm. If not given, they are read from
+        placement.json which is stored in the config.
 
     Returns:
         List[List[Union[str, None]]]: The updated game board with the battleships placed.
     """
     if algorithm == config.ALGORITHM_SIMPLE:
         for i, (key, value) in enumerate(ships.items()):
-            for j in range(value):
-                board[i][j] = key
+            place_ship_cells(board, key, value, 0, i, 'h')
         return board
 
     if algorithm == config.ALGORITHM_RANDOM:
+        index = PlacementIndex(board)
         for boat_name, boat_size in ships.items():
-            place_random_single_ship(board, boat_name, boat_size)
+            place_random_single_ship(board, boat_name, boat_size, index)
         return board
 
     if algorithm == config.ALGORITHM_CUSTOM:
-        try:
-            with open(config.PLACEMENT, 'r', encoding='utf-8') as file:
-                placements = json.load(file)
+        if placements is None:
+            try:
+                with open(config.PLACEMENT, 'r', encoding='utf-8') as file:
+                    placements = json.load(file)
 
-        except FileNotFoundError as filenotfound:
-            logging.error('placement.json file not found')
-            error_message = f'placement.json file not found: {filenotfound}'
-            raise FileNotFoundError(error_message) from filenotfound
+            except FileNotFoundError as filenotfound:
+                logging.error('placement.json file not found')
+                error_message = f'placement.json file not found: {filenotfound}'
+                raise FileNotFoundError(error_message) from filenotfound
 
         for boat_name, boat_size in ships.items():
             place_custom_single_ship(board, boat_name, boat_size, placements[boat_name])
         return board
     return None
 
+def save_placements(placements: Dict[str, Tuple[str, str, str]],
+                    filename: str = None) -> None:
+    """
+    Writes custom ship placements to a JSON file, in the format read by
+    place_battleships() when using the 'custom' algorithm without placements.
+
+    Args:
+        placements (Dict[str, Tuple[str, str, str]]): The (x, y, orientation) of each ship.
+        filename (str, optional): The path to write to.
+            Defaults to config.PLACEMENT, read when called.
+
+    Returns:
+        None
+    """
+    if filename is None:
+        filename = config.PLACEMENT
+    with open(filename, 'w', encoding='utf-8') as json_file:
+        json.dump(placements, json_file)
+    logging_message = f'Placements saved to: {filename}'
+    logging.info(logging_message)
+
 def place_custom_single_ship(board: List[List[Union[str, None]]], boat_name: str,
                              boat_size: int, placement: Tuple[str, str, str]) -> None:
     """
@@ -146,71 +338,92 @@ def place_custom_single_ship(board: List[List[Union[str, None]]], boat_name: str
     x_placement = int(placement[0])
     y_placement = int(placement[1])
 
-    if placement[2] == 'h':
-        for i in range(boat_size):
-            if board[y_placement][x_placement + i] is not None:
-                logging.error('Invalid placement')
-                raise ValueError('Invalid placement')
+    if placement[2] in ('h', 'v'):
+        if not ship_fits(board, boat_size, x_placement, y_placement, placement[2]):
+            logging.error('Invalid placement')
+            raise ValueError('Invalid placement')
 
-        for i in range(boat_size):
-            board[y_placement][x_placement + i] = boat_name
+        place_ship_cells(board, boat_name, boat_size, x_placement, y_placement, placement[2])
 
-    if placement[2] == 'v':
-        for i in range(boat_size):
-            if board[y_placement + i][x_placement] is not None:
-                logging.error('Invalid placement')
-                raise ValueError('Invalid placement')
 
-        for i in range(boat_size):
-            board[y_placement + i][x_placement] = boat_name
+def ship_fits(board: List[List[Union[str, None]]], boat_size: int,
+              x_coordinate: int, y_coordinate: int, orientation: str) -> bool:
+    """
+    Check if a ship can be placed on the board without overlapping another ship.
 
+    Args:
+        board (List[List[Union[str, None]]]): The game board, or an alternative board backend.
+        boat_size (int): The size of the ship to be placed.
+        x_coordinate (int): The column of the first cell of the ship.
+        y_coordinate (int): The row of the first cell of the ship.
+        orientation (str): 'h' for horizontal or 'v' for vertical.
 
-def place_random_single_ship(board: List[List[Union[str, None]]],
-                            boat_name: str, boat_size: int) -> None:
+    Returns:
+        bool: True if every cell the ship would cover is empty, False otherwise.
     """
-    Randomly places a single ship on the board. Used by place_battleships()
-    when using the 'random' algorithm.
-    
+    if not isinstance(board, list):
+        return board.can_place(x_coordinate, y_coordinate, boat_size, orientation)
+    if orientation == 'h':
+        return all(board[y_coordinate][x_coordinate + i] is None for i in range(boat_size))
+    return all(board[y_coordinate + i][x_coordinate] is None for i in range(boat_size))
+
+def place_ship_cells(board: List[List[Union[str, None]]], boat_name: str, boat_size: int,
+                     x_coordinate: int, y_coordinate: int, orientation: str) -> None:
+    """
+    Write a ship onto the board. Does not check for overlaps, see ship_fits().
+
     Args:
-        board (List[List[Union[str, None]]]): The game board represented as a 2-d list.
+        board (List[List[Union[str, None]]]): The game board, or an alternative board backend.
         boat_name (str): The name of the ship to be placed.
         boat_size (int): The size of the ship to be placed.
-    
+        x_coordinate (int): The column of the first cell of the ship.
+        y_coordinate (int): The row of the first cell of the ship.
+        orientation (str): 'h' for horizontal or 'v' for vertical.
+
     Returns:
         None
     """
-    direction = random.choice(['horizontal', 'vertical'])
-    if direction == 'horizontal':
-        board_size = len(board)
-        available_rows = board_size
-        available_cols = board_size - boat_size + 1
-
-        row = random.randint(0, available_rows - 1)
-        col = random.randint(0, available_cols - 1)
-
+    if not isinstance(board, list):
+        board.place(boat_name, x_coordinate, y_coordinate, boat_size, orientation)
+        return
+    if orientation == 'h':
         for i in range(boat_size):
-            if board[row][col + i] is not None:
-                logging.debug('Invalid placement. Retrying...')
-                return place_random_single_ship(board, boat_name, boat_size)
+            board[y_coordinate][x_coordinate + i] = boat_name
+    else:
         for i in range(boat_size):
-            board[row][col + i] = boat_name
+            board[y_coordinate + i][x_coordinate] = boat_name
+
+def place_random_single_ship(board: List[List[Union[str, None]]], boat_name: str,
+                             boat_size: int, index: PlacementIndex = None) -> None:
+    """
+    Randomly places a single ship on the board. Used by place_battleships()
+    when using the 'random' algorithm.
 
-    elif direction == 'vertical':
-        board_size = len(board)
-        available_rows = board_size - boat_size + 1
-        available_cols = board_size
+    The position is drawn uniformly from the positions where the ship still fits,
+    so there is no retrying on collisions beyond the few direct draws tried by
+    PlacementIndex.sample(), which are counted in metrics.placement_retries.
 
-        row = random.randint(0, available_rows - 1)
-        col = random.randint(0, available_cols - 1)
+    Args:
+        board (List[List[Union[str, None]]]): The game board represented as a 2-d list.
+        boat_name (str): The name of the ship to be placed.
+        boat_size (int): The size of the ship to be placed.
+        index (PlacementIndex, optional): The index of legal positions on this board.
+            Reuse one index when placing a whole fleet. Defaults to a new index.
 
-        for i in range(boat_size):
-            if board[row + i][col] is not None:
-                logging.debug('Invalid placement. Retrying...')
-                return place_random_single_ship(board, boat_name, boat_size)
+    Returns:
+        None
 
-        for i in range(boat_size):
-            board[row + i][col] = boat_name
-    return None
+    Raises:
+        ValueError: If there is no room left on the board for the ship.
+    """
+    if index is None:
+        index = PlacementIndex(board)
+    rejections = index.rejections
+    x_coordinate, y_coordinate, orientation = index.sample(boat_size)
+    metrics.placements.inc()
+    metrics.placement_retries.inc(index.rejections - rejections)
+    place_ship_cells(board, boat_name, boat_size, x_coordinate, y_coordinate, orientation)
+    index.mark_placed(x_coordinate, y_coordinate, boat_size, orientation)
 
 def check_empty(board: List[List[Union[str, None]]]) -> bool:
     """
@@ -223,8 +436,126 @@ def check_empty(board: List[List[Union[str, None]]]) -> bool:
     Returns:
         bool: True if the board is empty, False otherwise.
     """
+    if not isinstance(board, list):
+        return board.is_empty()
     for row in board:
         for cell in row:
             if cell is not None:
                 return False
     return True
+
+def board_to_list(board: Any) -> List[List[Union[str, None]]]:
+    """
+    Returns any board in the 2-d list format, e.g. for rendering templates.
+
+    Args:
+        board (Any): A 2-d list board or an alternative board backend.
+
+    Returns:
+        List[List[Union[str, None]]]: The board as a 2-d list. List boards are returned as they are.
+    """
+    if isinstance(board, list):
+        return board
+    return board.to_list()
+
+def _generate_fleet_chunk(count: int, size: int, ship_sizes: Tuple[int, ...], seed: str) -> Any:
+    """
+    Generates one chunk of random fleets for generate_fleets(). Runs inside worker processes,
+    so it only takes picklable arguments.
+    """
+    import numpy as np # pylint: disable=import-outside-toplevel
+    dtype = np.int8 if len(ship_sizes) < np.iinfo(np.int8).max else np.int16
+    fleets = np.zeros((count, size, size), dtype=dtype)
+    rng = random.Random(seed)
+    for fleet in fleets:
+        index = PlacementIndex(BitBoard(size), rng)
+        for ship_id, boat_size in enumerate(ship_sizes, start=1):
+            x_coordinate, y_coordinate, orientation = index.sample(boat_size)
+            if orientation == 'h':
+                fleet[y_coordinate, x_coordinate:x_coordinate + boat_size] = ship_id
+            else:
+                fleet[y_coordinate:y_coordinate + boat_size, x_coordinate] = ship_id
+            index.mark_placed(x_coordinate, y_coordinate, boat_size, orientation)
+    return fleets
+
+def generate_fleets(count: int, size: int = 10, ships: Dict[str, int] = None,
+                    seed: Union[int, None] = None, processes: int = 1,
+                    chunk_size: int = 1000) -> Any:
+    """
+    Generates many independent random fleets in one call, for Monte Carlo simulations.
+    The fleets are placed with the same rules as the 'random' algorithm of place_battleships().
+
+    The batch is split into chunks of chunk_size fleets, and every chunk is seeded from the
+    batch seed and its chunk number. The result for a given seed is therefore the same
+    no matter how many processes are used. Requires numpy.
+
+    Args:
+        count (int): The number of fleets to generate.
+        size (int): The size of each game board. Defaults to 10.
+        ships (Dict[str, int], optional): The fleet to place. Defaults to create_battleships().
+        seed (Union[int, None], optional): The seed for the batch. Defaults to a random seed.
+        processes (int, optional): The number of worker processes. Defaults to 1 (no pool).
+        chunk_size (int, optional): The number of fleets generated per chunk. Defaults to 1000.
+
+    Returns:
+        np.ndarray: An int8 array of shape (count, size, size). Cells hold 0 when empty,
+        or i + 1 for the i-th ship in the fleet's order. Fleets of 127 or more ships
+        use int16 instead. The throughput of the batch is added to fleet_stats.
+
+    Raises:
+        ValueError: If the count is negative, or a fleet does not fit on the board.
+    """
+    import numpy as np # pylint: disable=import-outside-toplevel
+    if count < 0:
+        logging.error('Count must not be negative')
+        raise ValueError('Count must not be negative')
+    if ships is None:
+        ships = create_battleships()
+    if seed is None:
+        seed = random.getrandbits(64)
+    ship_sizes = tuple(ships.values())
+    chunks = [(min(chunk_size, count - start), size, ship_sizes, f'{seed}-{number}')
+              for number, start in enumerate(range(0, count, chunk_size))]
+
+    start_time = time.perf_counter()
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_generate_fleet_chunk, *zip(*chunks)))
+    else:
+        results = [_generate_fleet_chunk(*chunk) for chunk in chunks]
+    elapsed = time.perf_counter() - start_time
+
+    if results:
+        fleets = np.concatenate(results)
+    else:
+        fleets = np.zeros((0, size, size), dtype=np.int8)
+
+    fleets_per_second = count / elapsed if elapsed else 0.0
+    fleet_stats['fleets'] += count
+    fleet_stats['seconds'] += elapsed
+    fleet_stats['fleets_per_second'] = fleets_per_second
+    logging_message = f'Generated {count} fleets in {elapsed:.3f}s ({fleets_per_second:.0f} fleets/s)'
+    logging.info(logging_message)
+    return fleets
+
+def board_window(board: Any, x_coordinate: int, y_coordinate: int,
+                 width: int, height: int) -> List[List[Union[str, None]]]:
+    """
+    Returns a rectangular part of any board in the 2-d list format, clipped to the board.
+    Sparse boards build only the window, so this is the way to render part of a huge board.
+
+    Args:
+        board (Any): A 2-d list board or an alternative board backend.
+        x_coordinate (int): The column of the top left cell of the window.
+        y_coordinate (int): The row of the top left cell of the window.
+        width (int): The number of columns in the window.
+        height (int): The number of rows in the window.
+
+    Returns:
+        List[List[Union[str, None]]]: The cells of the window as a 2-d list.
+    """
+    if hasattr(board, 'window'):
+        return board.window(x_coordinate, y_coordinate, width, height)
+    left, top = max(0, x_coordinate), max(0, y_coordinate)
+    rows = board_to_list(board)[top:y_coordinate + height]
+    return [row[left:x_coordinate + width] for row in rows]
@@ -10,12 +10,45 @@ SIZE = 10 # size of board
 # Files
 BATTLESHIPS = 'battleships.txt' # file with battleships
 PLACEMENT = 'placement.json' # file with placement of ships
+EXPORT_PLACEMENT = False # also save placements from the Flask game to PLACEMENT
 
 # Algorithms
 ALGORITHM_SIMPLE = 'simple' # algorithm that places sequetially
 ALGORITHM_RANDOM = 'random' # algorithm that places randomly
 ALGORITHM_CUSTOM = 'custom' # algorithm that places according to placement.json
 
+# AI attack strategies (see mp_game_engine.STRATEGIES)
+AI_STRATEGY = 'no_repeat' # strategy used by the AI in the Flask and CLI games
+MONTE_CARLO_BUDGET = 0.05 # seconds of sampling per move for the 'monte_carlo' AI
+MONTE_CARLO_PROCESSES = 1 # worker processes sampling for the 'monte_carlo' AI
+
+# Board backends
+BOARD_LIST = 'list' # board stored as a 2-d list of ship names
+BOARD_BITBOARD = 'bitboard' # board stored as one integer bitmask per ship
+BOARD_NUMPY = 'numpy' # board stored as a numpy grid of ship ids (requires numpy)
+BOARD_SPARSE = 'sparse' # board storing only its occupied cells, for very large boards
+BOARD_BACKEND = BOARD_LIST # backend used for the boards in the Flask game
+
+# Flask sessions
+MAX_GAMES = 10000 # most games kept in memory at once, the least recently used is evicted
+GAME_TTL = 3600 # seconds a game may be idle before it is removed
+SECRET_KEY = None # key signing the session cookie, random per process if None (set with DATABASE)
+SHOT_WORKERS = 4 # threads playing the shots queued through '/shot'
+SSE_KEEPALIVE = 15 # seconds between keep-alive comments on an idle '/events' stream
+ASGI_WORKERS = 4 # threads running game setup, AI moves and rendering in asgi_app.py
+ASGI_COOKIE = 'battleships_game' # cookie holding the game id in asgi_app.py
+
+# Persistence
+DATABASE = None # SQLite file to save games to (e.g. 'battleships.db'), None for none
+PERSIST_BATCH = 500 # most saves written to the database in one transaction
+PERSIST_INTERVAL = 0.05 # most seconds the writer waits for a batch of saves to fill
+PERSIST_POOL = 2 # database connections kept for restoring games
+
+# Metrics
+METRICS_ROUTES = ('/placement', '/', '/attack') # routes whose latency is timed for '/metrics'
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5) # seconds
+METRICS_RATE_WINDOW = 60 # seconds of scrapes the moves per second are averaged over
+
 # HTML files
 PLACEMENT_HTML = 'placement.html' # html file for placing ships
 MAIN_HTML = 'main.html' # html file for gameplay
@@ -6,45 +6,143 @@ including performing attacks, getting user input, and running a simple game loop
 
 Functions:
 - attack: Performs a single attack on given the coordinates, board, and battleships.
+- attack_result: Builds the AttackResult record for a hit or miss.
+- attack_many: Performs a batch of attacks in one pass.
 - get_input: Function to get an integer input from the user within a specified range.
 - cli_coordinates_input: A function that prompts the user to enter x and y coordinates.
 - simple_game_loop: Represents a simple game loop for the game Battleships.
+
+Classes:
+- AttackResult: The outcome of a single attack, returned by attack(detailed=True).
 """
 
-from typing import List, Dict, Tuple, Union
+from typing import Any, Iterable, List, Dict, NamedTuple, Tuple, Union
 import logging
 
 import config
-from components import initialise_board, create_battleships, place_battleships
+from components import initialise_board, create_battleships, place_battleships, all_ships_sunk
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+class AttackResult(NamedTuple):
+    """
+    The outcome of a single attack. It is truthy exactly when the attack hit,
+    so it can be used wherever the bool returned by attack() was used.
+
+    Attributes:
+    - hit (bool): True if the attack hit a battleship.
+    - ship (Union[str, None]): The name of the battleship that was hit, or None for a miss.
+    - sunk (bool): True if this attack sank the battleship.
+    - game_over (bool): True if every battleship in the fleet has now been sunk.
+    """
+    hit: bool
+    ship: Union[str, None] = None
+    sunk: bool = False
+    game_over: bool = False
+
+    def __bool__(self) -> bool:
+        return self.hit
+
+MISS = AttackResult(False)
+
+def attack_result(ship_name: Union[str, None], battleships: Dict[str, int]) -> AttackResult:
+    """
+    Builds the AttackResult record for a hit or miss, after the fleet has been updated.
+    Game over is checked with all_ships_sunk(), which is constant time for a Fleet.
+
+    Parameters:
+        ship_name (Union[str, None]): The name of the battleship that was hit, or None.
+        battleships (Dict[str, int]): A dictionary mapping the name of each battleship
+                                        to its current length.
+
+    Returns:
+        AttackResult: The outcome of the attack.
+    """
+    if ship_name is None:
+        return MISS
+    sunk = battleships[ship_name] == 0
+    return AttackResult(True, ship_name, sunk, sunk and all_ships_sunk(battleships))
+
 def attack(coordinates: Tuple[int, int], board: List[List[Union[str, None]]],
-            battleships: Dict[str, int]) -> bool:
+            battleships: Dict[str, int], detailed: bool = False) -> Union[bool, AttackResult]:
     """
     Performs a single attack on given the coordinates, board, and battleships.
 
     Parameters:
         coordinates (Tuple[int, int]): The x and y coordinates of the attack.
-        board (List[List[Union[str, None]]]): The game board represented as a 2-d list.
+        board (List[List[Union[str, None]]]): The game board represented as a 2-d list,
+                                        or an alternative board backend such as a BitBoard.
         battleships (Dict[str, int]): A dictionary mapping the name of each battleship
                                         to its current length.
+        detailed (bool, optional): Return an AttackResult instead of a bool. Defaults to False.
 
     Returns:
         bool: True if the attack hits a battleship, False otherwise.
+        If detailed is set, an AttackResult with the ship hit and whether it sank.
     """
     x_coordinate, y_coordinate = coordinates
-    if board[y_coordinate][x_coordinate] is None:
+    if not isinstance(board, list):
+        ship_name = board.hit(x_coordinate, y_coordinate)
+    else:
+        ship_name = board[y_coordinate][x_coordinate]
+        if ship_name is not None:
+            board[y_coordinate][x_coordinate] = None
+
+    if ship_name is None:
         logging.info('Attack missed')
-        return False
+        return MISS if detailed else False
 
-    ship_name = board[y_coordinate][x_coordinate]
     battleships[ship_name] -= 1
-    board[y_coordinate][x_coordinate] = None
-
     logging_message = f'Attack hit: {ship_name}'
     logging.info(logging_message)
-    return True
+    return attack_result(ship_name, battleships) if detailed else True
+
+def attack_many(coordinates: Iterable[Tuple[int, int]], board: List[List[Union[str, None]]],
+                battleships: Dict[str, int]) -> Tuple[List[bool], List[str]]:
+    """
+    Performs a batch of attacks in one pass, e.g. for replays and simulations.
+    The outcome is identical to calling attack() for each pair of coordinates in order,
+    but only one summary is logged for the whole batch.
+
+    Parameters:
+        coordinates (Iterable[Tuple[int, int]]): The x and y coordinates of each attack.
+                                        A NumPy array of shape (n, 2) is also accepted.
+        board (List[List[Union[str, None]]]): The game board represented as a 2-d list,
+                                        or an alternative board backend such as a BitBoard.
+        battleships (Dict[str, int]): A dictionary mapping the name of each battleship
+                                        to its current length.
+
+    Returns:
+        Tuple[List[bool], List[str]]: Whether each attack hit a battleship,
+        and the names of the battleships sunk by the batch in the order they sank.
+    """
+    if hasattr(coordinates, 'tolist'):
+        coordinates = coordinates.tolist()
+    hits: List[bool] = []
+    sunk: List[str] = []
+    record_hit = hits.append
+
+    hit_cell: Any = None if isinstance(board, list) else board.hit
+    for x_coordinate, y_coordinate in coordinates:
+        if hit_cell is None:
+            row = board[y_coordinate]
+            ship_name = row[x_coordinate]
+            if ship_name is not None:
+                row[x_coordinate] = None
+        else:
+            ship_name = hit_cell(x_coordinate, y_coordinate)
+
+        if ship_name is None:
+            record_hit(False)
+            continue
+        battleships[ship_name] -= 1
+        if battleships[ship_name] == 0:
+            sunk.append(ship_name)
+        record_hit(True)
+
+    logging_message = f'Batch of {len(hits)} attacks: {sum(hits)} hits, ships sunk: {sunk}'
+    logging.info(logging_message)
+    return hits, sunk
 
 def get_input(prompt: str, size: int = 10) -> int:
     """
@@ -100,7 +198,7 @@ def simple_game_loop(size: int = 10) -> None:
     ships = create_battleships()
     place_battleships(board, ships, config.ALGORITHM_SIMPLE)
 
-    while not all(value == 0 for value in ships.values()):
+    while not all_ships_sunk(ships):
         coords = cli_coordinates_input()
         attack(coords, board, ships)
     logging.info('Game over, you sunk all ships!')
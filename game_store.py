@@ -0,0 +1,226 @@
+"""
+game_store.py - Module for keeping one game per player session
+
+This module provides a registry of games keyed by session id, so every browser
+playing the Flask game gets its own game. Memory is bounded in two ways: games which
+have not been used for longer than the idle TTL expire, and once the cap on live
+games is reached the least recently used game is evicted to make room for a new one.
+
+Games are kept in an OrderedDict in order of last use, so finding the least recently
+used game, and the games which have been idle for too long, only looks at the front
+of the dictionary. The store has its own lock, held only while the dictionary is
+looked up or changed. Each game locks itself while it is being played.
+
+If a loader is given, a session with no live game is first looked up with it (e.g. in
+the database of saved games), outside the store's lock, before a new game is created.
+Sessions whose id has just been created are never looked up, as they can not have
+a saved game.
+
+Classes:
+- GameStore: A bounded registry of games keyed by session id, with LRU and TTL eviction.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple, Union
+import logging
+import threading
+import time
+
+import config
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class GameStore:
+    """
+    A bounded registry of games keyed by session id, with LRU and TTL eviction.
+
+    Attributes:
+    - factory (Callable[[str], Any]): Creates the game for a new session, given its id.
+    - loader (Union[Callable[[str], Any], None]): Returns the saved game of a session
+      which has no live game, or None if it has none.
+    - max_games (int): The most games kept at once.
+    - ttl (float): Seconds a game may go unused before it expires.
+    - clock (Callable[[], float]): Returns the current time in seconds.
+    - hits (int): Lookups which found a live game.
+    - misses (int): Lookups which found no live game.
+    - restored (int): Missed lookups whose game was restored by the loader.
+    - evictions (int): Games evicted because the store was full.
+    - expirations (int): Games removed after being idle for longer than the TTL.
+
+    Methods:
+    - get(): Returns the game for a session, creating it if needed.
+    - peek(): Returns the game for a session without creating it or counting a lookup.
+    - put(): Stores a game for a session.
+    - discard(): Removes the game for a session.
+    - expire(): Removes the games which have been idle for longer than the TTL.
+    - stats(): Returns the size, hit rate and eviction counts of the store.
+    """
+
+    __slots__ = ('factory', 'loader', 'max_games', 'ttl', 'clock', 'hits', 'misses',
+                 'restored', 'evictions', 'expirations', '_games', '_lock')
+
+    def __init__(self, factory: Callable[[str], Any], max_games: int = None,
+                 ttl: float = None, clock: Callable[[], float] = time.monotonic,
+                 loader: Callable[[str], Any] = None):
+        """
+        Initializes an empty store.
+
+        Args:
+            factory (Callable[[str], Any]): Creates the game for a new session, given its id.
+            max_games (int, optional): The most games kept at once.
+                Defaults to config.MAX_GAMES.
+            ttl (float, optional): Seconds a game may go unused before it expires.
+                Defaults to config.GAME_TTL.
+            clock (Callable[[], float], optional): Returns the current time in seconds.
+                Defaults to time.monotonic.
+            loader (Callable[[str], Any], optional): Returns the saved game of a session,
+                or None if it has none. Defaults to no loader.
+
+        Raises:
+            ValueError: If max_games is less than 1.
+        """
+        if max_games is None:
+            max_games = config.MAX_GAMES
+        if max_games < 1:
+            logging.error('max_games must be at least 1')
+            raise ValueError('max_games must be at least 1')
+        self.factory = factory
+        self.loader = loader
+        self.max_games: int = max_games
+        self.ttl: float = config.GAME_TTL if ttl is None else ttl
+        self.clock = clock
+        self.hits: int = 0
+        self.misses: int = 0
+        self.restored: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self._games: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._games
+
+    def expire(self) -> int:
+        """
+        Removes the games which have been idle for longer than the TTL.
+        Games are in order of last use, so this stops at the first game still in use.
+
+        Returns:
+            int: The number of games removed.
+        """
+        with self._lock:
+            cutoff = self.clock() - self.ttl
+            expired = 0
+            while self._games:
+                session_id, (_, last_used) = next(iter(self._games.items()))
+                if last_used > cutoff:
+                    break
+                del self._games[session_id]
+                expired += 1
+            if expired:
+                self.expirations += expired
+                logging_message = f'Expired {expired} idle games'
+                logging.info(logging_message)
+            return expired
+
+    def get(self, session_id: str, new: bool = False) -> Any:
+        """
+        Returns the game for a session, restoring it with the loader or creating it
+        if there is no live game. Idle games are expired first, and if the store is full
+        the least recently used game is evicted to make room.
+
+        Args:
+            session_id (str): The id of the player's session.
+            new (bool, optional): The session id has just been created, so the loader is
+                skipped. Defaults to False.
+
+        Returns:
+            Any: The game for the session.
+        """
+        with self._lock:
+            self.expire()
+            entry = self._games.get(session_id)
+            if entry is not None:
+                self.hits += 1
+                self.put(session_id, entry[0])
+                return entry[0]
+            self.misses += 1
+            if self.loader is None or new:
+                game = self.factory(session_id)
+                self.put(session_id, game)
+                return game
+
+        game = self.loader(session_id)
+        with self._lock:
+            entry = self._games.get(session_id)
+            if entry is not None:
+                # Another request restored or created the game first
+                game = entry[0]
+            elif game is not None:
+                self.restored += 1
+            else:
+                game = self.factory(session_id)
+            self.put(session_id, game)
+            return game
+
+    def peek(self, session_id: str) -> Union[Any, None]:
+        """
+        Returns the game for a session without creating it, counting a lookup
+        or changing its last use.
+
+        Args:
+            session_id (str): The id of the player's session.
+
+        Returns:
+            Union[Any, None]: The game for the session, or None if there is none.
+        """
+        with self._lock:
+            entry = self._games.get(session_id)
+            return entry[0] if entry is not None else None
+
+    def put(self, session_id: str, game: Any) -> None:
+        """
+        Stores a game for a session as the most recently used, evicting the least
+        recently used game if the store is full.
+
+        Args:
+            session_id (str): The id of the player's session.
+            game (Any): The game to store.
+        """
+        with self._lock:
+            if session_id in self._games:
+                self._games.move_to_end(session_id)
+            elif len(self._games) >= self.max_games:
+                evicted, _ = self._games.popitem(last=False)
+                self.evictions += 1
+                logging_message = f'Game store full, evicted game for session {evicted}'
+                logging.info(logging_message)
+            self._games[session_id] = (game, self.clock())
+
+    def discard(self, session_id: str) -> None:
+        """
+        Removes the game for a session, if there is one.
+
+        Args:
+            session_id (str): The id of the player's session.
+        """
+        with self._lock:
+            self._games.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns the size, hit rate and eviction counts of the store.
+
+        Returns:
+            Dict[str, Union[int, float]]: The number of live games, the cap, the hits,
+            misses, restores and hit rate of lookups, and the LRU evictions and TTL expirations.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'games': len(self._games), 'max_games': self.max_games,
+                    'hits': self.hits, 'misses': self.misses, 'restored': self.restored,
+                    'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'evictions': self.evictions, 'expirations': self.expirations}
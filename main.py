@@ -4,26 +4,138 @@ main.py - Module for the main application logic of the Battleships game
 This module defines the Flask application and handles the routes
 and endpoints for the Battleships game.
 It includes functions for handling ship placement, attacking, and rendering the game interface.
+Each browser session plays its own game, kept in a GameStore keyed by a random
+session id stored in the (signed) Flask session cookie.
+
+Turn results are also pushed to the browser as Server-Sent Events from '/events',
+so shots posted to '/shot' return at once and the AI's reply arrives when it is ready.
+A browser which reconnects can instead fetch just the cells shot since a given move
+from '/state', encoded compactly by cell_codec.
+
+Request latencies, turns, AI decision times and games in memory are counted by the
+metrics module and served from '/metrics' for a Prometheus scraper.
+
+Rendered pages are cached: the main page of each game until its version changes, and
+the placement page until the fleet file changes. Pages are sent with an ETag, so a
+browser revalidating an unchanged page gets a 304 Not Modified with no body.
 
 Functions:
+- format_event: Formats a game event as a Server-Sent Event.
+- page_etag: Returns the ETag of a rendered page.
+- placement_page: Returns the rendered placement page and its ETag.
+- page_response: Returns a rendered page, or 304 Not Modified if the browser has it.
+- check_persistence_config: Checks that saved games can be restored after a restart.
+- restore_game: Restores the saved game of a session, if it has one.
+- current_game: Returns the game for the current session, creating it if needed.
 - placement_interface: Endpoint for the '/placement' route that handles ship placement.
 - root: Function that handles the root '/' endpoint of the application.
 - process_attack: Function that processes an attack '/attack' on the game board.
+- queue_shot: Function that queues a shot '/shot' on the game board.
+- stream_events: Function that streams the events '/events' of the game.
+- game_state: Function that returns the changes '/state' since a given move.
+- start_timer: Notes when each request started, to time it.
+- record_latency: Records how long the request took, for the routes in config.METRICS_ROUTES.
+- metrics_endpoint: Function that returns the metrics '/metrics' in the Prometheus format.
 """
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Set, Tuple, Union
+import hashlib
 import json
 import logging
-from typing import List, Dict, Union, Any
-from flask import Flask, render_template, request, jsonify, redirect
+import secrets
+import threading
+import time
+from flask import (Flask, Response, render_template, request, jsonify, redirect, session,
+                   make_response, g)
 
 import config
-from components import initialise_board, create_battleships, place_battleships, check_empty
-from game_engine import attack
-from mp_game_engine import generate_attack
+import metrics
+from game_store import GameStore
+from persistence import GamePersistence
+from cell_codec import encode_cells
+from components import create_battleships, board_to_list, save_placements, load_fleet
+from game_engine import AttackResult
+from mp_game_engine import Game
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 app = Flask(__name__)
+app.secret_key = config.SECRET_KEY or secrets.token_hex(32)
+
+shot_executor = ThreadPoolExecutor(config.SHOT_WORKERS, thread_name_prefix='shots')
+
+def format_event(event: Dict[str, Any]) -> str:
+    """
+    Formats a game event as a Server-Sent Event.
+
+    Args:
+        event (Dict[str, Any]): The event, with its 'id', 'event' type and 'data'.
+
+    Returns:
+        str: The event in the text/event-stream format.
+    """
+    return f'id: {event["id"]}\nevent: {event["event"]}\ndata: {json.dumps(event["data"])}\n\n'
+
+def page_etag(page: str) -> str:
+    """
+    Returns the ETag of a rendered page, a hash of its contents.
+
+    Args:
+        page (str): The rendered page.
+
+    Returns:
+        str: The ETag, without quotes.
+    """
+    return hashlib.blake2b(page.encode('utf-8'), digest_size=16).hexdigest()
+
+# The placement page, cached with the fleet it was rendered for
+_placement_cache: Dict[str, Tuple[Tuple[Tuple[str, int], ...], str, str]] = {}
+
+def placement_page(render: Callable[..., str] = render_template) -> Tuple[str, str]:
+    """
+    Returns the rendered placement page and its ETag. The page is only rendered again
+    when the fleet file changes, as load_fleet() returns the same fleet until then.
+
+    Args:
+        render (Callable[..., str], optional): Renders a template with its context.
+            Defaults to flask.render_template.
+
+    Returns:
+        Tuple[str, str]: The page and its ETag.
+    """
+    fleet = load_fleet(config.BATTLESHIPS)
+    cached = _placement_cache.get(config.BATTLESHIPS)
+    if cached is not None and cached[0] is fleet:
+        return cached[1], cached[2]
+    logging_message = f'Rendering {config.PLACEMENT_HTML} for ship placement'
+    logging.info(logging_message)
+    page = render(config.PLACEMENT_HTML, ships=dict(fleet), board_size=10)
+    etag = page_etag(page)
+    _placement_cache[config.BATTLESHIPS] = (fleet, page, etag)
+    return page, etag
+
+def page_response(page: str, etag: str) -> Any:
+    """
+    Returns a rendered page with its ETag, or an empty 304 Not Modified response
+    if the browser sent the same ETag in If-None-Match.
+    Browsers are told to revalidate the page every time it is loaded.
+
+    Args:
+        page (str): The rendered page.
+        etag (str): The ETag of the page.
+
+    Returns:
+        Flask.Response: The page, or 304 Not Modified.
+    """
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = make_response(page)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 class BattleshipsGame:
     """
@@ -31,65 +143,433 @@ class BattleshipsGame:
     in the other files to Flask which handles UI.
 
     Attributes:
+    - game_id (Union[str, None]): The id of the game's session.
+    - ships (Dict[str, int]): Stores the information about the ships in the game.
+    - state (Game): The game being played, None until the player has placed their ships.
+      Its boards use the board backend set by config.BOARD_BACKEND, and its AI
+      the attack strategy chosen by config.AI_STRATEGY.
     - board_initialized (bool): Indicates whether the game boards have been initialized.
+    - move_log (List[Tuple[Tuple[int, int], AttackResult, Union[Tuple[int, int], None],
+      Union[AttackResult, None]]]): Each move played, as the player's attack and its
+      outcome, then the AI's reply and its outcome (None if the player won).
+    - version (int): Counts the changes to the player's board, to know when the cached
+      main page is out of date.
     - player_board (List[List[Union[str, None]]]): Represents the player's game board.
     - ai_board (List[List[Union[str, None]]]): Represents the AI's game board.
-    - ships (Dict[str, int]): Stores the information about the ships in the game.
+    - lock (threading.Lock): Serializes the requests for this game, so each game's turns
+      happen one at a time while different games are played in parallel.
+    - events (List[Dict[str, Any]]): Every event of the game so far, in order. An event's
+      'id' is its index, 'event' is 'shot', 'ai_shot' or 'game_over', and 'data' its details.
+      The list is only ever appended to, so it can be read without a lock.
+    - changed (threading.Condition): Notified whenever an event is added. It has its own
+      lock, so waiting for events never waits for an AI move to finish.
+    - listeners (Set[Callable[[], None]]): Also called whenever an event is added.
 
     Methods:
+    - new_placement(): Reads the fleet for the player to place.
+    - place(): Sets up the game from the player's placements.
+    - main_page(): Returns the rendered main page and its ETag.
+    - play_turn(): Plays the player's attack and the AI's reply.
+    - state_since(): Returns the cells shot and ships sunk since a given move.
+    - restore(): Restores the game from its saved boards by replaying its moves.
+    - submit_shot(): Queues a shot to be played in the background.
+    - on_board(): Checks whether a cell is on the game's boards.
+    - events_since(): Returns the events from a given id onwards.
+    - events_finished(): Checks whether a stream has nothing left to send.
+    - wait_for_events(): Waits until there are events from a given id onwards.
     - placement_interface(): Endpoint for the '/placement' route that handles ship placement.
     - root(): Function that handles the root '/' endpoint of the application.
     - process_attack(): Function that processes an attack '/attack' on the game board.
+    - queue_shot(): Function that queues a shot '/shot' on the game board.
+    - stream_events(): Function that streams the events '/events' of the game.
+    - game_state(): Function that returns the changes '/state' since a given move.
     """
 
-    def __init__(self):
+    def __init__(self, game_id: str = None):
         """
         Initializes a new instance of the BattleshipsGame class.
+
+        Args:
+            game_id (str, optional): The id of the game's session, used to save the game
+                when persistence is enabled.
         """
-        self.board_initialized: bool = False
-        self.player_board: List[List[Union[str, None]]] = None
-        self.ai_board: List[List[Union[str, None]]] = None
+        self.game_id: Union[str, None] = game_id
         self.ships: Dict[str, int] = None
+        self.state: Game = None
+        self.move_log: List[Tuple[Tuple[int, int], AttackResult, Union[Tuple[int, int], None],
+                                  Union[AttackResult, None]]] = []
+        self.version: int = 0
+        self._page: Union[Tuple[int, str, str], None] = None
+        self.lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+        self.changed = threading.Condition()
+        self.listeners: Set[Callable[[], None]] = set()
+        self._pending: Deque[Tuple[int, int]] = deque()
+        self._draining: bool = False
+
+    @property
+    def board_initialized(self) -> bool:
+        return self.state is not None
+
+    @property
+    def player_board(self) -> Union[List[List[Union[str, None]]], None]:
+        return self.state.player_board if self.state is not None else None
+
+    @property
+    def ai_board(self) -> Union[List[List[Union[str, None]]], None]:
+        return self.state.ai_board if self.state is not None else None
+
+    def new_placement(self) -> Dict[str, int]:
+        """
+        Reads the fleet for the player to place.
+
+        Returns:
+            Dict[str, int]: The ships to place and their lengths.
+        """
+        with self.lock:
+            self.ships = create_battleships()
+            return self.ships
+
+    def place(self, data: Dict[str, Any]) -> None:
+        """
+        Sets up the game from the player's placements, unless it has already started.
+        The placements are only written to the ships placement file
+        if config.EXPORT_PLACEMENT is set.
+
+        Args:
+            data (Dict[str, Any]): The placement of each ship, as posted by placement.html.
+        """
+        if config.EXPORT_PLACEMENT:
+            save_placements(data)
+
+        with self.lock:
+            if not self.board_initialized:
+                if self.ships is None:
+                    self.ships = create_battleships()
+                self.state = Game(config.SIZE, self.ships, data,
+                                  backend=config.BOARD_BACKEND)
+                self.version += 1
+                logging.info('Boards initialized and battleships placed')
+                if persistence is not None and self.game_id is not None:
+                    persistence.save_game(self.game_id, config.SIZE, config.BOARD_BACKEND,
+                                          config.AI_STRATEGY, self.ships,
+                                          self.state.player_board, self.state.ai_board)
+
+    def main_page(self, render: Callable[..., str] = render_template
+                  ) -> Union[Tuple[str, str], None]:
+        """
+        Returns the rendered main page and its ETag. The page is cached, and only
+        rendered again once the version of the game has changed.
+        It is rendered without holding the game's lock.
+
+        Args:
+            render (Callable[..., str], optional): Renders a template with its context.
+                Defaults to flask.render_template.
+
+        Returns:
+            Union[Tuple[str, str], None]: The page and its ETag,
+            or None if the boards have not been initialized.
+        """
+        with self.lock:
+            if not self.board_initialized:
+                return None
+            if self._page is not None and self._page[0] == self.version:
+                return self._page[1], self._page[2]
+            version = self.version
+            player_board = [list(row) for row in board_to_list(self.player_board)]
+        logging_message = f'Rendering {config.MAIN_HTML} for gameplay'
+        logging.info(logging_message)
+        page = render(config.MAIN_HTML, player_board=player_board)
+        etag = page_etag(page)
+        with self.lock:
+            if self.version == version:
+                self._page = (version, page, etag)
+        return page, etag
+
+    def play_turn(self, x_coordinate: int, y_coordinate: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Plays the player's attack and the AI's reply, with accompanying logging.
+
+        Args:
+            x_coordinate (int): The x coordinate of the player's attack.
+            y_coordinate (int): The y coordinate of the player's attack.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: The response describing the outcome of the attack
+            and the state of the game, and the HTTP status code.
+        """
+        with self.lock:
+            if not self.board_initialized:
+                logging.error('Attack before the boards were initialized')
+                return {'message': 'Place your ships first'}, 400
+            if not self.on_board(x_coordinate, y_coordinate):
+                return self._off_board(x_coordinate, y_coordinate)
+            if self.state.is_over():
+                winner = 'Player' if self.state.winner == 'player' else 'AI'
+                return {'hit': False, 'finished': f'Game Over {winner} wins'}, 200
+            outcome, ai_coordinates, ai_outcome = self._turn((x_coordinate, y_coordinate))
+            metrics.moves.inc()
+            if persistence is not None and self.game_id is not None:
+                persistence.save_move(self.game_id, self.state.moves - 1,
+                                      (x_coordinate, y_coordinate), ai_coordinates)
+        logging_message = (f'Player attacked AI at coordinates: {x_coordinate}, {y_coordinate}.'
+                            f'Outcome: {"Hit" if outcome else "Miss"}')
+        logging.info(logging_message)
+
+        if outcome.game_over:
+            logging.info('Game Over, player won')
+            return {'hit': True, 'Player_Turn': (x_coordinate, y_coordinate),
+                    'sunk': outcome.ship, 'finished': 'Game Over Player wins'}, 200
+
+        logging_message = f'AI attacked player at coordinates: {ai_coordinates}'
+        logging.info(logging_message)
+
+        response = {'hit': outcome.hit, 'AI_Turn': ai_coordinates}
+        if outcome.sunk:
+            response['sunk'] = outcome.ship
+        if ai_outcome.sunk:
+            response['AI_sunk'] = ai_outcome.ship
+
+        if ai_outcome.game_over:
+            logging.info('Game Over, AI won')
+            response['finished'] = 'Game Over AI wins'
+        return response, 200
+
+    def _turn(self, coordinates: Tuple[int, int], ai_coordinates: Tuple[int, int] = None
+              ) -> Tuple[AttackResult, Union[Tuple[int, int], None], Union[AttackResult, None]]:
+        """
+        Plays one turn and publishes its events. The caller must hold the game's lock.
+        """
+        self.version += 1
+        outcome, ai_coordinates, ai_outcome = self.state.play_turn(
+            coordinates, lambda result: self._publish_shot('shot', coordinates, result),
+            ai_coordinates)
+        if ai_outcome is not None:
+            self._publish_shot('ai_shot', ai_coordinates, ai_outcome)
+        self.move_log.append((coordinates, outcome, ai_coordinates, ai_outcome))
+        if self.state.is_over():
+            winner = 'Player' if self.state.winner == 'player' else 'AI'
+            self._publish('game_over', {'finished': f'Game Over {winner} wins'})
+        return outcome, ai_coordinates, ai_outcome
+
+    def state_since(self, since: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Returns the cells shot and the ships sunk since a given move, from the move log.
+        Each set of cells is encoded with cell_codec.encode_cells(), as y * size + x.
+        A cell shot again after it was hit, before or after the given move, is never
+        listed as a miss, as the shot hits nothing once the cell is cleared.
+
+        Args:
+            since (int): The number of moves the client has already seen, 0 for all of them.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: The changes and the HTTP status code. The changes
+            are the 'moves' played so far and the board 'size', the player's 'hits' and
+            'misses' on the AI's board and the ships it 'sunk', the same for the AI
+            as 'AI_hits', 'AI_misses' and 'AI_sunk', and 'finished' once the game is over.
+        """
+        with self.lock:
+            if not self.board_initialized:
+                logging.error('State requested before the boards were initialized')
+                return {'message': 'Place your ships first'}, 400
+            if not 0 <= since <= len(self.move_log):
+                logging_message = f'State requested since move {since} of {len(self.move_log)}'
+                logging.error(logging_message)
+                return {'message': f'since must be from 0 to {len(self.move_log)}'}, 400
+            move_log = list(self.move_log)
+            response: Dict[str, Any] = {'moves': len(self.move_log),
+                                        'size': len(self.player_board)}
+            if self.state.is_over():
+                winner = 'Player' if self.state.winner == 'player' else 'AI'
+                response['finished'] = f'Game Over {winner} wins'
+
+        size = response['size']
+        hits, misses, ai_hits, ai_misses = set(), set(), set(), set()
+        # Every cell hit so far, so repeat shots on a hit cell are not reported as misses
+        all_hits, all_ai_hits = set(), set()
+        sunk, ai_sunk = [], []
+        for move, (coordinates, outcome, ai_coordinates, ai_outcome) in enumerate(move_log):
+            cell = coordinates[1] * size + coordinates[0]
+            if outcome.hit:
+                all_hits.add(cell)
+            ai_cell = None
+            if ai_outcome is not None:
+                ai_cell = ai_coordinates[1] * size + ai_coordinates[0]
+                if ai_outcome.hit:
+                    all_ai_hits.add(ai_cell)
+            if move < since:
+                continue
+            (hits if outcome.hit else misses).add(cell)
+            if outcome.sunk:
+                sunk.append(outcome.ship)
+            if ai_outcome is not None:
+                (ai_hits if ai_outcome.hit else ai_misses).add(ai_cell)
+                if ai_outcome.sunk:
+                    ai_sunk.append(ai_outcome.ship)
+        response.update({'hits': encode_cells(hits), 'misses': encode_cells(misses - all_hits),
+                         'sunk': sunk, 'AI_hits': encode_cells(ai_hits),
+                         'AI_misses': encode_cells(ai_misses - all_ai_hits), 'AI_sunk': ai_sunk})
+        return response, 200
+
+    def restore(self, saved: Dict[str, Any]) -> None:
+        """
+        Restores the game from its saved boards by replaying its moves,
+        which also rebuilds its events.
+
+        Args:
+            saved (Dict[str, Any]): The saved game, from GamePersistence.load().
+        """
+        with self.lock:
+            self.ships = saved['ships']
+            self.state = Game.restore(saved['size'], saved['ships'], saved['player_board'],
+                                      saved['ai_board'], saved['ai_strategy'])
+            for x_coordinate, y_coordinate, ai_x, ai_y in saved['moves']:
+                self._turn((x_coordinate, y_coordinate),
+                           (ai_x, ai_y) if ai_x is not None else None)
+        logging_message = f'Restored game {self.game_id} after {len(saved["moves"])} moves'
+        logging.info(logging_message)
+
+    def _publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        Adds an event to the game's events and wakes everyone waiting for it.
+        """
+        with self.changed:
+            self.events.append({'id': len(self.events), 'event': event_type, 'data': data})
+            self.changed.notify_all()
+        for listener in tuple(self.listeners):
+            listener()
+
+    def _publish_shot(self, event_type: str, coordinates: Tuple[int, int],
+                      result: AttackResult) -> None:
+        self._publish(event_type, {'x': coordinates[0], 'y': coordinates[1], 'hit': result.hit,
+                                   'sunk': result.ship if result.sunk else None})
+
+    def submit_shot(self, x_coordinate: int, y_coordinate: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Queues a shot to be played in the background. Shots are played one at a time
+        in the order they were queued, and their results are published as events.
+
+        Args:
+            x_coordinate (int): The x coordinate of the player's attack.
+            y_coordinate (int): The y coordinate of the player's attack.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: A message that the shot was queued (202), or why
+            it was not (400), and the HTTP status code.
+        """
+        if not self.board_initialized:
+            logging.error('Shot before the boards were initialized')
+            return {'message': 'Place your ships first'}, 400
+        if not self.on_board(x_coordinate, y_coordinate):
+            return self._off_board(x_coordinate, y_coordinate)
+        with self.changed:
+            self._pending.append((x_coordinate, y_coordinate))
+            if self._draining:
+                return {'message': 'Queued'}, 202
+            self._draining = True
+        shot_executor.submit(self._drain)
+        return {'message': 'Queued'}, 202
+
+    def on_board(self, x_coordinate: int, y_coordinate: int) -> bool:
+        """
+        Checks whether a cell is on the game's boards.
+
+        Args:
+            x_coordinate (int): The x coordinate of the cell.
+            y_coordinate (int): The y coordinate of the cell.
+
+        Returns:
+            bool: True if 0 <= x, y < the size of the boards.
+        """
+        size = len(self.player_board)
+        return 0 <= x_coordinate < size and 0 <= y_coordinate < size
+
+    def _off_board(self, x_coordinate: int, y_coordinate: int) -> Tuple[Dict[str, Any], int]:
+        logging_message = f'Attack off the board at coordinates: {x_coordinate}, {y_coordinate}'
+        logging.error(logging_message)
+        return {'message': f'x and y must be from 0 to {len(self.player_board) - 1}'}, 400
+
+    def _drain(self) -> None:
+        """
+        Plays the queued shots until there are none left. Runs on the shot executor.
+        """
+        while True:
+            with self.changed:
+                if not self._pending:
+                    self._draining = False
+                    return
+                x_coordinate, y_coordinate = self._pending.popleft()
+            try:
+                self.play_turn(x_coordinate, y_coordinate)
+            except Exception: # pylint: disable=broad-except
+                logging.exception('Queued shot failed')
+
+    def events_since(self, since: int) -> List[Dict[str, Any]]:
+        """
+        Returns the events from a given id onwards.
+
+        Args:
+            since (int): The id of the first event to return.
+
+        Returns:
+            List[Dict[str, Any]]: The events from that id onwards, possibly none.
+        """
+        return self.events[max(since, 0):]
+
+    def events_finished(self, since: int) -> bool:
+        """
+        Checks whether a stream has nothing left to send: the game_over event has been
+        published and its id is before the given id. This is checked rather than
+        is_over(), which is already true while the last turn's events are being published.
+
+        Args:
+            since (int): The id of the next event the stream would send.
+
+        Returns:
+            bool: True if no event from that id onwards will ever be published.
+        """
+        events = self.events
+        return bool(events) and events[-1]['event'] == 'game_over' and since > events[-1]['id']
+
+    def wait_for_events(self, since: int, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Waits until there are events from a given id onwards, or the timeout passes.
+
+        Args:
+            since (int): The id of the first event to return.
+            timeout (float): The most seconds to wait.
+
+        Returns:
+            List[Dict[str, Any]]: The events from that id onwards, empty if none arrived.
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: len(self.events) > since, timeout)
+        return self.events_since(since)
 
     def placement_interface(self) -> Any:
         """
         Endpoint for the '/placement' route that handles both GET and POST requests.
         For 'GET' requests it renders the 'placement.html' template.
         For 'POST' requests it reads the JSON data from the response
-        and writes it to the ships placement file.
+        and places the player's ships from it directly. The placements are only
+        written to the ships placement file if config.EXPORT_PLACEMENT is set.
         
         Parameters:
         json data (Dict[str, Any]): The JSON data sent in the POST request
         
         Returns:
         Flask.Response: 'GET' : The 'placement.html' template rendered
-                                with the correct size and ships to place.
+                                with the correct size and ships to place,
+                                or 304 Not Modified if the browser has it cached.
                         'POST' : message indicating the JSON data was received.
         """
 
         if request.method == 'GET':
-            self.ships = create_battleships()
-            logging_message = f'Rendering {config.PLACEMENT_HTML} for ship placement'
-            logging.info(logging_message)
-            return render_template(config.PLACEMENT_HTML, ships=self.ships, board_size=10)
+            self.new_placement()
+            return page_response(*placement_page())
 
         if request.method == 'POST':
-            data: Dict[str, Any] = request.get_json()
-
-            with open(config.PLACEMENT, 'w', encoding="utf-8") as json_file:
-                json.dump(data, json_file)
-
-            if not self.board_initialized:
-                self.player_board = initialise_board(config.SIZE)
-                self.ai_board = initialise_board(config.SIZE)
-
-                self.player_board = place_battleships(self.player_board,
-                                                    self.ships, config.ALGORITHM_CUSTOM)
-                self.ai_board = place_battleships(self.ai_board,
-                                                    self.ships, config.ALGORITHM_RANDOM)
-                self.board_initialized = True
-                logging.info('Boards initialized and battleships placed')
-
+            self.place(request.get_json())
             return jsonify({'message': 'Received'}), 200
         return None
 
@@ -104,14 +584,14 @@ class BattleshipsGame:
 
         Returns:
         Flask.Response: redirects to /placement if the board has not been created
-                        render the main page if the board has been created previously
+                        render the main page if the board has been created previously,
+                        or 304 Not Modified if the browser has it cached
         """
 
         if request.method == 'GET':
-            if self.board_initialized:
-                logging_message = f'Rendering {config.MAIN_HTML} for gameplay'
-                logging.info(logging_message)
-                return render_template(config.MAIN_HTML, player_board = self.player_board)
+            page = self.main_page()
+            if page is not None:
+                return page_response(*page)
 
             logging_message = f'Redirecting to {config.PLACEMENT_HTML} for ship placement'
             logging.info(logging_message)
@@ -130,58 +610,226 @@ class BattleshipsGame:
         y (int): The y coordinate of the attack.
 
         Returns:
-        JSON: information about the outcome of the attack, and the state of the game
+        JSON: information about the outcome of the attack, and the state of the game.
+              'sunk' and 'AI_sunk' name a ship sunk by the player's or the AI's attack.
+              A message and 400 if x and y are not integers on the board.
         """
 
         if request.method == 'GET':
-            x_coordinate = int(request.args.get('x'))
-            y_coordinate = int(request.args.get('y'))
+            try:
+                x_coordinate = int(request.args.get('x'))
+                y_coordinate = int(request.args.get('y'))
+            except (TypeError, ValueError):
+                logging.error('Attack without valid x and y coordinates')
+                return jsonify({'message': 'x and y must be integers'}), 400
+            response, status = self.play_turn(x_coordinate, y_coordinate)
+            return jsonify(response), status
+        return None
 
-            outcome = attack((x_coordinate, y_coordinate), self.ai_board, self.ships)
-            logging_message = (f'Player attacked AI at coordinates: {x_coordinate}, {y_coordinate}.'
-                                f'Outcome: {"Hit" if outcome else "Miss"}')
-            logging.info(logging_message)
+    def queue_shot(self) -> Any:
+        """
+        Queues a shot on the AI's board without waiting for it to be played.
+        The outcome and the AI's reply are streamed from '/events'.
 
-            if check_empty(self.ai_board):
-                logging.info('Game Over, player won')
-                return jsonify({'hit': True, 'Player_Turn': (x_coordinate, y_coordinate),
-                                'finished': 'Game Over Player wins'})
+        Parameters:
+        x (int): The x coordinate of the attack.
+        y (int): The y coordinate of the attack.
 
-            ai_coordinates = generate_attack(config.SIZE)
-            attack(ai_coordinates, self.player_board, self.ships)
-            logging_message = f'AI attacked player at coordinates: {ai_coordinates}'
-            logging.info(logging_message)
+        Returns:
+        JSON: a message that the shot was queued (202), or to place the ships first
+              or give valid coordinates (400).
+        """
 
-            if check_empty(self.player_board):
-                logging.info('Game Over, AI won')
-                return jsonify({'hit': outcome, 'AI_Turn': ai_coordinates,
-                                'finished': 'Game Over AI wins'})
+        if request.method == 'POST':
+            try:
+                x_coordinate = int(request.args.get('x'))
+                y_coordinate = int(request.args.get('y'))
+            except (TypeError, ValueError):
+                logging.error('Shot without valid x and y coordinates')
+                return jsonify({'message': 'x and y must be integers'}), 400
+            response, status = self.submit_shot(x_coordinate, y_coordinate)
+            return jsonify(response), status
+        return None
 
-            return jsonify({'hit': outcome, 'AI_Turn': ai_coordinates})
+    def game_state(self) -> Any:
+        """
+        Returns the changes to the game since the move given by the client,
+        so a browser which reconnects does not need the whole board again.
+
+        Parameters:
+        since (int): The number of moves the client has already seen. Defaults to 0.
+
+        Returns:
+        JSON: the cells shot and ships sunk since that move (see state_since()).
+        """
+
+        if request.method == 'GET':
+            try:
+                since = int(request.args.get('since', 0))
+            except ValueError:
+                logging.error('State requested without a valid since')
+                return jsonify({'message': 'since must be an integer'}), 400
+            response, status = self.state_since(since)
+            return jsonify(response), status
         return None
 
-game = BattleshipsGame()
+    def stream_events(self) -> Any:
+        """
+        Streams the events of the game as Server-Sent Events, until the game is over.
+        A reconnecting browser sends the id of the last event it received in the
+        Last-Event-ID header, and the stream resumes after it.
+
+        Parameters:
+        since (int, optional): The id of the first event to send. Defaults to 0.
+
+        Returns:
+        Flask.Response: the text/event-stream of the game's events,
+                        or a message that the event id is invalid (400).
+        """
+
+        if request.method == 'GET':
+            last_event_id = request.headers.get('Last-Event-ID')
+            try:
+                since = int(last_event_id) + 1 if last_event_id else int(
+                    request.args.get('since', 0))
+            except (TypeError, ValueError):
+                logging.error('Events requested from an invalid event id')
+                return jsonify({'message': 'Invalid event id'}), 400
+            return Response(self._event_stream(since), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache'})
+        return None
+
+    def _event_stream(self, since: int) -> Iterator[str]:
+        while True:
+            events = self.wait_for_events(since, config.SSE_KEEPALIVE)
+            if not events:
+                if self.events_finished(since):
+                    return
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                yield format_event(event)
+            since = events[-1]['id'] + 1
+            if events[-1]['event'] == 'game_over':
+                return
+
+def check_persistence_config() -> bool:
+    """
+    Checks that saved games can be restored by the Flask app after a restart.
+    The session cookie is signed with config.SECRET_KEY, or a new random key in every
+    process if it is not set, which makes every saved session's game id unreadable.
+
+    Returns:
+        bool: False, after logging a warning, if config.DATABASE is set without
+        config.SECRET_KEY, otherwise True.
+    """
+    if config.DATABASE and not config.SECRET_KEY:
+        logging.warning('config.DATABASE is set without config.SECRET_KEY, so sessions '
+                        'will not survive a restart and saved games will not be restored')
+        return False
+    return True
+
+check_persistence_config()
+persistence = GamePersistence() if config.DATABASE else None
+
+def restore_game(session_id: str) -> Union[BattleshipsGame, None]:
+    """
+    Restores the saved game of a session, if persistence is enabled and it has one.
+
+    Args:
+        session_id (str): The id of the session.
+
+    Returns:
+        Union[BattleshipsGame, None]: The restored game, or None if there is no saved game.
+    """
+    if persistence is None:
+        return None
+    saved = persistence.load(session_id)
+    if saved is None:
+        return None
+    game = BattleshipsGame(session_id)
+    game.restore(saved)
+    return game
+
+games = GameStore(BattleshipsGame, loader=restore_game)
+metrics.Gauge('battleships_active_games', 'Games kept in memory.', lambda: len(games))
+
+def current_game() -> BattleshipsGame:
+    """
+    Returns the game for the current session, giving the session an id if it is new.
+
+    Returns:
+        BattleshipsGame: The game for the current session.
+    """
+    if 'game_id' not in session:
+        session['game_id'] = secrets.token_urlsafe(16)
+        return games.get(session['game_id'], new=True)
+    return games.get(session['game_id'])
+
+@app.before_request
+def start_timer() -> None:
+    """
+    Notes when each request started, to time it.
+    """
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_latency(response: Response) -> Response:
+    """
+    Records how long the request took, for the routes in config.METRICS_ROUTES.
+    """
+    if request.path in config.METRICS_ROUTES and 'request_start' in g:
+        metrics.request_seconds.observe(time.perf_counter() - g.request_start, request.path)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint() -> Any:
+    """
+    Returns the metrics in the Prometheus text format. Does not create a game.
+    """
+    return Response(metrics.exposition(), content_type=metrics.CONTENT_TYPE)
 
 @app.route('/placement', methods=['GET', 'POST'])
 def placement_interface() -> Any:
     """
-    Uses the game object to handle and return the placement interface.
+    Uses the session's game object to handle and return the placement interface.
     """
-    return game.placement_interface()
+    return current_game().placement_interface()
 
 @app.route('/', methods=['GET'])
 def root() -> Any:
     """
-    Uses the game object to handle and return the root interface when website is opened.
+    Uses the session's game object to handle and return the root interface.
     """
-    return game.root()
+    return current_game().root()
 
 @app.route('/attack', methods=['GET'])
 def process_attack() -> Any:
     """
-    Uses the game object to handle the attack interface when player clicks tile.
+    Uses the session's game object to handle the attack interface when player clicks tile.
+    """
+    return current_game().process_attack()
+
+@app.route('/shot', methods=['POST'])
+def queue_shot() -> Any:
+    """
+    Uses the session's game object to queue a shot when player clicks tile.
+    """
+    return current_game().queue_shot()
+
+@app.route('/events', methods=['GET'])
+def stream_events() -> Any:
+    """
+    Uses the session's game object to stream the events of the game.
+    """
+    return current_game().stream_events()
+
+@app.route('/state', methods=['GET'])
+def game_state() -> Any:
+    """
+    Uses the session's game object to return the changes to the game since a given move.
     """
-    return game.process_attack()
+    return current_game().game_state()
 
 if __name__ == '__main__':
     app.run(debug=True)
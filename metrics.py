@@ -0,0 +1,350 @@
+"""
+metrics.py - Module for counting what the Battleships server is doing
+
+This module keeps the counters and histograms served from '/metrics' in the Prometheus
+text format, so the app can be watched by any standard scraper.
+
+Recording a value must cost next to nothing on the request path, so every thread
+counts into its own cells and never takes a lock to do so. The cells of all threads
+are only added up when the metrics are scraped. A thread takes a lock once, the
+first time it records a metric, to register its cells; the cells of threads which
+have finished are then folded into a shared total, so threads started per request
+do not grow the list.
+
+Functions:
+- exposition: Returns every registered metric in the Prometheus text format.
+
+Classes:
+- Counter: A count which only goes up, optionally split by one label.
+- Histogram: Counts observed values into buckets, optionally split by one label.
+- Gauge: A value read from a function each time the metrics are scraped.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple, Union
+import threading
+import time
+
+import config
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8' # Prometheus text format
+
+def _format_value(value: Union[int, float]) -> str:
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+def _escape(label_value: str) -> str:
+    return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _ThreadCells:
+    """
+    The per-thread cells of a metric: for each label value, a list of numbers
+    which only the thread owning them adds to.
+    """
+
+    def __init__(self, width: int):
+        self.width: int = width
+        self._local = threading.local()
+        self._threads: List[Tuple[threading.Thread, Dict[str, List[Union[int, float]]]]] = []
+        self._finished: Dict[str, List[Union[int, float]]] = {}
+        self._lock = threading.Lock()
+
+    def cell(self, label_value: str) -> List[Union[int, float]]:
+        """
+        Returns the calling thread's cell for a label value, creating it if needed.
+        """
+        try:
+            cells = self._local.cells
+        except AttributeError:
+            cells = self._local.cells = {}
+            with self._lock:
+                running = []
+                for thread, thread_cells in self._threads:
+                    if thread.is_alive():
+                        running.append((thread, thread_cells))
+                    else:
+                        self._add(self._finished, thread_cells)
+                running.append((threading.current_thread(), cells))
+                self._threads = running
+        values = cells.get(label_value)
+        if values is None:
+            values = cells[label_value] = [0] * self.width
+        return values
+
+    def _add(self, total: Dict[str, List[Union[int, float]]],
+             cells: Dict[str, List[Union[int, float]]]) -> None:
+        for label_value, values in list(cells.items()):
+            sums = total.setdefault(label_value, [0] * self.width)
+            for position, value in enumerate(list(values)):
+                sums[position] += value
+
+    def totals(self) -> Dict[str, List[Union[int, float]]]:
+        """
+        Returns the sum of every thread's cells, for each label value.
+        """
+        total: Dict[str, List[Union[int, float]]] = {}
+        with self._lock:
+            self._add(total, self._finished)
+            for _, cells in self._threads:
+                self._add(total, cells)
+        return total
+
+class Counter:
+    """
+    A count which only goes up, optionally split by one label.
+
+    Attributes:
+    - name (str): The name of the metric.
+    - help_text (str): The description of the metric.
+    - label (Union[str, None]): The name of the label the count is split by, if any.
+
+    Methods:
+    - inc(): Adds to the count.
+    - value(): Returns the count for a label value.
+    - samples(): Returns the lines of the metric in the Prometheus text format.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label: str = None):
+        """
+        Creates the counter and registers it to be scraped.
+
+        Args:
+            name (str): The name of the metric.
+            help_text (str): The description of the metric.
+            label (str, optional): The name of the label the count is split by.
+        """
+        self.name: str = name
+        self.help_text: str = help_text
+        self.label: Union[str, None] = label
+        self._cells = _ThreadCells(1)
+        registry.append(self)
+
+    def inc(self, amount: Union[int, float] = 1, label_value: str = '') -> None:
+        """
+        Adds to the count.
+
+        Args:
+            amount (Union[int, float], optional): The amount to add. Defaults to 1.
+            label_value (str, optional): The value of the label. Defaults to ''.
+        """
+        self._cells.cell(label_value)[0] += amount
+
+    def value(self, label_value: str = '') -> Union[int, float]:
+        """
+        Returns the count for a label value.
+
+        Args:
+            label_value (str, optional): The value of the label. Defaults to ''.
+
+        Returns:
+            Union[int, float]: The count so far.
+        """
+        return self._cells.totals().get(label_value, [0])[0]
+
+    def samples(self) -> List[str]:
+        """
+        Returns the lines of the metric in the Prometheus text format.
+        """
+        totals = self._cells.totals()
+        if not totals and self.label is None:
+            totals = {'': [0]}
+        return [f'{self.name}{self._labels(label_value)} {_format_value(values[0])}'
+                for label_value, values in sorted(totals.items())]
+
+    def _labels(self, label_value: str) -> str:
+        if self.label is None:
+            return ''
+        return f'{{{self.label}="{_escape(label_value)}"}}'
+
+class Histogram:
+    """
+    Counts observed values into buckets, optionally split by one label.
+
+    Attributes:
+    - name (str): The name of the metric.
+    - help_text (str): The description of the metric.
+    - buckets (Tuple[float, ...]): The upper bound of each bucket, in ascending order.
+    - label (Union[str, None]): The name of the label the values are split by, if any.
+
+    Methods:
+    - observe(): Counts a value into its bucket.
+    - time(): Returns a context manager which observes the seconds spent inside it.
+    - count(): Returns the number of values observed for a label value.
+    - samples(): Returns the lines of the metric in the Prometheus text format.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = None,
+                 label: str = None):
+        """
+        Creates the histogram and registers it to be scraped.
+
+        Args:
+            name (str): The name of the metric.
+            help_text (str): The description of the metric.
+            buckets (Tuple[float, ...], optional): The upper bound of each bucket.
+                Defaults to config.METRICS_BUCKETS.
+            label (str, optional): The name of the label the values are split by.
+        """
+        self.name: str = name
+        self.help_text: str = help_text
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets or config.METRICS_BUCKETS))
+        self.label: Union[str, None] = label
+        # One count per bucket, then the count above the last bucket, then the sum
+        self._cells = _ThreadCells(len(self.buckets) + 2)
+        registry.append(self)
+
+    def observe(self, value: float, label_value: str = '') -> None:
+        """
+        Counts a value into its bucket.
+
+        Args:
+            value (float): The value observed, e.g. a duration in seconds.
+            label_value (str, optional): The value of the label. Defaults to ''.
+        """
+        values = self._cells.cell(label_value)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def time(self, label_value: str = '') -> '_Timer':
+        """
+        Returns a context manager which observes the seconds spent inside it.
+
+        Args:
+            label_value (str, optional): The value of the label. Defaults to ''.
+        """
+        return _Timer(self, label_value)
+
+    def count(self, label_value: str = '') -> int:
+        """
+        Returns the number of values observed for a label value.
+
+        Args:
+            label_value (str, optional): The value of the label. Defaults to ''.
+
+        Returns:
+            int: The number of values observed.
+        """
+        values = self._cells.totals().get(label_value)
+        return sum(values[:-1]) if values is not None else 0
+
+    def samples(self) -> List[str]:
+        """
+        Returns the lines of the metric in the Prometheus text format.
+        """
+        lines = []
+        for label_value, values in sorted(self._cells.totals().items()):
+            label = f'{self.label}="{_escape(label_value)}",' if self.label else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label}le="{_format_value(float(bound))}"}} '
+                             f'{cumulative}')
+            label = f'{{{label[:-1]}}}' if label else ''
+            lines.append(f'{self.name}_sum{label} {_format_value(values[-1])}')
+            lines.append(f'{self.name}_count{label} {cumulative}')
+        return lines
+
+class _Timer:
+    def __init__(self, histogram: Histogram, label_value: str):
+        self.histogram = histogram
+        self.label_value = label_value
+        self.start: float = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, self.label_value)
+
+class Gauge:
+    """
+    A value read from a function each time the metrics are scraped.
+
+    Attributes:
+    - name (str): The name of the metric.
+    - help_text (str): The description of the metric.
+    - function (Callable[[], Union[int, float]]): Returns the current value.
+
+    Methods:
+    - samples(): Returns the lines of the metric in the Prometheus text format.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, function: Callable[[], Union[int, float]]):
+        """
+        Creates the gauge and registers it to be scraped.
+
+        Args:
+            name (str): The name of the metric.
+            help_text (str): The description of the metric.
+            function (Callable[[], Union[int, float]]): Returns the current value.
+        """
+        self.name: str = name
+        self.help_text: str = help_text
+        self.function = function
+        registry.append(self)
+
+    def samples(self) -> List[str]:
+        """
+        Returns the lines of the metric in the Prometheus text format.
+        """
+        return [f'{self.name} {_format_value(self.function())}']
+
+class _Rate:
+    """
+    The rate of a counter per second over the last config.METRICS_RATE_WINDOW seconds,
+    worked out from the counter's value at each scrape.
+    """
+
+    def __init__(self, counter: Counter):
+        self.counter = counter
+        self._scrapes: Deque[Tuple[float, Union[int, float]]] = deque()
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        now, value = time.monotonic(), self.counter.value()
+        with self._lock:
+            while self._scrapes and now - self._scrapes[0][0] > config.METRICS_RATE_WINDOW:
+                self._scrapes.popleft()
+            self._scrapes.append((now, value))
+            first_time, first_value = self._scrapes[0]
+        if now == first_time:
+            return 0.0
+        return (value - first_value) / (now - first_time)
+
+registry: List[Any] = []
+
+def exposition() -> str:
+    """
+    Returns every registered metric in the Prometheus text format.
+
+    Returns:
+        str: The HELP, TYPE and sample lines of each metric.
+    """
+    lines = []
+    for metric in registry:
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+request_seconds = Histogram('battleships_request_duration_seconds',
+                            'Time taken to answer a request, by route.', label='route')
+moves = Counter('battleships_moves_total', 'Turns played in every game.')
+moves_per_second = Gauge('battleships_moves_per_second',
+                         'Turns played per second, over the last scrapes.', _Rate(moves))
+ai_decision_seconds = Histogram('battleships_ai_decision_seconds',
+                                'Time taken by the AI strategy to choose each attack.')
+placements = Counter('battleships_random_placements_total', 'Ships placed at random.')
+placement_retries = Counter('battleships_placement_retries_total',
+                            'Random ship positions drawn and rejected for overlapping.')
@@ -0,0 +1,268 @@
+"""
+monte_carlo_ai.py - Module for the Monte Carlo attacking AI
+
+This module provides an AI which samples many fleet layouts consistent with what it
+has seen so far (no ship on a missed cell or a cell of a ship accounted for as sunk,
+and every other hit covered by some ship), and fires at the unattacked cell that is
+occupied in the most samples.
+
+Layouts are built with the same placement logic as components.py: a SparseBoard with
+the blocked cells filled in, one ship placed through each uncovered hit, and the rest
+of the fleet placed by a PlacementIndex. Sampling runs until the time budget for the
+move is used up, optionally on several worker processes at once, so the time taken
+by a decision is bounded and known in advance.
+
+Functions:
+- sample_fleet: Samples the cells of one fleet layout consistent with the observations.
+- sample_fleets: Samples layouts until a time budget is spent and counts each cell.
+
+Classes:
+- MonteCarloAI: Attacking AI firing at the cell most often occupied in sampled layouts.
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Set, Tuple, Union
+import random
+import time
+
+import config
+from game_engine import AttackResult
+from placement import PlacementIndex
+from sparse_board import SparseBoard
+
+BLOCKED = '#' # name used on the scratch board for cells no ship may cover
+
+_executor: Union[ProcessPoolExecutor, None] = None
+_executor_processes: int = 0
+
+def sample_fleet(size: int, lengths: Tuple[int, ...], blocked: FrozenSet[int],
+                 hits: Tuple[int, ...], rng: random.Random) -> Union[List[int], None]:
+    """
+    Samples the cells of one fleet layout consistent with the observations.
+
+    Args:
+        size (int): The size of the board.
+        lengths (Tuple[int, ...]): The lengths of the ships still afloat.
+        blocked (FrozenSet[int]): Cells (y * size + x) no ship may cover.
+        hits (Tuple[int, ...]): Hit cells (y * size + x) which some ship must cover.
+        rng (random.Random): The generator used for sampling.
+
+    Returns:
+        Union[List[int], None]: The cells (y * size + x) covered by the layout,
+        or None if this attempt could not cover every hit or fit every ship.
+    """
+    board = SparseBoard(size)
+    board.cells.update(dict.fromkeys(blocked, BLOCKED))
+    remaining = list(lengths)
+    uncovered = set(hits)
+    while uncovered:
+        target_y, target_x = divmod(rng.choice(tuple(uncovered)), size)
+        options = []
+        for ship_index, length in enumerate(remaining):
+            for offset in range(length):
+                if board.can_place(target_x - offset, target_y, length, 'h'):
+                    options.append((ship_index, target_x - offset, target_y, 'h'))
+                if board.can_place(target_x, target_y - offset, length, 'v'):
+                    options.append((ship_index, target_x, target_y - offset, 'v'))
+        if not options:
+            return None
+        ship_index, x_coordinate, y_coordinate, orientation = rng.choice(options)
+        length = remaining.pop(ship_index)
+        board.place('ship', x_coordinate, y_coordinate, length, orientation)
+        uncovered.difference_update(board.cells)
+
+    index = PlacementIndex(board, rng)
+    for length in remaining:
+        try:
+            x_coordinate, y_coordinate, orientation = index.sample(length)
+        except ValueError:
+            return None
+        board.place('ship', x_coordinate, y_coordinate, length, orientation)
+        index.mark_placed(x_coordinate, y_coordinate, length, orientation)
+    return [cell for cell, name in board.cells.items() if name != BLOCKED]
+
+def sample_fleets(size: int, lengths: Tuple[int, ...], blocked: FrozenSet[int],
+                  hits: Tuple[int, ...], budget: float, seed: str) -> Tuple[Counter, int]:
+    """
+    Samples layouts until a time budget is spent, and counts how often each cell is occupied.
+    Runs inside worker processes, so it only takes picklable arguments.
+
+    Args:
+        size (int): The size of the board.
+        lengths (Tuple[int, ...]): The lengths of the ships still afloat.
+        blocked (FrozenSet[int]): Cells (y * size + x) no ship may cover.
+        hits (Tuple[int, ...]): Hit cells (y * size + x) which some ship must cover.
+        budget (float): The number of seconds to spend sampling. At least one attempt is made.
+        seed (str): The seed for this batch of samples.
+
+    Returns:
+        Tuple[Counter, int]: The number of samples occupying each cell,
+        and the number of consistent samples drawn.
+    """
+    rng = random.Random(seed)
+    counts: Counter = Counter()
+    samples = 0
+    deadline = time.perf_counter() + budget
+    while True:
+        cells = sample_fleet(size, lengths, blocked, hits, rng)
+        if cells is not None:
+            counts.update(cells)
+            samples += 1
+        if time.perf_counter() >= deadline:
+            return counts, samples
+
+def _get_executor(processes: int) -> ProcessPoolExecutor:
+    """
+    Returns the worker pool shared by every MonteCarloAI, creating it on first use.
+    """
+    global _executor, _executor_processes # pylint: disable=global-statement
+    if _executor is None or _executor_processes != processes:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(max_workers=processes)
+        _executor_processes = processes
+    return _executor
+
+class MonteCarloAI:
+    """
+    Attacking AI firing at the unattacked cell most often occupied in sampled layouts.
+
+    Attributes:
+    - size (int): The size of the board being attacked.
+    - lengths (List[int]): The lengths of the ships still afloat.
+    - names (Dict[str, int]): The length of each ship, used when one is reported sunk.
+    - blocked (Set[int]): Cells no ship may cover (misses and resolved hits).
+    - hits (Set[int]): Hit cells whose ship has not been resolved yet.
+    - attacked (Set[int]): Every cell attacked so far.
+    - budget (float): Seconds of sampling per move.
+    - processes (int): The number of worker processes sampling in parallel.
+    - last_samples (int): The number of consistent layouts behind the last decision.
+    - last_decision_seconds (float): The time taken by the last decision.
+
+    Methods:
+    - next_attack(): Returns the unattacked cell occupied in the most sampled layouts.
+    - record(): Updates the observations with the outcome of an attack.
+    """
+
+    __slots__ = ('size', 'lengths', 'names', 'blocked', 'hits', 'attacked', 'budget',
+                 'processes', 'rng', 'last_samples', 'last_decision_seconds', '_unresolved')
+
+    def __init__(self, size: int, ships: Dict[str, int], rng: random.Random = None,
+                 budget: float = None, processes: int = None):
+        """
+        Initializes the AI for a board and the fleet placed on it.
+
+        Args:
+            size (int): The size of the board being attacked.
+            ships (Dict[str, int]): The name and length of each ship on the board.
+            rng (random.Random, optional): The generator used for seeds and ties.
+                Defaults to the global random module, so random.seed() applies.
+            budget (float, optional): Seconds of sampling per move.
+                Defaults to config.MONTE_CARLO_BUDGET.
+            processes (int, optional): The number of worker processes.
+                Defaults to config.MONTE_CARLO_PROCESSES.
+        """
+        self.size: int = size
+        self.names: Dict[str, int] = dict(ships)
+        self.lengths: List[int] = [length for length in ships.values() if 0 < length <= size]
+        self.blocked = set()
+        self.hits = set()
+        self.attacked = set()
+        self.budget: float = config.MONTE_CARLO_BUDGET if budget is None else budget
+        self.processes: int = config.MONTE_CARLO_PROCESSES if processes is None else processes
+        self.rng = rng if rng is not None else random
+        self.last_samples: int = 0
+        self.last_decision_seconds: float = 0.0
+        self._unresolved: int = 0
+
+    def next_attack(self) -> Tuple[int, int]:
+        """
+        Returns the unattacked cell occupied in the most sampled layouts, breaking ties
+        at random. Falls back to a random unattacked cell if no layout could be sampled.
+
+        Returns:
+            Tuple[int, int]: The x and y coordinates of the next attack.
+        """
+        start_time = time.perf_counter()
+        arguments = (self.size, tuple(self.lengths), frozenset(self.blocked),
+                     tuple(sorted(self.hits)), self.budget)
+        seed = self.rng.getrandbits(64)
+        if self.processes > 1:
+            executor = _get_executor(self.processes)
+            futures = [executor.submit(sample_fleets, *arguments, f'{seed}-{worker}')
+                       for worker in range(self.processes)]
+            results = [future.result() for future in futures]
+        else:
+            results = [sample_fleets(*arguments, str(seed))]
+
+        counts: Counter = Counter()
+        self.last_samples = 0
+        for worker_counts, worker_samples in results:
+            counts.update(worker_counts)
+            self.last_samples += worker_samples
+        for cell in self.attacked:
+            counts.pop(cell, None)
+
+        if counts:
+            most = max(counts.values())
+            best = sorted(cell for cell, count in counts.items() if count == most)
+        else:
+            best = [cell for cell in range(self.size * self.size) if cell not in self.attacked]
+        cell = best[self.rng.randrange(len(best))]
+        self.last_decision_seconds = time.perf_counter() - start_time
+        return cell % self.size, cell // self.size
+
+    def record(self, coordinates: Tuple[int, int], result: AttackResult) -> None:
+        """
+        Updates the observations with the outcome of an attack.
+
+        Args:
+            coordinates (Tuple[int, int]): The x and y coordinates of the attack.
+            result (AttackResult): The outcome of the attack, from attack(detailed=True).
+        """
+        x_coordinate, y_coordinate = coordinates
+        cell = y_coordinate * self.size + x_coordinate
+        if cell in self.attacked:
+            return
+        self.attacked.add(cell)
+        if not result.hit:
+            self.blocked.add(cell)
+            return
+        self.hits.add(cell)
+        self._unresolved += 1
+        if result.sunk:
+            length = self.names.get(result.ship, 0)
+            if length in self.lengths:
+                self.lengths.remove(length)
+            self._unresolved -= length
+            segments = self._sunk_segments(x_coordinate, y_coordinate, length)
+            if self._unresolved <= 0:
+                # Every hit belongs to a sunk ship, so they can no longer be covered
+                self.blocked |= self.hits
+                self.hits.clear()
+                self._unresolved = 0
+            elif len(segments) == 1:
+                self.blocked |= segments[0]
+                self.hits -= segments[0]
+
+    def _sunk_segments(self, x_coordinate: int, y_coordinate: int,
+                       length: int) -> List[Set[int]]:
+        """
+        Returns every line of hit cells of the given length through the sinking shot,
+        i.e. the places the sunk ship could have been.
+        """
+        segments = []
+        for step_x, step_y in ((1, 0), (0, 1)):
+            for offset in range(length):
+                start_x = x_coordinate - offset * step_x
+                start_y = y_coordinate - offset * step_y
+                end_x = start_x + (length - 1) * step_x
+                end_y = start_y + (length - 1) * step_y
+                if min(start_x, start_y) < 0 or max(end_x, end_y) >= self.size:
+                    continue
+                cells = {(start_y + i * step_y) * self.size + start_x + i * step_x
+                         for i in range(length)}
+                if cells <= self.hits and (length > 1 or step_x == 1):
+                    segments.append(cells)
+        return segments
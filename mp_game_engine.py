@@ -10,20 +10,33 @@ Functions:
 - ai_opponent_game_loop: Game loop for the AI opponent in the Battleships game.
 - game_not_over: Check that the game is not over.
 - print_2d_array: Print a 2D array in a formatted way.
+
+Classes:
+- AttackGenerator: Generates random attack positions for one game, never repeating a cell.
+- RandomStrategy: Attacks positions from generate_attack(), which may repeat.
+- NoRepeatStrategy: Attacks random positions from an AttackGenerator, never repeating a cell.
+- Game: A single game between the player and the AI.
+
+STRATEGIES maps the name of each AI attack strategy to its class. A strategy is created
+once per game with the board size and fleet, and provides next_attack() to choose a
+target and record() to learn the AttackResult of each shot.
 """
 
-from typing import List, Tuple, Union
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
 import random
 import logging
 
 import config
-from components import create_battleships, initialise_board, place_battleships
-from game_engine import attack, cli_coordinates_input
+import metrics
+from components import (create_battleships, initialise_board, place_battleships,
+                        board_to_list, board_window, all_ships_sunk, Fleet)
+from game_engine import attack, cli_coordinates_input, AttackResult
+from probability_ai import ProbabilityAI
+from monte_carlo_ai import MonteCarloAI
+from renderer import BoardRenderer
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-players = {}
-
 def generate_attack(size: int = 10) -> Tuple[int, int]:
     """
     Generate a random attack position within a given size.
@@ -39,13 +52,299 @@ def generate_attack(size: int = 10) -> Tuple[int, int]:
     y_coordinate = random.randint(0, size - 1)
     return ((x_coordinate, y_coordinate))
 
+class AttackGenerator:
+    """
+    Generates random attack positions for one game, never repeating a cell.
+
+    This is a lazily shuffled permutation of the cells (a Fisher-Yates shuffle which
+    only stores the entries it has swapped), so each attack costs O(1) and memory
+    grows with the number of attacks made rather than the size of the board.
+
+    Attributes:
+    - size (int): The size of the board being attacked.
+    - remaining (int): The number of cells which have not been attacked yet.
+
+    Methods:
+    - __next__(): Returns the next attack position, raising StopIteration once every
+      cell has been attacked.
+    """
+
+    __slots__ = ('size', 'remaining', 'rng', '_swaps')
+
+    def __init__(self, size: int = 10, rng: random.Random = None):
+        """
+        Initializes a generator covering every cell of a board.
+
+        Args:
+            size (int): The size of the board being attacked. Defaults to 10.
+            rng (random.Random, optional): The generator to draw with.
+                Defaults to the global random module, so random.seed() applies.
+        """
+        self.size: int = size
+        self.remaining: int = size * size
+        self.rng = rng if rng is not None else random
+        self._swaps: Dict[int, int] = {}
+
+    def __iter__(self) -> 'AttackGenerator':
+        return self
+
+    def __next__(self) -> Tuple[int, int]:
+        if self.remaining == 0:
+            raise StopIteration
+        index = self.rng.randrange(self.remaining)
+        last = self.remaining - 1
+        cell = self._swaps.get(index, index)
+        if index != last:
+            self._swaps[index] = self._swaps.pop(last, last)
+        else:
+            self._swaps.pop(last, None)
+        self.remaining = last
+        return cell % self.size, cell // self.size
+
+class RandomStrategy:
+    """
+    Attacks positions from generate_attack(). Shots may repeat cells already attacked.
+
+    Methods:
+    - next_attack(): Returns the coordinates of the next attack.
+    - record(): Learns the outcome of an attack (unused by this strategy).
+    """
+
+    __slots__ = ('size',)
+
+    def __init__(self, size: int, ships: Dict[str, int]): # pylint: disable=unused-argument
+        self.size = size
+
+    def next_attack(self) -> Tuple[int, int]:
+        """
+        Returns the coordinates of the next attack.
+        """
+        return generate_attack(self.size)
+
+    def record(self, coordinates: Tuple[int, int], result: AttackResult) -> None:
+        """
+        Learns the outcome of an attack.
+        """
+
+class NoRepeatStrategy:
+    """
+    Attacks random positions from an AttackGenerator, never repeating a cell.
+
+    Methods:
+    - next_attack(): Returns the coordinates of the next attack.
+    - record(): Learns the outcome of an attack. Only used to skip cells attacked
+      without asking this strategy, e.g. when a saved game is replayed.
+    """
+
+    __slots__ = ('attacks', '_last', '_skip')
+
+    def __init__(self, size: int, ships: Dict[str, int]): # pylint: disable=unused-argument
+        self.attacks = AttackGenerator(size)
+        self._last: Union[Tuple[int, int], None] = None
+        self._skip: Set[Tuple[int, int]] = set()
+
+    def next_attack(self) -> Tuple[int, int]:
+        """
+        Returns the coordinates of the next attack.
+        """
+        coordinates = next(self.attacks)
+        while coordinates in self._skip:
+            self._skip.discard(coordinates)
+            coordinates = next(self.attacks)
+        self._last = coordinates
+        return coordinates
+
+    def record(self, coordinates: Tuple[int, int], result: AttackResult) -> None:
+        """
+        Learns the outcome of an attack.
+        """
+        if coordinates != self._last:
+            self._skip.add(coordinates)
+
+STRATEGIES: Dict[str, Any] = {
+    'random': RandomStrategy,
+    'no_repeat': NoRepeatStrategy,
+    'probability': ProbabilityAI,
+    'monte_carlo': MonteCarloAI,
+}
+
+class Game:
+    """
+    A single game between the player and the AI. Each game owns its boards, fleets,
+    AI strategy and counters, so any number of games can run side by side.
+
+    Attributes:
+    - size (int): The size of both game boards.
+    - player_board (List[List[Union[str, None]]]): The player's board, attacked by the AI.
+    - ai_board (List[List[Union[str, None]]]): The AI's board, attacked by the player.
+    - player_ships (Fleet): The remaining length of each ship on the player's board.
+    - ai_ships (Fleet): The remaining length of each ship on the AI's board.
+    - ai_player (Any): The AI's attack strategy, from STRATEGIES.
+    - moves (int): The number of turns played.
+    - player_hits (int): The number of hits made by the player.
+    - ai_hits (int): The number of hits made by the AI.
+    - winner (Union[str, None]): 'player' or 'AI' once the game is over, otherwise None.
+
+    Methods:
+    - player_attack(): The player attacks the AI's board.
+    - ai_attack(): The AI attacks the player's board.
+    - play_turn(): Plays one turn, the player's attack followed by the AI's.
+    - restore(): Builds a game from boards which have already been placed.
+    - is_over(): Check if the game has been won.
+    """
+
+    __slots__ = ('size', 'player_board', 'ai_board', 'player_ships', 'ai_ships',
+                 'ai_player', 'moves', 'player_hits', 'ai_hits', 'winner')
+
+    def __init__(self, size: int = 10, ships: Dict[str, int] = None,
+                 placements: Dict[str, Tuple[str, str, str]] = None,
+                 player_algorithm: str = config.ALGORITHM_CUSTOM,
+                 ai_strategy: str = None, backend: str = config.BOARD_LIST):
+        """
+        Sets up both boards and fleets for a new game.
+
+        Args:
+            size (int): The size of the game boards. Defaults to 10.
+            ships (Dict[str, int], optional): The fleet each side places.
+                Defaults to create_battleships().
+            placements (Dict[str, Tuple[str, str, str]], optional): The player's custom
+                placements. Defaults to reading placement.json.
+            player_algorithm (str, optional): The algorithm placing the player's ships.
+                Defaults to 'custom' which is stored in the config.
+            ai_strategy (str, optional): The name of the AI's strategy in STRATEGIES.
+                Defaults to config.AI_STRATEGY.
+            backend (str, optional): The board backend to use.
+                Defaults to 'list' which is stored in the config.
+        """
+        if ships is None:
+            ships = create_battleships()
+        if ai_strategy is None:
+            ai_strategy = config.AI_STRATEGY
+        self.size: int = size
+        self.player_board = place_battleships(initialise_board(size, backend), ships,
+                                              player_algorithm, placements)
+        self.ai_board = place_battleships(initialise_board(size, backend), ships,
+                                          config.ALGORITHM_RANDOM)
+        self.player_ships: Fleet = Fleet(ships)
+        self.ai_ships: Fleet = Fleet(ships)
+        self.ai_player: Any = STRATEGIES[ai_strategy](size, ships)
+        self.moves: int = 0
+        self.player_hits: int = 0
+        self.ai_hits: int = 0
+        self.winner: Union[str, None] = None
+
+    def player_attack(self, coordinates: Tuple[int, int]) -> AttackResult:
+        """
+        The player attacks the AI's board.
+
+        Args:
+            coordinates (Tuple[int, int]): The x and y coordinates of the attack.
+
+        Returns:
+            AttackResult: The outcome of the attack.
+        """
+        result = attack(coordinates, self.ai_board, self.ai_ships, detailed=True)
+        self.player_hits += result.hit
+        if result.game_over and self.winner is None:
+            self.winner = 'player'
+        return result
+
+    def ai_attack(self, coordinates: Tuple[int, int] = None
+                  ) -> Tuple[Tuple[int, int], AttackResult]:
+        """
+        The AI attacks the player's board, at the position chosen by its strategy.
+        The time the strategy takes to choose is recorded in metrics.ai_decision_seconds.
+
+        Args:
+            coordinates (Tuple[int, int], optional): The position to attack instead,
+                e.g. when replaying a saved game. The strategy still learns the outcome.
+
+        Returns:
+            Tuple[Tuple[int, int], AttackResult]: The coordinates and outcome of the attack.
+        """
+        if coordinates is None:
+            with metrics.ai_decision_seconds.time():
+                coordinates = self.ai_player.next_attack()
+        result = attack(coordinates, self.player_board, self.player_ships, detailed=True)
+        self.ai_player.record(coordinates, result)
+        self.ai_hits += result.hit
+        if result.game_over and self.winner is None:
+            self.winner = 'AI'
+        return coordinates, result
+
+    def play_turn(self, coordinates: Tuple[int, int],
+                  on_player_result: Callable[[AttackResult], None] = None,
+                  ai_coordinates: Tuple[int, int] = None
+                  ) -> Tuple[AttackResult, Union[Tuple[int, int], None], Union[AttackResult, None]]:
+        """
+        Plays one turn: the player's attack, then the AI's unless the player has just won.
+
+        Args:
+            coordinates (Tuple[int, int]): The x and y coordinates of the player's attack.
+            on_player_result (Callable[[AttackResult], None], optional): Called with the
+                outcome of the player's attack before the AI chooses its move, so the
+                outcome can be reported without waiting for the AI.
+            ai_coordinates (Tuple[int, int], optional): The position the AI attacks,
+                instead of the one its strategy chooses.
+
+        Returns:
+            Tuple[AttackResult, Union[Tuple[int, int], None], Union[AttackResult, None]]:
+            The outcome of the player's attack, and the coordinates and outcome
+            of the AI's attack (both None if the player won).
+        """
+        player_result = self.player_attack(coordinates)
+        self.moves += 1
+        if on_player_result is not None:
+            on_player_result(player_result)
+        if self.winner is not None:
+            return player_result, None, None
+        ai_coordinates, ai_result = self.ai_attack(ai_coordinates)
+        return player_result, ai_coordinates, ai_result
+
+    @classmethod
+    def restore(cls, size: int, ships: Dict[str, int], player_board: Any, ai_board: Any,
+                ai_strategy: str) -> 'Game':
+        """
+        Builds a game from boards which have already been placed, e.g. from a saved game.
+
+        Args:
+            size (int): The size of the game boards.
+            ships (Dict[str, int]): The fleet of each side.
+            player_board (Any): The player's board, with no attacks made yet.
+            ai_board (Any): The AI's board, with no attacks made yet.
+            ai_strategy (str): The name of the AI's strategy in STRATEGIES.
+
+        Returns:
+            Game: A game with no moves played.
+        """
+        game = cls.__new__(cls)
+        game.size = size
+        game.player_board = player_board
+        game.ai_board = ai_board
+        game.player_ships = Fleet(ships)
+        game.ai_ships = Fleet(ships)
+        game.ai_player = STRATEGIES[ai_strategy](size, ships)
+        game.moves = game.player_hits = game.ai_hits = 0
+        game.winner = None
+        return game
+
+    def is_over(self) -> bool:
+        """
+        Check if the game has been won.
+
+        Returns:
+            bool: True if either side has sunk the other's fleet, False otherwise.
+        """
+        return self.winner is not None
+
 def ai_opponent_game_loop(size: int = 10) -> None:
     """
     Game loop for the AI opponent in the Battleships game.
-    It sets up a dictionary with both users (player and AI),
+    It sets up a Game with both users (player and AI),
     each having a board and ships dictionary.
     Until one of the players runs out of ships, the game continues to get input from the player,
-    and random AI attacks. When one player wins, it is logged and the game ends.
+    and AI attacks from the strategy set in the config.
+    When one player wins, it is logged and the game ends.
 
     Parameters:
         size (int): The size of the game board. Defaults to 10.
@@ -56,55 +355,65 @@ def ai_opponent_game_loop(size: int = 10) -> None:
     """
     logging.info('Welcome to the game Battleships!')
 
-    players['player'] = {'board' : place_battleships(initialise_board(size),
-                    create_battleships(), config.ALGORITHM_CUSTOM), 'ships' : create_battleships()}
-    players['AI'] = {'board' : place_battleships(initialise_board(size),
-                    create_battleships(), config.ALGORITHM_RANDOM), 'ships' : create_battleships()}
-
-    while game_not_over():
+    game = Game(size)
+    renderer = BoardRenderer()
+    while game_not_over(game):
         coords = cli_coordinates_input()
-        outcome = attack(coords, players['AI']['board'], players['AI']['ships'])
+        outcome, ai_coords, ai_outcome = game.play_turn(coords)
         logging.info("You hit a ship!\n\n" if outcome else "You missed!\n")
 
-        coords = generate_attack(size)
-        outcome = attack(coords, players["player"]['board'], players["player"]['ships'])
-
-        logging_message = f'{"AI hit a ship!" if outcome else "AI missed!"} Coordinates: {coords}\n'
-        logging.info(logging_message)
+        if ai_coords is not None:
+            logging_message = (f'{"AI hit a ship!" if ai_outcome else "AI missed!"} '
+                               f'Coordinates: {ai_coords}\n')
+            logging.info(logging_message)
 
         print('Current state of your board:')
-        print_2d_array(players["player"]['board'])
+        print_2d_array(game.player_board, renderer=renderer)
 
-def game_not_over() -> bool:
+def game_not_over(game: Game) -> bool:
     """
     Check that the game is not over. Used to loop the ai_opponent_game_loop.
 
+    Parameters:
+        game (Game): The game to check.
+
     Returns:
         bool: True if the game is not over, False otherwise.
     """
-    if all(value == 0 for value in players["player"]['ships'].values()):
+    if all_ships_sunk(game.player_ships):
         logging.info('You lost!')
         return False
-    if all(value == 0 for value in players["AI"]['ships'].values()):
+    if all_ships_sunk(game.ai_ships):
         logging.info('You won!')
         return False
     return True
 
-def print_2d_array(arr_2d: List[List[Union[str, None]]]) -> None:
+def print_2d_array(arr_2d: List[List[Union[str, None]]],
+                   window: Tuple[int, int, int, int] = None,
+                   renderer: BoardRenderer = None) -> None:
     """
     Print a 2D array in a formatted way. This makes sure there is enough space for words.
+    The whole array is written to stdout at once.
 
     Parameters:
         arr_2d (List[List[Union[str, None]]]): A 2D array containing elements of type str or None.
+            Alternative board backends are converted to a 2D array first.
+        window (Tuple[int, int, int, int], optional): The x, y, width and height of the part
+            of the array to print. Defaults to the whole array.
+        renderer (BoardRenderer, optional): The renderer to draw with. Passing the same
+            renderer each turn reuses its column widths, and in diff mode only the
+            changed cells are redrawn. Defaults to a new renderer.
 
     Returns:
         None: This function does not return anything.
     """
-    col_widths = [max(len(str(row[i])) for row in arr_2d) for i in range(len(arr_2d[0]))]
-
-    for row in arr_2d:
-        print(" ".join(str(row[i]).ljust(col_widths[i]) for i in range(len(row))))
-    print('\n')
+    if window is not None:
+        arr_2d = board_window(arr_2d, *window)
+    else:
+        arr_2d = board_to_list(arr_2d)
+    if renderer is None:
+        renderer = BoardRenderer()
+    renderer.write(arr_2d)
 
 if __name__ == "__main__":
     ai_opponent_game_loop(config.SIZE)
@@ -0,0 +1,222 @@
+"""
+numpy_board.py - Module for the NumPy representation of a Battleships board
+
+This module provides a board backend which stores the board as a small-integer
+NumPy grid of ship ids, alongside a table mapping each id back to its ship name.
+Id 0 is reserved for empty cells. Placement checks are slice checks on the grid,
+and checking if the board is empty is a single reduction.
+
+The board implements the same interface as bitboard.BitBoard
+(can_place, place, hit, is_empty, occupied_cells, to_list), so it can be passed
+to the functions in components.py and game_engine.py in place of a 2-d list.
+
+Classes:
+- NumpyBoard: A square game board stored as a NumPy grid of ship ids.
+"""
+
+from typing import Dict, Iterator, List, Tuple, Union
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class NumpyBoard:
+    """
+    A square game board stored as a NumPy grid of ship ids.
+
+    Attributes:
+    - size (int): The width and height of the board.
+    - grid (np.ndarray): A size x size array of ship ids, indexed as grid[y, x]. 0 means empty.
+    - names (List[Union[str, None]]): The ship name for each id, names[0] is None.
+    - ids (Dict[str, int]): Maps each ship name to its id.
+
+    Methods:
+    - ship_id(): Returns the id of a ship, adding it to the name table if needed.
+    - can_place(): Check if a ship fits on the board without overlapping another.
+    - place(): Place a ship on the board.
+    - hit(): Clear a cell and return the name of the ship that was there.
+    - is_empty(): Check if every ship has been removed from the board.
+    - cell(): Returns the name of the ship on a cell without changing the board.
+    - occupied_cells(): Yields the coordinates of every occupied cell.
+    - to_list(): Convert the board into the 2-d list format.
+    - from_list(): Build a board from the 2-d list format.
+    """
+
+    __slots__ = ('size', 'grid', 'names', 'ids')
+
+    def __init__(self, size: int = 10):
+        """
+        Initializes an empty NumPy board of the given size.
+
+        Args:
+            size (int): The size of the game board. Defaults to 10.
+
+        Raises:
+            ValueError: If the size is less than 1 or not an integer.
+        """
+        if isinstance(size, int) is False or size < 1:
+            logging.error('Size must be a positive integer')
+            raise ValueError('Size must be a positive integer')
+        self.size: int = size
+        self.grid: np.ndarray = np.zeros((size, size), dtype=np.int8)
+        self.names: List[Union[str, None]] = [None]
+        self.ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def ship_id(self, boat_name: str) -> int:
+        """
+        Returns the id of a ship, adding it to the name table if it is new.
+        The grid is widened to int16 if the fleet outgrows int8 ids.
+
+        Args:
+            boat_name (str): The name of the ship.
+
+        Returns:
+            int: The id stored in the grid for this ship.
+        """
+        if boat_name not in self.ids:
+            self.ids[boat_name] = len(self.names)
+            self.names.append(boat_name)
+            if len(self.names) > np.iinfo(self.grid.dtype).max:
+                self.grid = self.grid.astype(np.int16)
+        return self.ids[boat_name]
+
+    def _slice(self, x_coordinate: int, y_coordinate: int,
+               boat_size: int, orientation: str) -> Union[np.ndarray, None]:
+        """
+        Returns the view of the grid a ship would cover, or None if it does not fit.
+        """
+        if x_coordinate < 0 or y_coordinate < 0:
+            return None
+        if orientation == 'h':
+            if x_coordinate + boat_size > self.size or y_coordinate >= self.size:
+                return None
+            return self.grid[y_coordinate, x_coordinate:x_coordinate + boat_size]
+        if y_coordinate + boat_size > self.size or x_coordinate >= self.size:
+            return None
+        return self.grid[y_coordinate:y_coordinate + boat_size, x_coordinate]
+
+    def can_place(self, x_coordinate: int, y_coordinate: int,
+                  boat_size: int, orientation: str) -> bool:
+        """
+        Check if a ship fits on the board without overlapping another ship.
+
+        Args:
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Returns:
+            bool: True if the ship can be placed, False otherwise.
+        """
+        cells = self._slice(x_coordinate, y_coordinate, boat_size, orientation)
+        return cells is not None and not cells.any()
+
+    def place(self, boat_name: str, x_coordinate: int, y_coordinate: int,
+              boat_size: int, orientation: str) -> None:
+        """
+        Place a ship on the board. The caller is expected to have checked can_place().
+
+        Args:
+            boat_name (str): The name of the ship to be placed.
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Raises:
+            ValueError: If the ship does not fit on the board.
+        """
+        ship_id = self.ship_id(boat_name)
+        cells = self._slice(x_coordinate, y_coordinate, boat_size, orientation)
+        if cells is None:
+            logging.error('Invalid placement')
+            raise ValueError('Invalid placement')
+        cells[...] = ship_id
+
+    def hit(self, x_coordinate: int, y_coordinate: int) -> Union[str, None]:
+        """
+        Clear a cell and return the name of the ship that was there.
+
+        Args:
+            x_coordinate (int): The column of the attacked cell.
+            y_coordinate (int): The row of the attacked cell.
+
+        Returns:
+            Union[str, None]: The name of the ship that was hit, or None for a miss.
+
+        Raises:
+            IndexError: If the cell is not on the board.
+        """
+        if not (0 <= x_coordinate < self.size and 0 <= y_coordinate < self.size):
+            error_message = f'Attack off the board: {x_coordinate}, {y_coordinate}'
+            logging.error(error_message)
+            raise IndexError(error_message)
+        ship_id = int(self.grid[y_coordinate, x_coordinate])
+        if ship_id == 0:
+            return None
+        self.grid[y_coordinate, x_coordinate] = 0
+        return self.names[ship_id]
+
+    def is_empty(self) -> bool:
+        """
+        Check if every ship has been removed from the board.
+
+        Returns:
+            bool: True if the board is empty, False otherwise.
+        """
+        return not self.grid.any()
+
+    def cell(self, x_coordinate: int, y_coordinate: int) -> Union[str, None]:
+        """
+        Returns the name of the ship on a cell without changing the board.
+
+        Args:
+            x_coordinate (int): The column of the cell.
+            y_coordinate (int): The row of the cell.
+
+        Returns:
+            Union[str, None]: The name of the ship on the cell, or None if it is empty.
+        """
+        return self.names[int(self.grid[y_coordinate, x_coordinate])]
+
+    def occupied_cells(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the coordinates of every occupied cell, row by row.
+
+        Returns:
+            Iterator[Tuple[int, int]]: The x and y coordinates of each occupied cell.
+        """
+        y_coordinates, x_coordinates = np.nonzero(self.grid)
+        return zip(x_coordinates.tolist(), y_coordinates.tolist())
+
+    def to_list(self) -> List[List[Union[str, None]]]:
+        """
+        Convert the board into the 2-d list format used by the rest of the game.
+
+        Returns:
+            List[List[Union[str, None]]]: The board as a 2-d list of ship names and None.
+        """
+        return np.array(self.names, dtype=object)[self.grid].tolist()
+
+    @classmethod
+    def from_list(cls, board: List[List[Union[str, None]]]) -> 'NumpyBoard':
+        """
+        Build a NumPy board from the 2-d list format.
+
+        Args:
+            board (List[List[Union[str, None]]]): The game board represented as a 2-d list.
+
+        Returns:
+            NumpyBoard: A NumPy board holding the same ships.
+        """
+        numpy_board = cls(len(board))
+        for y_coordinate, row in enumerate(board):
+            for x_coordinate, boat_name in enumerate(row):
+                if boat_name is not None:
+                    numpy_board.grid[y_coordinate, x_coordinate] = numpy_board.ship_id(boat_name)
+        return numpy_board
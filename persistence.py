@@ -0,0 +1,287 @@
+"""
+persistence.py - Module for saving games to SQLite
+
+This module stores each game's fleet, starting boards and move history in SQLite, so
+games survive a restart and can be picked up by any process sharing the database.
+Nothing is written on the request path: saves are put on a queue, and a background
+writer thread flushes them in batches of up to config.PERSIST_BATCH, one transaction
+per batch, waiting up to config.PERSIST_INTERVAL seconds for a batch to fill.
+Games are restored lazily, the first time their session is seen, by rebuilding the
+starting boards and replaying the moves.
+
+Boards are stored as the cells of each ship, rather than the whole grid, so a game
+on a large board takes space in proportion to its ships and moves.
+
+Functions:
+- ship_cells: Returns the cells of each ship on a board.
+- board_from_cells: Builds a board from the cells of each ship.
+
+Classes:
+- GamePersistence: SQLite storage for games, with a write-behind queue and a connection pool.
+"""
+
+from typing import Any, Dict, List, Tuple, Union
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+import config
+from components import initialise_board
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    backend TEXT NOT NULL,
+    ai_strategy TEXT NOT NULL,
+    ships TEXT NOT NULL,
+    player_board TEXT NOT NULL,
+    ai_board TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    ai_x INTEGER,
+    ai_y INTEGER,
+    PRIMARY KEY (game_id, sequence)
+);
+"""
+
+def ship_cells(board: Any) -> Dict[str, List[int]]:
+    """
+    Returns the cells of each ship on a board.
+
+    Args:
+        board (Any): A 2-d list board or an alternative board backend.
+
+    Returns:
+        Dict[str, List[int]]: The cells of each ship, as y * size + x.
+    """
+    size = len(board)
+    cells: Dict[str, List[int]] = {}
+    if isinstance(board, list):
+        for y_coordinate, row in enumerate(board):
+            for x_coordinate, boat_name in enumerate(row):
+                if boat_name is not None:
+                    cells.setdefault(boat_name, []).append(y_coordinate * size + x_coordinate)
+        return cells
+    for x_coordinate, y_coordinate in board.occupied_cells():
+        cells.setdefault(board.cell(x_coordinate, y_coordinate), []).append(
+            y_coordinate * size + x_coordinate)
+    return cells
+
+def board_from_cells(size: int, cells: Dict[str, List[int]],
+                     backend: str = config.BOARD_LIST) -> Any:
+    """
+    Builds a board from the cells of each ship.
+
+    Args:
+        size (int): The size of the game board.
+        cells (Dict[str, List[int]]): The cells of each ship, as y * size + x.
+        backend (str, optional): The board backend to use.
+            Defaults to 'list' which is stored in the config.
+
+    Returns:
+        Any: The board, in the given backend.
+    """
+    board = initialise_board(size, backend)
+    for boat_name, boat_cells in cells.items():
+        for cell in boat_cells:
+            y_coordinate, x_coordinate = divmod(cell, size)
+            if isinstance(board, list):
+                board[y_coordinate][x_coordinate] = boat_name
+            else:
+                board.place(boat_name, x_coordinate, y_coordinate, 1, 'h')
+    return board
+
+class GamePersistence:
+    """
+    SQLite storage for games, with a write-behind queue and a connection pool.
+
+    Attributes:
+    - path (str): The path of the SQLite database.
+    - batch_size (int): The most saves written in one transaction.
+    - interval (float): The most seconds the writer waits for a batch to fill.
+    - batches (int): The number of batches written so far.
+    - writes (int): The number of saves written so far.
+
+    Methods:
+    - save_game(): Queues a new game to be saved.
+    - save_move(): Queues a move to be saved.
+    - flush(): Waits until every queued save has been written.
+    - load(): Returns a saved game and its moves, once its own queued saves are written.
+    - close(): Writes the queued saves and stops the writer thread.
+    """
+
+    def __init__(self, path: str = None, batch_size: int = None, pool_size: int = None,
+                 interval: float = None):
+        """
+        Opens the database, creating its tables if needed, and starts the writer thread.
+
+        Args:
+            path (str, optional): The path of the SQLite database. Defaults to config.DATABASE.
+            batch_size (int, optional): The most saves written in one transaction.
+                Defaults to config.PERSIST_BATCH.
+            pool_size (int, optional): The number of connections kept for reading.
+                Defaults to config.PERSIST_POOL.
+            interval (float, optional): The most seconds the writer waits for a batch to fill.
+                Defaults to config.PERSIST_INTERVAL.
+        """
+        self.path: str = path if path is not None else config.DATABASE
+        self.batch_size: int = batch_size if batch_size is not None else config.PERSIST_BATCH
+        self.interval: float = interval if interval is not None else config.PERSIST_INTERVAL
+        self.batches: int = 0
+        self.writes: int = 0
+        self._queue: 'queue.Queue[Union[Tuple[str, Tuple[Any, ...]], None]]' = queue.Queue()
+        # Queued saves not yet written, per game, so load() only waits for its own game
+        self._unwritten: Dict[str, int] = {}
+        self._written = threading.Condition()
+        self._pool: 'queue.Queue[sqlite3.Connection]' = queue.Queue()
+        writer = self._connect()
+        writer.executescript(SCHEMA)
+        for _ in range(pool_size if pool_size is not None else config.PERSIST_POOL):
+            self._pool.put(self._connect())
+        self._writer = threading.Thread(target=self._write_behind, args=(writer,),
+                                        name='persistence', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _write_behind(self, connection: sqlite3.Connection) -> None:
+        """
+        Writes queued saves in batches until close() is called. Runs on the writer thread.
+        """
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            games = [item[1] for item in batch if item is not None and item[0] == 'game']
+            moves = [item[1] for item in batch if item is not None and item[0] == 'move']
+            running = None not in batch
+            try:
+                if not games and not moves:
+                    continue
+                with connection:
+                    connection.executemany('DELETE FROM moves WHERE game_id = ?',
+                                           [(game[0],) for game in games])
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?)', games)
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO moves VALUES (?, ?, ?, ?, ?, ?)', moves)
+                self.batches += 1
+                self.writes += len(games) + len(moves)
+            except sqlite3.Error:
+                logging.exception('Failed to write a batch of saves')
+            finally:
+                with self._written:
+                    for game_id in [game[0] for game in games] + [move[0] for move in moves]:
+                        self._unwritten[game_id] -= 1
+                        if not self._unwritten[game_id]:
+                            del self._unwritten[game_id]
+                    self._written.notify_all()
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def save_game(self, game_id: str, size: int, backend: str, ai_strategy: str,
+                  ships: Dict[str, int], player_board: Any, ai_board: Any) -> None:
+        """
+        Queues a new game to be saved. Must be called before any attacks are made.
+
+        Args:
+            game_id (str): The id of the game's session.
+            size (int): The size of the game boards.
+            backend (str): The board backend of the game.
+            ai_strategy (str): The name of the AI's strategy.
+            ships (Dict[str, int]): The fleet of each side.
+            player_board (Any): The player's board, as placed.
+            ai_board (Any): The AI's board, as placed.
+        """
+        self._enqueue(game_id, ('game', (game_id, size, backend, ai_strategy, json.dumps(ships),
+                                  json.dumps(ship_cells(player_board)),
+                                  json.dumps(ship_cells(ai_board)))))
+
+    def _enqueue(self, game_id: str, item: Tuple[str, Tuple[Any, ...]]) -> None:
+        with self._written:
+            self._unwritten[game_id] = self._unwritten.get(game_id, 0) + 1
+        self._queue.put(item)
+
+    def save_move(self, game_id: str, sequence: int, coordinates: Tuple[int, int],
+                  ai_coordinates: Union[Tuple[int, int], None]) -> None:
+        """
+        Queues a move to be saved.
+
+        Args:
+            game_id (str): The id of the game's session.
+            sequence (int): The number of the move in the game, from 0.
+            coordinates (Tuple[int, int]): The player's attack.
+            ai_coordinates (Union[Tuple[int, int], None]): The AI's reply, or None if there
+                was none because the player won.
+        """
+        ai_x, ai_y = ai_coordinates if ai_coordinates is not None else (None, None)
+        self._enqueue(game_id, ('move', (game_id, sequence, coordinates[0], coordinates[1],
+                                         ai_x, ai_y)))
+
+    def flush(self) -> None:
+        """
+        Waits until every queued save has been written.
+        """
+        self._queue.join()
+
+    def load(self, game_id: str) -> Union[Dict[str, Any], None]:
+        """
+        Returns a saved game and its moves. Waits for any queued saves of this game
+        to be written first, but not for the saves of other games.
+
+        Args:
+            game_id (str): The id of the game's session.
+
+        Returns:
+            Union[Dict[str, Any], None]: The game's size, backend, ai_strategy and ships,
+            its player_board and ai_board as placed, and its moves in order as
+            (x, y, ai_x, ai_y). None if the game was never saved.
+        """
+        with self._written:
+            self._written.wait_for(lambda: game_id not in self._unwritten)
+        connection = self._pool.get()
+        try:
+            row = connection.execute('SELECT size, backend, ai_strategy, ships, player_board, '
+                                     'ai_board FROM games WHERE game_id = ?',
+                                     (game_id,)).fetchone()
+            if row is None:
+                return None
+            moves = connection.execute('SELECT x, y, ai_x, ai_y FROM moves WHERE game_id = ? '
+                                       'ORDER BY sequence', (game_id,)).fetchall()
+        finally:
+            self._pool.put(connection)
+        size, backend, ai_strategy, ships, player_board, ai_board = row
+        return {'size': size, 'backend': backend, 'ai_strategy': ai_strategy,
+                'ships': json.loads(ships),
+                'player_board': board_from_cells(size, json.loads(player_board), backend),
+                'ai_board': board_from_cells(size, json.loads(ai_board), backend),
+                'moves': moves}
+
+    def close(self) -> None:
+        """
+        Writes the queued saves and stops the writer thread.
+        """
+        self._queue.put(None)
+        self._writer.join()
+        while not self._pool.empty():
+            self._pool.get().close()
@@ -0,0 +1,205 @@
+"""
+placement.py - Module for rejection-free random ship placement
+
+This module keeps an index of the legal positions of each ship length on a board,
+so a random ship can be placed by sampling uniformly from the positions that are
+still legal, rather than guessing a position and recursing on every collision.
+
+Every (x, y, orientation) position of a ship of length L is given an integer id.
+For each length the ids live in a virtual array: only entries which have been
+swapped away from their default slot are stored, so the index costs memory in
+proportion to the number of removed positions rather than the area of the board.
+Removing a position is a swap with the last live entry, and sampling is a single
+random index into the live part of the array.
+
+Keeping the index up to date costs a few removals per placed cell, which is more
+than a lucky guess on a mostly empty board. sample() therefore first makes up to
+DIRECT_DRAWS draws over all positions, checked against a set of the occupied
+cells. An accepted draw is exactly as uniform as a draw from the index, and the
+index is only brought up to date (lazily, per length) once the draws miss.
+
+Classes:
+- PlacementIndex: Index of the legal ship positions on a board, per ship length.
+"""
+
+from typing import Any, Dict, List, Set, Tuple
+import random
+import logging
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DIRECT_DRAWS = 4 # draws over all positions tried before falling back to the index
+
+class PlacementIndex:
+    """
+    Index of the legal (x, y, orientation) positions on a board for each ship length.
+
+    Attributes:
+    - size (int): The size of the board being indexed.
+    - occupied (List[int]): Cells taken by ships as y * size + x, in the order they were placed.
+    - occupied_set (Set[int]): The same cells as a set, for overlap checks.
+    - rng (random.Random): The random number generator used for sampling.
+    - rejections (int): Direct draws rejected by sample() for overlapping a ship.
+
+    Methods:
+    - count(): Returns the number of legal positions for a ship length.
+    - sample(): Returns a uniformly random legal position for a ship length.
+    - mark_placed(): Records a newly placed ship so overlapping positions are removed.
+    """
+
+    __slots__ = ('size', 'occupied', 'occupied_set', 'rng', 'rejections',
+                 '_live', '_slots', '_where', '_pruned')
+
+    def __init__(self, board: Any, rng: random.Random = None):
+        """
+        Initializes the index for a board, taking any ships already on it into account.
+
+        Args:
+            board (Any): A 2-d list board or an alternative board backend.
+            rng (random.Random, optional): The generator to sample with.
+                Defaults to the global random module, so random.seed() applies.
+        """
+        self.size: int = len(board)
+        self.rng = rng if rng is not None else random
+        self.rejections: int = 0
+        self.occupied: List[int] = []
+        if isinstance(board, list):
+            for y_coordinate, row in enumerate(board):
+                if row.count(None) != len(row):
+                    self.occupied.extend(y_coordinate * self.size + x_coordinate
+                                         for x_coordinate, cell in enumerate(row)
+                                         if cell is not None)
+        else:
+            self.occupied.extend(y_coordinate * self.size + x_coordinate
+                                 for x_coordinate, y_coordinate in board.occupied_cells())
+        self.occupied_set: Set[int] = set(self.occupied)
+        self._live: Dict[int, int] = {}
+        self._slots: Dict[int, Dict[int, int]] = {}
+        self._where: Dict[int, Dict[int, int]] = {}
+        self._pruned: Dict[int, int] = {}
+
+    def _horizontal_count(self, boat_size: int) -> int:
+        return self.size * (self.size - boat_size + 1)
+
+    def _total(self, boat_size: int) -> int:
+        span = self.size - boat_size + 1
+        return 2 * self.size * span if span > 0 and boat_size > 0 else 0
+
+    def _sync(self, boat_size: int) -> None:
+        """
+        Creates the virtual array for a ship length the first time it is needed,
+        and removes the positions covering any cells occupied since the last sync.
+        """
+        if boat_size not in self._live:
+            self._live[boat_size] = self._total(boat_size)
+            self._slots[boat_size] = {}
+            self._where[boat_size] = {}
+            self._pruned[boat_size] = 0
+        for cell in self.occupied[self._pruned[boat_size]:]:
+            y_coordinate, x_coordinate = divmod(cell, self.size)
+            self._remove_covering(boat_size, x_coordinate, y_coordinate)
+        self._pruned[boat_size] = len(self.occupied)
+
+    def _fits(self, boat_size: int, position: Tuple[int, int, str]) -> bool:
+        x_coordinate, y_coordinate, orientation = position
+        offset = y_coordinate * self.size + x_coordinate
+        step = 1 if orientation == 'h' else self.size
+        return self.occupied_set.isdisjoint(range(offset, offset + boat_size * step, step))
+
+    def _decode(self, boat_size: int, position_id: int) -> Tuple[int, int, str]:
+        horizontal_count = self._horizontal_count(boat_size)
+        if position_id < horizontal_count:
+            span = self.size - boat_size + 1
+            return position_id % span, position_id // span, 'h'
+        position_id -= horizontal_count
+        return position_id % self.size, position_id // self.size, 'v'
+
+    def _remove(self, boat_size: int, position_id: int) -> None:
+        """
+        Swaps a position id out of the live part of the virtual array.
+        Ids which have already been removed are ignored.
+        """
+        slots = self._slots[boat_size]
+        where = self._where[boat_size]
+        index = where.get(position_id, position_id)
+        last = self._live[boat_size] - 1
+        if index > last:
+            return
+        last_id = slots.get(last, last)
+        slots[index] = last_id
+        where[last_id] = index
+        slots[last] = position_id
+        where[position_id] = last
+        self._live[boat_size] = last
+
+    def _remove_covering(self, boat_size: int, x_coordinate: int, y_coordinate: int) -> None:
+        """
+        Removes every position of a ship length which would cover the given cell.
+        """
+        span = self.size - boat_size + 1
+        if span <= 0 or boat_size <= 0:
+            return
+        for start in range(max(0, x_coordinate - boat_size + 1), min(x_coordinate, span - 1) + 1):
+            self._remove(boat_size, y_coordinate * span + start)
+        horizontal_count = self._horizontal_count(boat_size)
+        for start in range(max(0, y_coordinate - boat_size + 1), min(y_coordinate, span - 1) + 1):
+            self._remove(boat_size, horizontal_count + start * self.size + x_coordinate)
+
+    def count(self, boat_size: int) -> int:
+        """
+        Returns the number of legal positions left for a ship length.
+
+        Args:
+            boat_size (int): The length of the ship.
+
+        Returns:
+            int: The number of positions where the ship would currently fit.
+        """
+        self._sync(boat_size)
+        return self._live[boat_size]
+
+    def sample(self, boat_size: int) -> Tuple[int, int, str]:
+        """
+        Returns a uniformly random legal position for a ship length.
+
+        Args:
+            boat_size (int): The length of the ship.
+
+        Returns:
+            Tuple[int, int, str]: The x and y coordinates of the first cell of the ship,
+            and the orientation ('h' for horizontal, 'v' for vertical).
+
+        Raises:
+            ValueError: If there is no room left on the board for a ship of this length.
+        """
+        total = self._total(boat_size)
+        for _ in range(DIRECT_DRAWS if total else 0):
+            position = self._decode(boat_size, self.rng.randrange(total))
+            if self._fits(boat_size, position):
+                return position
+            self.rejections += 1
+        live = self.count(boat_size)
+        if live == 0:
+            error_message = f'No room left on the board for a ship of length {boat_size}'
+            logging.error(error_message)
+            raise ValueError(error_message)
+        index = self.rng.randrange(live)
+        return self._decode(boat_size, self._slots[boat_size].get(index, index))
+
+    def mark_placed(self, x_coordinate: int, y_coordinate: int,
+                    boat_size: int, orientation: str) -> None:
+        """
+        Records a newly placed ship. Positions which overlap it are removed from the
+        index of each length the next time that length is needed.
+
+        Args:
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+        """
+        offset = y_coordinate * self.size + x_coordinate
+        step = 1 if orientation == 'h' else self.size
+        cells = range(offset, offset + boat_size * step, step)
+        self.occupied.extend(cells)
+        self.occupied_set.update(cells)
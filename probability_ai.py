@@ -0,0 +1,168 @@
+"""
+probability_ai.py - Module for the probability density attacking AI
+
+This module provides an AI which attacks the cell covered by the most legal placements
+of the ships it has not sunk yet. A placement is legal if it covers no missed cell and
+no cell of a ship already accounted for as sunk. Placements which cover cells that were
+hit (but whose ship has not been worked out yet) are weighted up by HIT_WEIGHT per hit,
+so the AI hunts when it has no leads and targets around its hits when it has.
+
+The placement weights for each ship length are kept as NumPy arrays, computed with
+sliding window sums over the board. After a shot only the placements through the
+attacked cell are recomputed, and their change is added to the density grid, so the
+cost of a move does not grow with the number of shots taken. A full rebuild is only
+needed when a ship sinks.
+
+Classes:
+- ProbabilityAI: Attacking AI choosing the cell with the highest placement density.
+"""
+
+from typing import Dict, Tuple
+import random
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from game_engine import AttackResult
+
+HIT_WEIGHT = 20.0 # factor applied to a placement for every unresolved hit it covers
+
+class ProbabilityAI:
+    """
+    Attacking AI choosing the cell with the highest placement density.
+
+    Attributes:
+    - size (int): The size of the board being attacked.
+    - lengths (Dict[int, int]): The number of ships afloat of each length.
+    - names (Dict[str, int]): The length of each ship, used when one is reported sunk.
+    - blocked (np.ndarray): Cells no placement may cover (misses and resolved hits).
+    - hits (np.ndarray): Hit cells whose ship has not been resolved yet.
+    - attacked (np.ndarray): Every cell attacked so far.
+    - density (np.ndarray): The weighted number of placements covering each cell.
+
+    Methods:
+    - next_attack(): Returns the unattacked cell with the highest density.
+    - record(): Updates the densities with the outcome of an attack.
+    """
+
+    __slots__ = ('size', 'lengths', 'names', 'blocked', 'hits', 'attacked',
+                 'density', 'rng', '_horizontal', '_vertical', '_unresolved')
+
+    def __init__(self, size: int, ships: Dict[str, int], rng: random.Random = None):
+        """
+        Initializes the AI for a board and the fleet placed on it.
+
+        Args:
+            size (int): The size of the board being attacked.
+            ships (Dict[str, int]): The name and length of each ship on the board.
+            rng (random.Random, optional): The generator used to break ties.
+                Defaults to the global random module, so random.seed() applies.
+        """
+        self.size: int = size
+        self.names: Dict[str, int] = dict(ships)
+        self.lengths: Dict[int, int] = {}
+        for length in ships.values():
+            if 0 < length <= size:
+                self.lengths[length] = self.lengths.get(length, 0) + 1
+        self.rng = rng if rng is not None else random
+        self.blocked = np.zeros((size, size), dtype=bool)
+        self.hits = np.zeros((size, size), dtype=bool)
+        self.attacked = np.zeros((size, size), dtype=bool)
+        self._unresolved: int = 0
+        self._rebuild()
+
+    def _weights(self, blocked: np.ndarray, hits: np.ndarray, length: int) -> np.ndarray:
+        """
+        Returns the weight of every placement of a ship along the last axis of the arrays.
+        """
+        legal = sliding_window_view(blocked, length, axis=-1).sum(axis=-1) == 0
+        covered = sliding_window_view(hits, length, axis=-1).sum(axis=-1)
+        return np.where(legal, HIT_WEIGHT ** covered, 0.0)
+
+    def _coverage(self, weights: np.ndarray, length: int) -> np.ndarray:
+        """
+        Spreads placement weights along the last axis onto the cells each placement covers.
+        """
+        pad = [(0, 0)] * (weights.ndim - 1) + [(length - 1, length - 1)]
+        return sliding_window_view(np.pad(weights, pad), length, axis=-1).sum(axis=-1)
+
+    def _rebuild(self) -> None:
+        """
+        Recomputes every placement weight and the density grid from scratch.
+        """
+        self._horizontal: Dict[int, np.ndarray] = {}
+        self._vertical: Dict[int, np.ndarray] = {}
+        self.density = np.zeros((self.size, self.size))
+        for length, count in self.lengths.items():
+            self._horizontal[length] = self._weights(self.blocked, self.hits, length)
+            self._vertical[length] = self._weights(self.blocked.T, self.hits.T, length)
+            self.density += count * self._coverage(self._horizontal[length], length)
+            self.density += count * self._coverage(self._vertical[length], length).T
+
+    def _update_line(self, weights: np.ndarray, blocked: np.ndarray, hits: np.ndarray,
+                     density: np.ndarray, position: int, length: int, count: int) -> None:
+        """
+        Recomputes the placements of one length through a cell of a single row,
+        and adds the change in their weights to that row of the density grid.
+        """
+        first = max(0, position - length + 1)
+        last = min(position, self.size - length)
+        if first > last:
+            return
+        cells = slice(first, last + length)
+        new_weights = self._weights(blocked[cells], hits[cells], length)
+        change = new_weights - weights[first:last + 1]
+        if change.any():
+            weights[first:last + 1] = new_weights
+            density[cells] += count * np.convolve(change, np.ones(length))
+
+    def next_attack(self) -> Tuple[int, int]:
+        """
+        Returns the unattacked cell with the highest density, breaking ties at random.
+
+        Returns:
+            Tuple[int, int]: The x and y coordinates of the next attack.
+        """
+        scores = np.where(self.attacked, -1.0, self.density)
+        best = np.flatnonzero(scores == scores.max())
+        cell = int(best[self.rng.randrange(len(best))])
+        return cell % self.size, cell // self.size
+
+    def record(self, coordinates: Tuple[int, int], result: AttackResult) -> None:
+        """
+        Updates the densities with the outcome of an attack.
+
+        Args:
+            coordinates (Tuple[int, int]): The x and y coordinates of the attack.
+            result (AttackResult): The outcome of the attack, from attack(detailed=True).
+        """
+        x_coordinate, y_coordinate = coordinates
+        if self.attacked[y_coordinate, x_coordinate]:
+            return
+        self.attacked[y_coordinate, x_coordinate] = True
+        if result.hit:
+            self.hits[y_coordinate, x_coordinate] = True
+            self._unresolved += 1
+        else:
+            self.blocked[y_coordinate, x_coordinate] = True
+
+        if result.sunk:
+            length = self.names.get(result.ship, 0)
+            if self.lengths.get(length):
+                self.lengths[length] -= 1
+            self._unresolved -= length
+            if self._unresolved <= 0:
+                # Every hit belongs to a sunk ship, so they can no longer be covered
+                self.blocked |= self.hits
+                self.hits[:] = False
+                self._unresolved = 0
+            self._rebuild()
+            return
+
+        for length, count in self.lengths.items():
+            self._update_line(self._horizontal[length][y_coordinate], self.blocked[y_coordinate],
+                              self.hits[y_coordinate], self.density[y_coordinate],
+                              x_coordinate, length, count)
+            self._update_line(self._vertical[length][x_coordinate], self.blocked[:, x_coordinate],
+                              self.hits[:, x_coordinate], self.density[:, x_coordinate],
+                              y_coordinate, length, count)
@@ -0,0 +1,141 @@
+"""
+renderer.py - Module for drawing Battleships boards to a terminal
+
+This module provides a renderer which builds each frame of a board in a single
+string and writes it to the stream in one call, rather than one print per row.
+Column widths are worked out on the first frame and cached. They only grow
+afterwards, so the board keeps its shape as ships are hit.
+
+In diff mode, every frame after the first only rewrites the cells that changed
+since the previous frame, using ANSI cursor movement. This assumes nothing else
+has been written to the terminal between frames; call reset() to force a full
+frame after other output.
+
+Classes:
+- BoardRenderer: Renders 2-d list boards to a stream, optionally as diffs between frames.
+"""
+
+from typing import List, TextIO, Tuple, Union
+import sys
+
+CURSOR_UP = '\x1b[{}A'
+CURSOR_DOWN = '\x1b[{}B'
+CURSOR_COLUMN = '\x1b[{}G'
+FRAME_PADDING = '\n\n' # blank lines after each frame, matching print('\n')
+
+class BoardRenderer:
+    """
+    Renders 2-d list boards to a stream, optionally as diffs between frames.
+
+    Attributes:
+    - stream (Union[TextIO, None]): The stream written to. None means sys.stdout.
+    - diff (bool): Whether frames after the first only rewrite the changed cells.
+
+    Methods:
+    - render(): Returns the text needed to draw a board.
+    - write(): Draws a board to the stream in a single write.
+    - reset(): Forgets the previous frame, so the next one is drawn in full.
+    """
+
+    __slots__ = ('stream', 'diff', '_widths', '_previous')
+
+    def __init__(self, stream: TextIO = None, diff: bool = False):
+        """
+        Initializes a renderer with no previous frame.
+
+        Args:
+            stream (TextIO, optional): The stream to write frames to. Defaults to sys.stdout.
+            diff (bool, optional): Whether to only rewrite the changed cells between frames.
+                Defaults to False.
+        """
+        self.stream: Union[TextIO, None] = stream
+        self.diff: bool = diff
+        self._widths: Union[List[int], None] = None
+        self._previous: Union[List[List[str]], None] = None
+
+    def reset(self) -> None:
+        """
+        Forgets the previous frame and column widths, so the next frame is drawn in full.
+        """
+        self._widths = None
+        self._previous = None
+
+    def _full_frame(self, cells: List[List[str]]) -> str:
+        widths = self._widths
+        lines = [' '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in cells]
+        lines.append(FRAME_PADDING)
+        return '\n'.join(lines)
+
+    def _diff_frame(self, cells: List[List[str]], changed: List[Tuple[int, int]]) -> str:
+        """
+        Returns the escape sequences which redraw the changed cells of the last frame,
+        leaving the cursor where a full frame would have left it.
+        """
+        height = len(cells) + FRAME_PADDING.count('\n')
+        offsets = [0]
+        for width in self._widths:
+            offsets.append(offsets[-1] + width + 1)
+        parts = [CURSOR_UP.format(height)]
+        line = 0
+        for y_coordinate, x_coordinate in changed:
+            if y_coordinate != line:
+                parts.append(CURSOR_DOWN.format(y_coordinate - line))
+                line = y_coordinate
+            parts.append(CURSOR_COLUMN.format(offsets[x_coordinate] + 1))
+            parts.append(cells[y_coordinate][x_coordinate].ljust(self._widths[x_coordinate]))
+        parts.append(CURSOR_DOWN.format(height - line))
+        parts.append('\r')
+        return ''.join(parts)
+
+    def render(self, board: List[List[Union[str, None]]]) -> str:
+        """
+        Returns the text needed to draw a board, and remembers it as the previous frame.
+
+        Args:
+            board (List[List[Union[str, None]]]): The board to draw, as a 2-d list.
+
+        Returns:
+            str: A full frame, or in diff mode the escape sequences which update the
+            previous frame. An empty string if nothing changed in diff mode.
+        """
+        cells = [list(map(str, row)) for row in board]
+        previous = self._previous
+        if (previous is None or len(previous) != len(cells)
+                or (cells and len(previous[0]) != len(cells[0]))):
+            self._widths = [max(map(len, column)) for column in zip(*cells)]
+            self._previous = cells
+            return self._full_frame(cells)
+
+        widths = self._widths
+        changed: List[Tuple[int, int]] = []
+        widened = False
+        for y_coordinate, (row, previous_row) in enumerate(zip(cells, previous)):
+            if row == previous_row:
+                continue
+            for x_coordinate, (cell, previous_cell) in enumerate(zip(row, previous_row)):
+                if cell != previous_cell:
+                    changed.append((y_coordinate, x_coordinate))
+                    if len(cell) > widths[x_coordinate]:
+                        widths[x_coordinate] = len(cell)
+                        widened = True
+        self._previous = cells
+
+        if not self.diff:
+            return self._full_frame(cells)
+        if widened:
+            height = len(cells) + FRAME_PADDING.count('\n')
+            return CURSOR_UP.format(height) + '\r' + self._full_frame(cells)
+        if not changed:
+            return ''
+        return self._diff_frame(cells, changed)
+
+    def write(self, board: List[List[Union[str, None]]]) -> None:
+        """
+        Draws a board to the stream in a single write.
+
+        Args:
+            board (List[List[Union[str, None]]]): The board to draw, as a 2-d list.
+        """
+        frame = self.render(board)
+        if frame:
+            (self.stream if self.stream is not None else sys.stdout).write(frame)
@@ -0,0 +1,180 @@
+"""
+simulator.py - Module for running headless Battleships games at scale
+
+This module plays complete games between attack strategies without any input() or
+print(), so strategies can be compared over many games. Boards are placed with
+place_battleships() using the 'random' algorithm, and attacks use attack().
+
+A strategy is a class registered in mp_game_engine.STRATEGIES. It is created once per
+game with the board size and fleet, and provides next_attack() to choose a target and
+record() to learn the AttackResult of each shot. Each player's shots only depend on the
+opponent's board, so both players fire until they sink the other fleet, and the
+player needing fewer shots wins (the first player wins a tie, as they move first).
+This gives a full shot-count distribution for both strategies from every game.
+
+Games are split into chunks, each seeded from the simulation seed and its chunk
+number, and can be spread over a process pool. The result for a seed is the same
+no matter how many processes are used.
+
+Functions:
+- play_fleet: Fires a strategy at a board until the fleet is sunk.
+- simulate_game: Plays a single game between two strategies.
+- simulate: Plays many games between two strategies and summarises the results.
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Tuple, Union
+import random
+import logging
+import time
+
+import config
+from components import create_battleships, initialise_board, place_battleships, Fleet
+from game_engine import attack
+from mp_game_engine import STRATEGIES
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def play_fleet(strategy: Any, board: Any, fleet: Dict[str, int], max_shots: int) -> int:
+    """
+    Fires a strategy at a board until the fleet is sunk.
+
+    Args:
+        strategy (Any): The strategy choosing the attacks.
+        board (Any): The board being attacked.
+        fleet (Dict[str, int]): The remaining length of each ship on the board.
+        max_shots (int): The number of shots after which the strategy gives up.
+
+    Returns:
+        int: The number of shots taken, or max_shots if the fleet was not sunk.
+    """
+    for shots in range(1, max_shots + 1):
+        coordinates = strategy.next_attack()
+        result = attack(coordinates, board, fleet, detailed=True)
+        strategy.record(coordinates, result)
+        if result.game_over:
+            return shots
+    return max_shots
+
+def simulate_game(strategies: Tuple[str, str], size: int = 10,
+                  ships: Dict[str, int] = None, max_shots: int = None) -> Tuple[int, int]:
+    """
+    Plays a single game between two strategies, each firing at a randomly placed fleet.
+
+    Args:
+        strategies (Tuple[str, str]): The names of the first and second player's strategies.
+        size (int): The size of the game board. Defaults to 10.
+        ships (Dict[str, int], optional): The fleet to place. Defaults to create_battleships().
+        max_shots (int, optional): The number of shots after which a player gives up.
+            Defaults to 100 times the number of cells.
+
+    Returns:
+        Tuple[int, int]: The number of shots each player needed to sink the other's fleet.
+    """
+    if ships is None:
+        ships = create_battleships()
+    if max_shots is None:
+        max_shots = 100 * size * size
+    shots = []
+    for name in strategies:
+        board = place_battleships(initialise_board(size, config.BOARD_SPARSE), ships,
+                                  config.ALGORITHM_RANDOM)
+        strategy = STRATEGIES[name](size, ships)
+        shots.append(play_fleet(strategy, board, Fleet(ships), max_shots))
+    return shots[0], shots[1]
+
+def _simulate_chunk(games: int, strategies: Tuple[str, str], size: int,
+                    ships: Dict[str, int], seed: str) -> Tuple[Counter, Counter, int]:
+    """
+    Plays one chunk of games for simulate(). Runs inside worker processes, so it only
+    takes picklable arguments. Logging is switched off while the games are played, and the
+    global random state is restored afterwards.
+    """
+    previous_disable = logging.root.manager.disable
+    previous_state = random.getstate()
+    logging.disable(logging.INFO)
+    random.seed(seed)
+    try:
+        first_shots, second_shots = Counter(), Counter()
+        first_wins = 0
+        for _ in range(games):
+            first, second = simulate_game(strategies, size, ships)
+            first_shots[first] += 1
+            second_shots[second] += 1
+            first_wins += first <= second
+    finally:
+        logging.disable(previous_disable)
+        random.setstate(previous_state)
+    return first_shots, second_shots, first_wins
+
+def simulate(strategies: Tuple[str, str] = ('random', 'random'), games: int = 1000,
+             size: int = 10, ships: Dict[str, int] = None, seed: Union[int, None] = None,
+             processes: int = 1, chunk_size: int = 1000) -> Dict[str, Any]:
+    """
+    Plays many games between two strategies and summarises the results.
+
+    Args:
+        strategies (Tuple[str, str]): The names of the two strategies, from STRATEGIES.
+            Defaults to ('random', 'random').
+        games (int): The number of games to play. Defaults to 1000.
+        size (int): The size of the game board. Defaults to 10.
+        ships (Dict[str, int], optional): The fleet to place. Defaults to create_battleships().
+        seed (Union[int, None], optional): The seed for the simulation. Defaults to a random seed.
+        processes (int, optional): The number of worker processes. Defaults to 1 (no pool).
+        chunk_size (int, optional): The number of games played per chunk. Defaults to 1000.
+
+    Returns:
+        Dict[str, Any]: The number of games, the time taken, games per second, and for
+        each player ('first' and 'second') the strategy name, number of wins, mean shots
+        and the distribution of shots per game as a {shots: games} dictionary.
+
+    Raises:
+        ValueError: If a strategy is unknown.
+    """
+    for name in strategies:
+        if name not in STRATEGIES:
+            error_message = f'Unknown strategy: {name}'
+            logging.error(error_message)
+            raise ValueError(error_message)
+    if ships is None:
+        ships = create_battleships()
+    if seed is None:
+        seed = random.getrandbits(64)
+    ships = dict(ships)
+    chunks = [(min(chunk_size, games - start), tuple(strategies), size, ships, f'{seed}-{number}')
+              for number, start in enumerate(range(0, games, chunk_size))]
+
+    start_time = time.perf_counter()
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_simulate_chunk, *zip(*chunks)))
+    else:
+        results = [_simulate_chunk(*chunk) for chunk in chunks]
+    elapsed = time.perf_counter() - start_time
+
+    first_shots, second_shots, first_wins = Counter(), Counter(), 0
+    for chunk_first, chunk_second, chunk_wins in results:
+        first_shots.update(chunk_first)
+        second_shots.update(chunk_second)
+        first_wins += chunk_wins
+
+    report: Dict[str, Any] = {'games': games, 'seconds': elapsed,
+                              'games_per_second': games / elapsed if elapsed else 0.0}
+    for player, name, shots, wins in (('first', strategies[0], first_shots, first_wins),
+                                      ('second', strategies[1], second_shots, games - first_wins)):
+        report[player] = {'strategy': name, 'wins': wins,
+                          'mean_shots': sum(k * v for k, v in shots.items()) / games if games else 0.0,
+                          'shots': dict(sorted(shots.items()))}
+    logging_message = (f'Simulated {games} games of {strategies[0]} vs {strategies[1]} in '
+                       f'{elapsed:.2f}s ({report["games_per_second"]:.0f} games/s)')
+    logging.info(logging_message)
+    return report
+
+if __name__ == "__main__":
+    simulation = simulate(('random', 'random'), 1000, config.SIZE)
+    for side in ('first', 'second'):
+        logging_message = (f'{side} player ({simulation[side]["strategy"]}): '
+                           f'{simulation[side]["wins"]} wins, '
+                           f'{simulation[side]["mean_shots"]:.1f} shots on average')
+        logging.info(logging_message)
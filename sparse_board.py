@@ -0,0 +1,229 @@
+"""
+sparse_board.py - Module for the sparse representation of a Battleships board
+
+This module provides a board backend for very large grids. Only occupied cells are
+stored, in a dictionary keyed on y * size + x, so memory scales with the size of the
+fleet rather than the area of the board. Rendering is done through windows of the
+board, since converting a very large board back to a 2-d list defeats the purpose.
+
+The board implements the same interface as bitboard.BitBoard
+(can_place, place, hit, is_empty, occupied_cells, to_list), so it can be passed
+to the functions in components.py and game_engine.py in place of a 2-d list.
+
+Classes:
+- SparseBoard: A square game board which only stores its occupied cells.
+"""
+
+from typing import Dict, Iterator, List, Tuple, Union
+import logging
+
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class SparseBoard:
+    """
+    A square game board which only stores its occupied cells.
+
+    Attributes:
+    - size (int): The width and height of the board.
+    - cells (Dict[int, str]): Maps y * size + x of each occupied cell to its ship name.
+
+    Methods:
+    - can_place(): Check if a ship fits on the board without overlapping another.
+    - place(): Place a ship on the board.
+    - hit(): Clear a cell and return the name of the ship that was there.
+    - is_empty(): Check if every ship has been removed from the board.
+    - cell(): Returns the name of the ship on a cell without changing the board.
+    - occupied_cells(): Yields the coordinates of every occupied cell.
+    - window(): Returns a rectangular part of the board in the 2-d list format.
+    - to_list(): Convert the board into the 2-d list format.
+    - from_list(): Build a board from the 2-d list format.
+    """
+
+    __slots__ = ('size', 'cells')
+
+    def __init__(self, size: int = 10):
+        """
+        Initializes an empty sparse board of the given size.
+
+        Args:
+            size (int): The size of the game board. Defaults to 10.
+
+        Raises:
+            ValueError: If the size is less than 1 or not an integer.
+        """
+        if isinstance(size, int) is False or size < 1:
+            logging.error('Size must be a positive integer')
+            raise ValueError('Size must be a positive integer')
+        self.size: int = size
+        self.cells: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _keys(self, x_coordinate: int, y_coordinate: int,
+              boat_size: int, orientation: str) -> Union[range, None]:
+        """
+        Returns the keys of the cells a ship would cover, or None if it does not fit.
+        """
+        if x_coordinate < 0 or y_coordinate < 0:
+            return None
+        offset = y_coordinate * self.size + x_coordinate
+        if orientation == 'h':
+            if x_coordinate + boat_size > self.size or y_coordinate >= self.size:
+                return None
+            return range(offset, offset + boat_size)
+        if y_coordinate + boat_size > self.size or x_coordinate >= self.size:
+            return None
+        return range(offset, offset + boat_size * self.size, self.size)
+
+    def can_place(self, x_coordinate: int, y_coordinate: int,
+                  boat_size: int, orientation: str) -> bool:
+        """
+        Check if a ship fits on the board without overlapping another ship.
+
+        Args:
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Returns:
+            bool: True if the ship can be placed, False otherwise.
+        """
+        keys = self._keys(x_coordinate, y_coordinate, boat_size, orientation)
+        return keys is not None and self.cells.keys().isdisjoint(keys)
+
+    def place(self, boat_name: str, x_coordinate: int, y_coordinate: int,
+              boat_size: int, orientation: str) -> None:
+        """
+        Place a ship on the board. The caller is expected to have checked can_place().
+
+        Args:
+            boat_name (str): The name of the ship to be placed.
+            x_coordinate (int): The column of the first cell of the ship.
+            y_coordinate (int): The row of the first cell of the ship.
+            boat_size (int): The length of the ship.
+            orientation (str): 'h' for horizontal or 'v' for vertical.
+
+        Raises:
+            ValueError: If the ship does not fit on the board.
+        """
+        keys = self._keys(x_coordinate, y_coordinate, boat_size, orientation)
+        if keys is None:
+            logging.error('Invalid placement')
+            raise ValueError('Invalid placement')
+        self.cells.update(dict.fromkeys(keys, boat_name))
+
+    def hit(self, x_coordinate: int, y_coordinate: int) -> Union[str, None]:
+        """
+        Clear a cell and return the name of the ship that was there.
+
+        Args:
+            x_coordinate (int): The column of the attacked cell.
+            y_coordinate (int): The row of the attacked cell.
+
+        Returns:
+            Union[str, None]: The name of the ship that was hit, or None for a miss.
+
+        Raises:
+            IndexError: If the cell is not on the board.
+        """
+        if not (0 <= x_coordinate < self.size and 0 <= y_coordinate < self.size):
+            error_message = f'Attack off the board: {x_coordinate}, {y_coordinate}'
+            logging.error(error_message)
+            raise IndexError(error_message)
+        return self.cells.pop(y_coordinate * self.size + x_coordinate, None)
+
+    def is_empty(self) -> bool:
+        """
+        Check if every ship has been removed from the board.
+
+        Returns:
+            bool: True if the board is empty, False otherwise.
+        """
+        return not self.cells
+
+    def cell(self, x_coordinate: int, y_coordinate: int) -> Union[str, None]:
+        """
+        Returns the name of the ship on a cell without changing the board.
+
+        Args:
+            x_coordinate (int): The column of the cell.
+            y_coordinate (int): The row of the cell.
+
+        Returns:
+            Union[str, None]: The name of the ship on the cell, or None if it is empty.
+        """
+        return self.cells.get(y_coordinate * self.size + x_coordinate)
+
+    def occupied_cells(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the coordinates of every occupied cell, in the order they were placed.
+
+        Returns:
+            Iterator[Tuple[int, int]]: The x and y coordinates of each occupied cell.
+        """
+        for key in self.cells:
+            y_coordinate, x_coordinate = divmod(key, self.size)
+            yield x_coordinate, y_coordinate
+
+    def window(self, x_coordinate: int, y_coordinate: int,
+               width: int, height: int) -> List[List[Union[str, None]]]:
+        """
+        Returns a rectangular part of the board in the 2-d list format.
+        The window is clipped to the edges of the board.
+
+        Args:
+            x_coordinate (int): The column of the top left cell of the window.
+            y_coordinate (int): The row of the top left cell of the window.
+            width (int): The number of columns in the window.
+            height (int): The number of rows in the window.
+
+        Returns:
+            List[List[Union[str, None]]]: The cells of the window as a 2-d list.
+        """
+        left, top = max(0, x_coordinate), max(0, y_coordinate)
+        right = min(self.size, x_coordinate + width)
+        bottom = min(self.size, y_coordinate + height)
+        rows = [[None] * max(0, right - left) for _ in range(max(0, bottom - top))]
+        if not rows or not rows[0]:
+            return rows
+        if len(rows) * len(rows[0]) < len(self.cells):
+            for row_index, row in enumerate(rows):
+                offset = (top + row_index) * self.size
+                for column in range(left, right):
+                    row[column - left] = self.cells.get(offset + column)
+        else:
+            for key, boat_name in self.cells.items():
+                row_index, column = divmod(key, self.size)
+                if top <= row_index < bottom and left <= column < right:
+                    rows[row_index - top][column - left] = boat_name
+        return rows
+
+    def to_list(self) -> List[List[Union[str, None]]]:
+        """
+        Convert the whole board into the 2-d list format. Only sensible for small boards,
+        use window() to look at part of a large one.
+
+        Returns:
+            List[List[Union[str, None]]]: The board as a 2-d list of ship names and None.
+        """
+        return self.window(0, 0, self.size, self.size)
+
+    @classmethod
+    def from_list(cls, board: List[List[Union[str, None]]]) -> 'SparseBoard':
+        """
+        Build a sparse board from the 2-d list format.
+
+        Args:
+            board (List[List[Union[str, None]]]): The game board represented as a 2-d list.
+
+        Returns:
+            SparseBoard: A sparse board holding the same ships.
+        """
+        sparse_board = cls(len(board))
+        for y_coordinate, row in enumerate(board):
+            for x_coordinate, boat_name in enumerate(row):
+                if boat_name is not None:
+                    sparse_board.cells[y_coordinate * sparse_board.size + x_coordinate] = boat_name
+        return sparse_board
@@ -89,3 +89,1168 @@ def test_generate_attack_randomness():
     attack1 = generate_attack(size)
     attack2 = generate_attack(size)
     assert attack1 != attack2
+
+# Added tests for bitboard.py
+from bitboard import BitBoard
+from components import place_battleships, create_battleships, place_custom_single_ship
+from game_engine import attack as attack_board
+import config
+
+def test_bitboard_matches_list_board():
+    """
+    Test if the simple placement gives the same cells on a bitboard as on a list board.
+    """
+    list_board = place_battleships(initialise_board(10), create_battleships())
+    bit_board = place_battleships(initialise_board(10, config.BOARD_BITBOARD), create_battleships())
+    assert isinstance(bit_board, BitBoard)
+    assert bit_board.to_list() == list_board
+    assert BitBoard.from_list(list_board).to_list() == list_board
+
+def test_bitboard_rejects_overlap_and_out_of_bounds():
+    """
+    Test if a bitboard refuses ships which overlap or do not fit on the board.
+    """
+    board = BitBoard(5)
+    board.place('Cruiser', 1, 1, 3, 'h')
+    assert board.can_place(2, 0, 3, 'v') is False
+    assert board.can_place(3, 0, 3, 'h') is False
+    assert board.can_place(0, 3, 3, 'v') is False
+    assert board.can_place(0, 2, 3, 'v') is True
+
+def test_bitboard_attack_until_empty():
+    """
+    Test if attacking every cell of a bitboard sinks all ships and empties the board.
+    """
+    ships = create_battleships()
+    board = place_battleships(initialise_board(10, config.BOARD_BITBOARD), ships,
+                              config.ALGORITHM_RANDOM)
+    assert check_empty(board) is False
+    hits = sum(attack_board((x, y), board, ships) for y in range(10) for x in range(10))
+    assert hits == sum(create_battleships().values())
+    assert all(value == 0 for value in ships.values())
+    assert check_empty(board) is True
+
+def test_bitboard_hit_off_the_board():
+    """
+    Test if attacking off the edge of a bitboard raises an IndexError, like a list board,
+    rather than wrapping onto the next row.
+    """
+    board = BitBoard(10)
+    board.place('Destroyer', 0, 1, 2, 'h')
+    for coordinates in ((10, 0), (-1, 0), (0, 10), (0, -1)):
+        with pytest.raises(IndexError):
+            board.hit(*coordinates)
+    assert board.cell(0, 1) == 'Destroyer'
+
+# Added tests for numpy_board.py
+from numpy_board import NumpyBoard
+
+def test_numpy_board_matches_list_board():
+    """
+    Test if the simple placement gives the same cells on a NumPy board as on a list board.
+    """
+    list_board = place_battleships(initialise_board(10), create_battleships())
+    numpy_board = place_battleships(initialise_board(10, config.BOARD_NUMPY), create_battleships())
+    assert isinstance(numpy_board, NumpyBoard)
+    assert numpy_board.to_list() == list_board
+    assert NumpyBoard.from_list(list_board).to_list() == list_board
+
+def test_numpy_board_custom_placement_overlap():
+    """
+    Test if a custom placement which overlaps another ship raises a ValueError.
+    """
+    board = NumpyBoard(5)
+    place_custom_single_ship(board, 'Cruiser', 3, ('1', '1', 'h'))
+    with pytest.raises(ValueError):
+        place_custom_single_ship(board, 'Destroyer', 2, ('2', '0', 'v'))
+
+def test_numpy_board_attack_until_empty():
+    """
+    Test if attacking every cell of a NumPy board sinks all ships and empties the board.
+    """
+    ships = create_battleships()
+    board = place_battleships(initialise_board(10, config.BOARD_NUMPY), ships,
+                              config.ALGORITHM_RANDOM)
+    hits = sum(attack_board((x, y), board, ships) for y in range(10) for x in range(10))
+    assert hits == sum(create_battleships().values())
+    assert check_empty(board) is True
+
+def test_numpy_board_hit_off_the_board():
+    """
+    Test if attacking off the edge of a NumPy board raises an IndexError,
+    rather than wrapping onto the opposite edge.
+    """
+    board = NumpyBoard(10)
+    board.place('Destroyer', 8, 0, 2, 'h')
+    for coordinates in ((10, 0), (-1, 0), (0, 10), (0, -1)):
+        with pytest.raises(IndexError):
+            board.hit(*coordinates)
+    assert board.cell(9, 0) == 'Destroyer'
+
+# Added tests for placement.py
+from placement import PlacementIndex
+from components import place_random_single_ship, place_ship_cells
+
+def test_placement_index_counts_legal_positions():
+    """
+    Test if the index counts every legal position, and updates after a ship is placed.
+    """
+    board = initialise_board(3)
+    index = PlacementIndex(board)
+    assert index.count(3) == 6
+    place_ship_cells(board, 'Cruiser', 3, 0, 0, 'h')
+    index.mark_placed(0, 0, 3, 'h')
+    assert index.count(3) == 2
+    assert index.count(2) == 7
+
+def test_place_random_single_ship_full_board():
+    """
+    Test if a ValueError is raised when a ship can not fit on the board.
+    """
+    board = initialise_board(2)
+    place_random_single_ship(board, 'Destroyer', 2)
+    place_random_single_ship(board, 'Patrol', 2)
+    with pytest.raises(ValueError):
+        place_random_single_ship(board, 'Submarine', 1)
+
+def test_place_random_dense_fleet():
+    """
+    Test if a dense fleet which fills the whole board is placed without overlaps.
+    """
+    ships = {f'Ship_{i}': 1 for i in range(400)}
+    board = place_battleships(initialise_board(20), ships, config.ALGORITHM_RANDOM)
+    assert sorted(cell for row in board for cell in row) == sorted(ships)
+
+# Added tests for generate_fleets
+from components import generate_fleets
+
+def test_generate_fleets_shape_and_cells():
+    """
+    Test if every generated fleet has each ship with the right number of cells.
+    """
+    ships = create_battleships()
+    fleets = generate_fleets(50, 10, ships, seed=3)
+    assert fleets.shape == (50, 10, 10)
+    for ship_id, boat_size in enumerate(ships.values(), start=1):
+        assert ((fleets == ship_id).sum(axis=(1, 2)) == boat_size).all()
+
+def test_generate_fleets_seeded():
+    """
+    Test if a seed gives the same fleets, whatever the chunking between processes.
+    """
+    first = generate_fleets(30, 8, seed=7, chunk_size=10)
+    second = generate_fleets(30, 8, seed=7, chunk_size=10, processes=2)
+    assert (first == second).all()
+    assert not (first == generate_fleets(30, 8, seed=8, chunk_size=10)).all()
+
+# Added tests for load_fleet
+from components import load_fleet
+
+def test_create_battleships_returns_fresh_copies():
+    """
+    Test if every call returns a separate dictionary, even when the fleet is cached.
+    """
+    first = create_battleships()
+    first['Destroyer'] = 0
+    assert create_battleships()['Destroyer'] == 2
+    assert load_fleet() is load_fleet()
+
+def test_load_fleet_picks_up_file_edits(tmp_path):
+    """
+    Test if the cached fleet is re-read after the file changes.
+    """
+    fleet_file = tmp_path / 'fleet.txt'
+    fleet_file.write_text('Destroyer:2\n', encoding='utf-8')
+    assert create_battleships(str(fleet_file)) == {'Destroyer': 2}
+    fleet_file.write_text('Destroyer:2\nCruiser:3\n', encoding='utf-8')
+    assert create_battleships(str(fleet_file)) == {'Destroyer': 2, 'Cruiser': 3}
+
+# Added tests for in-memory custom placement
+import json
+import main
+from game_store import GameStore
+from components import save_placements
+
+def session_game(client):
+    """
+    Returns the game of the test client's session.
+    """
+    with client.session_transaction() as flask_session:
+        return main.games.peek(flask_session['game_id'])
+
+@pytest.fixture
+def placements():
+    """
+    The placement of each ship from the ships placement file, as posted by placement.html.
+    """
+    with open(config.PLACEMENT, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+@pytest.fixture
+def fresh_games(monkeypatch):
+    """
+    Gives main.py an empty game store for the test, and returns it.
+    """
+    store = GameStore(main.BattleshipsGame)
+    monkeypatch.setattr(main, 'games', store)
+    return store
+
+def test_place_battleships_custom_placements_mapping(placements):
+    """
+    Test if placements passed directly give the same board as reading placement.json.
+    """
+    from_file = place_battleships(initialise_board(10), create_battleships(), config.ALGORITHM_CUSTOM)
+    from_mapping = place_battleships(initialise_board(10), create_battleships(),
+                                     config.ALGORITHM_CUSTOM, placements)
+    assert from_mapping == from_file
+
+def test_placement_post_does_not_write_file(tmp_path, monkeypatch, placements, fresh_games):
+    """
+    Test if posting a placement sets up the player board without writing the placement file.
+    """
+    monkeypatch.setattr(config, 'PLACEMENT', str(tmp_path / 'placement.json'))
+    client = main.app.test_client()
+    response = client.post('/placement', json=placements)
+    assert response.status_code == 200
+    assert session_game(client).player_board[1][0] == 'Aircraft_Carrier'
+    assert not (tmp_path / 'placement.json').exists()
+
+def test_save_placements_follows_config(tmp_path, monkeypatch, placements):
+    """
+    Test if save_placements writes to the placement file set in the config when called.
+    """
+    monkeypatch.setattr(config, 'PLACEMENT', str(tmp_path / 'placement.json'))
+    save_placements(placements)
+    with open(tmp_path / 'placement.json', 'r', encoding='utf-8') as file:
+        assert json.load(file) == placements
+
+# Added tests for Fleet
+from components import Fleet, all_ships_sunk
+import copy
+import pickle
+
+def test_fleet_counters_follow_attacks():
+    """
+    Test if the remaining cell and ship counters are updated by attacks.
+    """
+    ships = create_battleships()
+    assert isinstance(ships, Fleet)
+    board = place_battleships(initialise_board(10), ships)
+    assert (ships.remaining_cells, ships.remaining_ships) == (17, 5)
+    attack_board((0, 4), board, ships)
+    attack_board((1, 4), board, ships)
+    assert (ships.remaining_cells, ships.remaining_ships) == (15, 4)
+    assert all_ships_sunk(ships) is False
+    for y in range(10):
+        for x in range(10):
+            attack_board((x, y), board, ships)
+    assert all_ships_sunk(ships) is True
+    assert ships.remaining_ships == 0
+
+def test_all_ships_sunk_plain_dict():
+    """
+    Test if all_ships_sunk also works for a plain dictionary.
+    """
+    assert all_ships_sunk({'Destroyer': 0, 'Cruiser': 0}) is True
+    assert all_ships_sunk({'Destroyer': 0, 'Cruiser': 1}) is False
+
+def test_fleet_copies_keep_counters():
+    """
+    Test if copied, deep copied and pickled fleets have the same totals as the original,
+    and keep counting on their own.
+    """
+    ships = create_battleships()
+    ships['Destroyer'] = 1
+    for copied in (copy.copy(ships), copy.deepcopy(ships), ships.copy(),
+                   pickle.loads(pickle.dumps(ships))):
+        assert isinstance(copied, Fleet) and copied == ships
+        assert (copied.remaining_cells, copied.remaining_ships) == (16, 5)
+        copied['Destroyer'] = 0
+        assert (copied.remaining_cells, copied.remaining_ships) == (15, 4)
+    assert (ships.remaining_cells, ships.remaining_ships) == (16, 5)
+
+def test_fleet_merge_updates_counters():
+    """
+    Test if merging ships into a fleet with | and |= updates its totals.
+    """
+    ships = create_battleships()
+    merged = ships | {'Destroyer': 0, 'Dinghy': 3}
+    assert isinstance(merged, Fleet) and (merged.remaining_cells, merged.remaining_ships) == (18, 5)
+    ships |= {'Dinghy': 3}
+    assert (ships.remaining_cells, ships.remaining_ships) == (20, 6)
+
+# Added tests for sparse_board.py
+from sparse_board import SparseBoard
+from components import board_window
+
+def test_sparse_board_matches_list_board():
+    """
+    Test if the simple placement gives the same cells on a sparse board as on a list board.
+    """
+    list_board = place_battleships(initialise_board(10), create_battleships())
+    sparse_board = place_battleships(initialise_board(10, config.BOARD_SPARSE), create_battleships())
+    assert isinstance(sparse_board, SparseBoard)
+    assert sparse_board.to_list() == list_board
+    assert board_window(sparse_board, 0, 1, 4, 2) == board_window(list_board, 0, 1, 4, 2)
+
+def test_sparse_board_large_grid():
+    """
+    Test if a fleet can be placed, attacked and sunk on a very large sparse board.
+    """
+    ships = create_battleships()
+    board = place_battleships(initialise_board(100000, config.BOARD_SPARSE), ships,
+                              config.ALGORITHM_RANDOM)
+    assert len(board.cells) == 17
+    for x_coordinate, y_coordinate in list(board.occupied_cells()):
+        assert attack_board((x_coordinate, y_coordinate), board, ships) is True
+    assert check_empty(board) is True
+    assert all_ships_sunk(ships) is True
+
+def test_sparse_board_hit_off_the_board():
+    """
+    Test if attacking off the edge of a sparse board raises an IndexError,
+    rather than hitting a ship on the next row.
+    """
+    board = SparseBoard(10)
+    board.place('Destroyer', 0, 1, 2, 'h')
+    for coordinates in ((10, 0), (-10, 2), (0, 10), (0, -1)):
+        with pytest.raises(IndexError):
+            board.hit(*coordinates)
+    assert len(board.cells) == 2
+
+# Added tests for attack_many
+from game_engine import attack_many
+
+def test_attack_many_matches_attack_loop():
+    """
+    Test if a batch of attacks gives the same hits, boards and fleets as attacking one at a time.
+    """
+    for backend in (config.BOARD_LIST, config.BOARD_BITBOARD, config.BOARD_SPARSE):
+        coordinates = [(x, y) for y in range(10) for x in range(10)] + [(0, 1), (9, 9)]
+        single_ships, batch_ships = create_battleships(), create_battleships()
+        single_board = place_battleships(initialise_board(10, backend), single_ships)
+        batch_board = place_battleships(initialise_board(10, backend), batch_ships)
+        expected = [attack_board(coords, single_board, single_ships) for coords in coordinates]
+        hits, sunk = attack_many(coordinates, batch_board, batch_ships)
+        assert hits == expected
+        assert sorted(sunk) == sorted(single_ships)
+        assert batch_ships == single_ships
+        assert check_empty(batch_board) is True
+
+def test_attack_many_numpy_coordinates():
+    """
+    Test if a NumPy array of coordinates is accepted.
+    """
+    import numpy as np
+    ships = create_battleships()
+    board = place_battleships(initialise_board(10), ships)
+    hits, sunk = attack_many(np.array([[0, 4], [1, 4], [5, 5]]), board, ships)
+    assert hits == [True, True, False]
+    assert sunk == ['Destroyer']
+
+# Added tests for AttackResult
+from game_engine import AttackResult
+
+def test_attack_detailed_result():
+    """
+    Test if a detailed attack reports the ship hit, when it sinks and when the game is over.
+    """
+    ships = {'Destroyer': 2}
+    ships = Fleet(ships)
+    board = place_battleships(initialise_board(3), ships)
+    assert attack_board((2, 2), board, ships, detailed=True) == AttackResult(False)
+    first = attack_board((0, 0), board, ships, detailed=True)
+    assert first and (first.ship, first.sunk, first.game_over) == ('Destroyer', False, False)
+    second = attack_board((1, 0), board, ships, detailed=True)
+    assert (second.hit, second.sunk, second.game_over) == (True, True, True)
+    assert not attack_board((1, 0), board, ships, detailed=True)
+
+def test_process_attack_reports_sunk_ship(placements, fresh_games):
+    """
+    Test if the /attack route names the ship the player sank.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    session_game(client).state.ai_board = place_battleships(initialise_board(10), create_battleships())
+    assert 'sunk' not in client.get('/attack?x=0&y=4').get_json()
+    assert client.get('/attack?x=1&y=4').get_json()['sunk'] == 'Destroyer'
+
+# Added tests for simulator.py
+import simulator
+
+def test_simulate_game_shot_counts():
+    """
+    Test if both players need at least as many shots as there are ship cells.
+    """
+    first, second = simulator.simulate_game(('random', 'random'), 6, {'Destroyer': 2, 'Cruiser': 3})
+    assert first >= 5 and second >= 5
+
+def test_simulate_report_is_seeded():
+    """
+    Test if a simulation report is complete and repeatable for a seed.
+    """
+    report = simulator.simulate(('random', 'random'), 20, 5, {'Destroyer': 2}, seed=4, chunk_size=8)
+    again = simulator.simulate(('random', 'random'), 20, 5, {'Destroyer': 2}, seed=4, chunk_size=8)
+    assert report['first'] == again['first'] and report['second'] == again['second']
+    assert report['first']['wins'] + report['second']['wins'] == 20
+    assert sum(report['first']['shots'].values()) == 20
+
+def test_simulate_unknown_strategy():
+    """
+    Test if a ValueError is raised for a strategy that does not exist.
+    """
+    with pytest.raises(ValueError):
+        simulator.simulate(('random', 'psychic'), 1)
+
+# Added tests for AttackGenerator
+from mp_game_engine import AttackGenerator
+
+def test_attack_generator_covers_every_cell_once():
+    """
+    Test if the generator attacks every cell exactly once, then stops.
+    """
+    attacks = list(AttackGenerator(7))
+    assert len(attacks) == 49
+    assert set(attacks) == {(x, y) for x in range(7) for y in range(7)}
+    single_cell = AttackGenerator(1)
+    assert next(single_cell) == (0, 0)
+    with pytest.raises(StopIteration):
+        next(single_cell)
+
+def test_attack_generator_large_board():
+    """
+    Test if a huge board can be attacked without storing the whole grid.
+    """
+    attacks = AttackGenerator(100000)
+    shots = [next(attacks) for _ in range(1000)]
+    assert len(set(shots)) == 1000
+    assert attacks.remaining == 100000 ** 2 - 1000
+    assert len(attacks._swaps) <= 1000 # pylint: disable=protected-access
+
+# Added tests for probability_ai.py
+from probability_ai import ProbabilityAI
+
+def test_probability_ai_incremental_matches_rebuild():
+    """
+    Test if the incrementally updated densities match a full rebuild after every shot.
+    """
+    ships = create_battleships()
+    fleet = Fleet(ships)
+    board = place_battleships(initialise_board(10), ships, config.ALGORITHM_RANDOM)
+    ai_player = ProbabilityAI(10, ships)
+    attacked = set()
+    while not all_ships_sunk(fleet):
+        coordinates = ai_player.next_attack()
+        assert coordinates not in attacked
+        attacked.add(coordinates)
+        ai_player.record(coordinates, attack_board(coordinates, board, fleet, detailed=True))
+        density = ai_player.density.copy()
+        ai_player._rebuild() # pylint: disable=protected-access
+        assert (abs(density - ai_player.density) < 1e-6).all()
+    assert len(attacked) < 100
+
+def test_probability_strategy_beats_random():
+    """
+    Test if the probability AI needs fewer shots than random attacks without repeats.
+    """
+    report = simulator.simulate(('probability', 'no_repeat'), 20, seed=2)
+    assert report['first']['mean_shots'] < report['second']['mean_shots']
+
+def test_process_attack_with_probability_ai(monkeypatch, placements, fresh_games):
+    """
+    Test if the Flask game can use the probability AI as its opponent.
+    """
+    monkeypatch.setattr(config, 'AI_STRATEGY', 'probability')
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    ai_turns = {tuple(client.get(f'/attack?x={x}&y=9').get_json()['AI_Turn']) for x in range(5)}
+    assert len(ai_turns) == 5
+
+# Added tests for monte_carlo_ai.py
+from monte_carlo_ai import MonteCarloAI, sample_fleet
+import random
+
+def test_sample_fleet_respects_observations():
+    """
+    Test if sampled layouts avoid blocked cells, cover every hit and fit the whole fleet.
+    """
+    rng = random.Random(5)
+    blocked, hits = frozenset({0, 11, 22}), (44, 45)
+    samples = [sample_fleet(10, (5, 4, 3, 3, 2), blocked, hits, rng) for _ in range(50)]
+    layouts = [cells for cells in samples if cells is not None]
+    assert len(layouts) >= 40
+    for cells in layouts:
+        assert len(cells) == len(set(cells)) == 17
+        assert not blocked & set(cells)
+        assert set(hits) <= set(cells)
+
+def test_monte_carlo_ai_plays_within_budget():
+    """
+    Test if the Monte Carlo AI sinks a fleet without repeating cells, within its time budget.
+    """
+    ships = create_battleships()
+    fleet = Fleet(ships)
+    board = place_battleships(initialise_board(10), ships, config.ALGORITHM_RANDOM)
+    ai_player = MonteCarloAI(10, ships, random.Random(1), budget=0.002)
+    attacked, samples = set(), 0
+    while not all_ships_sunk(fleet):
+        coordinates = ai_player.next_attack()
+        assert coordinates not in attacked
+        attacked.add(coordinates)
+        ai_player.record(coordinates, attack_board(coordinates, board, fleet, detailed=True))
+        assert ai_player.last_decision_seconds < 0.5
+        samples += ai_player.last_samples
+    assert samples > 0
+
+# Added tests for the Game class in mp_game_engine.py
+from mp_game_engine import Game, game_not_over
+
+def test_games_are_independent():
+    """
+    Test if attacks in one game leave another game's boards and fleets untouched.
+    """
+    ships = {'Destroyer': 2, 'Cruiser': 3}
+    first = Game(6, ships, player_algorithm=config.ALGORITHM_RANDOM)
+    second = Game(6, ships, player_algorithm=config.ALGORITHM_RANDOM)
+    for y_coordinate in range(6):
+        for x_coordinate in range(6):
+            if not first.is_over():
+                first.play_turn((x_coordinate, y_coordinate))
+    assert first.is_over() and game_not_over(first) is False
+    assert first.winner in ('player', 'AI')
+    assert second.moves == 0 and game_not_over(second)
+    assert dict(second.ai_ships) == ships and dict(second.player_ships) == ships
+
+def test_game_play_turn_after_player_wins():
+    """
+    Test if the AI does not attack once the player has sunk the whole fleet.
+    """
+    game = Game(4, {'Destroyer': 2}, player_algorithm=config.ALGORITHM_RANDOM)
+    ship_cells = [(x_coordinate, y_coordinate) for y_coordinate, row in enumerate(game.ai_board)
+                  for x_coordinate, cell in enumerate(row) if cell is not None]
+    game.player_attack(ship_cells[0])
+    outcome, ai_coordinates, ai_outcome = game.play_turn(ship_cells[1])
+    assert outcome.game_over and ai_coordinates is None and ai_outcome is None
+    assert game.winner == 'player' and game.player_hits == 2
+
+# Added tests for renderer.py
+import io
+from renderer import BoardRenderer
+from mp_game_engine import print_2d_array
+
+def test_print_2d_array_single_write(capsys):
+    """
+    Test if print_2d_array pads each column to its widest cell, as one frame.
+    """
+    print_2d_array([['Destroyer', None], [None, 'Cruiser']])
+    assert capsys.readouterr().out == 'Destroyer None   \nNone      Cruiser\n\n\n'
+
+def test_renderer_diff_only_redraws_changed_cells():
+    """
+    Test if a diff frame only rewrites the changed cell, keeping the cached column width.
+    """
+    stream = io.StringIO()
+    renderer = BoardRenderer(stream, diff=True)
+    board = [['Destroyer', None], [None, 'Cruiser']]
+    renderer.write(board)
+    full_frame = stream.getvalue()
+    board[0][0] = None
+    assert renderer.render(board) == '\x1b[4A\x1b[1G' + 'None'.ljust(9) + '\x1b[4B\r'
+    assert renderer.render(board) == ''
+    renderer.reset()
+    board[0][0] = 'Destroyer'
+    assert renderer.render(board) == full_frame
+
+# Added tests for benchmark.py
+import benchmark
+
+def test_run_benchmarks_reports_each_size(fresh_games):
+    """
+    Test if every benchmark reports a positive time at each size, in a JSON-ready format.
+    """
+    report = benchmark.run_benchmarks(sizes=(10, 12), min_time=0.001)
+    assert set(report['results']) == set(benchmark.BENCHMARKS)
+    assert set(report['results']['create_battleships']) == {'10'}
+    for sizes in report['results'].values():
+        for result in sizes.values():
+            assert result['calls'] >= 1 and result['best_us'] > 0
+    assert json.loads(json.dumps(report)) == report
+
+def test_compare_results_finds_regressions():
+    """
+    Test if only benchmarks slower than the threshold are reported, and missing ones skipped.
+    """
+    baseline = {'results': {'attack': {'10': {'best_us': 1.0}},
+                            'check_empty': {'10': {'best_us': 2.0}}}}
+    current = {'results': {'attack': {'10': {'best_us': 1.5}, '100': {'best_us': 9.0}},
+                           'check_empty': {'10': {'best_us': 2.1}}}}
+    assert benchmark.compare_results(baseline, current, 0.25) == [('attack', '10', 1.5)]
+
+# Added tests for game_store.py
+def test_game_store_lru_eviction_and_stats():
+    """
+    Test if the least recently used game is evicted once the store is full.
+    """
+    store = GameStore(lambda session_id: {}, max_games=2, ttl=60)
+    first = store.get('a')
+    store.get('b')
+    assert store.get('a') is first
+    store.get('c')
+    assert 'b' not in store and 'a' in store and len(store) == 2
+    stats = store.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 3, 1)
+    assert stats['hit_rate'] == 0.25
+
+def test_game_store_ttl_expiry():
+    """
+    Test if games idle for longer than the TTL are removed on the next lookup.
+    """
+    now = [0.0]
+    store = GameStore(lambda session_id: {}, max_games=10, ttl=5, clock=lambda: now[0])
+    old = store.get('a')
+    now[0] = 3.0
+    store.get('b')
+    now[0] = 6.0
+    assert store.get('b') is not None
+    assert 'a' not in store and store.get('a') is not old
+    assert store.stats()['expirations'] == 1
+
+def test_sessions_play_separate_games(placements, fresh_games):
+    """
+    Test if two browser sessions each get their own game.
+    """
+    first, second = main.app.test_client(), main.app.test_client()
+    first.post('/placement', json=placements)
+    assert second.get('/').status_code == 302
+    assert first.get('/').status_code == 200
+    assert session_game(first) is not session_game(second)
+    assert len(main.games) == 2
+
+# Added tests for per-game locking in main.py
+from concurrent.futures import ThreadPoolExecutor
+
+def test_concurrent_requests_stay_consistent(placements, fresh_games):
+    """
+    Test if many threads attacking one shared game and several separate games
+    leave every game in a state consistent with the responses they received.
+    """
+    shared = main.app.test_client()
+    with shared.session_transaction() as flask_session:
+        flask_session['game_id'] = 'shared'
+
+    def play(thread_number):
+        client = main.app.test_client()
+        if thread_number % 2:
+            with client.session_transaction() as flask_session:
+                flask_session['game_id'] = 'shared'
+        client.post('/placement', json=placements)
+        responses = [client.get(f'/attack?x={thread_number}&y={y}').get_json()
+                     for y in range(10)]
+        return client, responses
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(play, range(8)))
+
+    shared_turns = []
+    for thread_number, (client, responses) in enumerate(results):
+        turns = [response for response in responses if 'AI_Turn' in response
+                 or 'Player_Turn' in response]
+        if thread_number % 2:
+            shared_turns.extend(turns)
+        else:
+            assert session_game(client).state.moves == len(turns)
+    shared_game = session_game(shared)
+    game = shared_game.state
+    ai_turns = [tuple(response['AI_Turn']) for response in shared_turns if 'AI_Turn' in response]
+    assert game.moves == len(shared_turns) == 40
+    assert len(set(ai_turns)) == len(ai_turns)
+    assert game.player_hits == sum(response['hit'] for response in shared_turns)
+    assert game.ai_hits == sum(shared_game.ships.values()) - game.player_ships.remaining_cells
+    assert len(main.games) == 5
+
+# Added tests for asgi_app.py
+import asyncio
+import asgi_app
+
+async def asgi_request(method, path, query=b'', body=b'', cookie=None, headers=None):
+    """
+    Sends one request to the ASGI app, returning the status, headers and body.
+    """
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'headers': ([(b'cookie', cookie.encode())] if cookie else []) + (headers or [])}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_app.app(scope, receive, send)
+    return messages[0]['status'], dict(messages[0]['headers']), messages[1]['body']
+
+def test_asgi_app_plays_a_game(placements, fresh_games):
+    """
+    Test if the ASGI app gives a new browser a game cookie, and plays its game.
+    """
+    placements = json.dumps(placements).encode()
+
+    async def play():
+        status, headers, _ = await asgi_request('GET', '/')
+        assert status == 302 and headers[b'location'] == b'/placement'
+        cookie = headers[b'set-cookie'].decode().split(';')[0]
+        assert (await asgi_request('GET', '/placement', cookie=cookie))[0] == 200
+        await asgi_request('POST', '/placement', body=placements, cookie=cookie)
+        assert b'Aircraft_Carrier' in (await asgi_request('GET', '/', cookie=cookie))[2]
+        status, _, body = await asgi_request('GET', '/attack', b'x=0&y=9', cookie=cookie)
+        assert status == 200 and 'AI_Turn' in json.loads(body)
+        assert (await asgi_request('GET', '/attack', b'x=a', cookie=cookie))[0] == 400
+        return cookie
+
+    cookie = asyncio.run(play())
+    assert main.games.peek(cookie.split('=')[1]).state.moves == 1
+
+def test_attack_routes_agree_on_bad_coordinates(placements, fresh_games):
+    """
+    Test if the Flask and ASGI '/attack' routes both answer malformed and
+    off-board coordinates with 400.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    cookie = f'{config.ASGI_COOKIE}=bad_attacks'
+    asyncio.run(asgi_request('POST', '/placement', body=json.dumps(placements).encode(),
+                             cookie=cookie))
+    for query in ('x=abc&y=0', 'y=0', 'x=10&y=0'):
+        flask_response = client.get(f'/attack?{query}')
+        status, _, body = asyncio.run(asgi_request('GET', '/attack', query.encode(),
+                                                   cookie=cookie))
+        assert flask_response.status_code == status == 400
+        assert flask_response.get_json() == json.loads(body)
+
+def test_asgi_app_serves_games_concurrently(placements, fresh_games):
+    """
+    Test if concurrent requests for many games are each answered for their own game.
+    """
+    placements = json.dumps(placements).encode()
+    cookies = [f'{config.ASGI_COOKIE}=game{number}' for number in range(20)]
+
+    async def play():
+        await asyncio.gather(*(asgi_request('POST', '/placement', body=placements, cookie=cookie)
+                               for cookie in cookies))
+        return await asyncio.gather(*(asgi_request('GET', '/attack', b'x=1&y=1', cookie=cookie)
+                                      for cookie in cookies for _ in range(3)))
+
+    responses = asyncio.run(play())
+    assert all(status == 200 for status, _, _ in responses)
+    assert all(main.games.peek(f'game{number}').state.moves == 3 for number in range(20))
+
+# Added tests for the '/shot' and '/events' routes
+def one_ship_game(game):
+    """
+    Gives the AI a single Destroyer at (0, 0) and (1, 0), so two shots win the game.
+    """
+    game.state.ai_board = initialise_board(10)
+    game.state.ai_board[0][0] = game.state.ai_board[0][1] = 'Destroyer'
+    game.state.ai_ships = Fleet({'Destroyer': 2})
+
+def test_events_stream_turns_until_game_over(placements, fresh_games):
+    """
+    Test if the event stream replays every shot, the AI's replies and the end of the game.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    one_ship_game(session_game(client))
+    client.get('/attack?x=0&y=0')
+    client.get('/attack?x=1&y=0')
+    response = client.get('/events')
+    assert response.mimetype == 'text/event-stream'
+    stream = response.get_data(as_text=True)
+    assert [line[7:] for line in stream.splitlines() if line.startswith('event: ')] == \
+        ['shot', 'ai_shot', 'shot', 'game_over']
+    assert 'data: {"x": 1, "y": 0, "hit": true, "sunk": "Destroyer"}' in stream
+    resumed = client.get('/events', headers={'Last-Event-ID': '2'}).get_data(as_text=True)
+    assert resumed.startswith('id: 3\nevent: game_over\n')
+
+def test_queued_shots_are_played_in_order(placements, fresh_games):
+    """
+    Test if shots posted to '/shot' return at once and are played in the order they were sent.
+    """
+    client = main.app.test_client()
+    assert client.post('/shot?x=0&y=0').status_code == 400
+    client.post('/placement', json=placements)
+    for x_coordinate in range(5):
+        assert client.post(f'/shot?x={x_coordinate}&y=5').status_code == 202
+    game = session_game(client)
+    for _ in range(100):
+        if len(game.events) >= 10:
+            break
+        game.wait_for_events(len(game.events), 0.1)
+    shots = [event['data']['x'] for event in game.events_since(0) if event['event'] == 'shot']
+    assert shots == [0, 1, 2, 3, 4] and game.state.moves == 5
+
+def test_events_not_finished_before_game_over_is_published(placements, fresh_games):
+    """
+    Test if a stream does not end between the winning shot and its game_over event.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    game = session_game(client)
+    one_ship_game(game)
+    game.state.player_attack((0, 0))
+    game.state.player_attack((1, 0))
+    assert game.state.is_over() and not game.events_finished(0)
+    # pylint: disable-next=protected-access
+    game._publish('game_over', {'finished': 'Game Over Player wins'})
+    assert not game.events_finished(game.events[-1]['id'])
+    assert game.events_finished(game.events[-1]['id'] + 1)
+
+def test_shot_and_events_reject_malformed_input(placements, fresh_games):
+    """
+    Test if malformed coordinates and event ids are answered with 400, as in asgi_app.py.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    for query in ('', '?x=1', '?x=a&y=0'):
+        response = client.post(f'/shot{query}')
+        assert response.status_code == 400
+        assert response.get_json() == {'message': 'x and y must be integers'}
+    assert client.get('/events', headers={'Last-Event-ID': 'zz'}).status_code == 400
+    assert client.get('/events?since=zz').get_json() == {'message': 'Invalid event id'}
+
+def test_shots_off_the_board_are_rejected(placements, fresh_games):
+    """
+    Test if shots and attacks off the board are answered with 400 and never played,
+    rather than dropped after being queued or wrapped onto the opposite edge.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    for query in ('x=99&y=0', 'x=-1&y=0', 'x=0&y=10'):
+        response = client.post(f'/shot?{query}')
+        assert response.status_code == 400
+        assert response.get_json() == {'message': 'x and y must be from 0 to 9'}
+        assert client.get(f'/attack?{query}').status_code == 400
+    game = session_game(client)
+    assert game.state.moves == 0 and not game.move_log and not game.events
+    cookie = f'{config.ASGI_COOKIE}=off_board'
+    asyncio.run(asgi_request('POST', '/placement', body=json.dumps(placements).encode(),
+                             cookie=cookie))
+    status, _, _ = asyncio.run(asgi_request('POST', '/shot', b'x=-1&y=0', cookie=cookie))
+    assert status == 400 and main.games.peek('off_board').state.moves == 0
+
+def test_asgi_events_stream(placements, fresh_games):
+    """
+    Test if the ASGI event stream pushes shots queued while it is open, until the game is over.
+    """
+    placements = json.dumps(placements).encode()
+    cookie = f'{config.ASGI_COOKIE}=streamed'
+
+    async def play():
+        await asgi_request('POST', '/placement', body=placements, cookie=cookie)
+        one_ship_game(main.games.peek('streamed'))
+        chunks = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            if not chunks:
+                chunks.append(None)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            chunks.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/events', 'query_string': b'',
+                 'headers': [(b'cookie', cookie.encode())]}
+        stream = asyncio.ensure_future(asgi_app.app(scope, receive, send))
+        await asgi_request('POST', '/shot', b'x=0&y=0', cookie=cookie)
+        await asgi_request('POST', '/shot', b'x=1&y=0', cookie=cookie)
+        await asyncio.wait_for(stream, 10)
+        return b''.join(chunk.get('body', b'') for chunk in chunks[1:])
+
+    body = asyncio.run(play()).decode()
+    assert body.count('event: shot') == 2 and body.endswith('Game Over Player wins"}\n\n')
+
+# Added tests for persistence
+from persistence import GamePersistence, ship_cells, board_from_cells
+import time
+
+def test_ship_cells_round_trip_sparse_board():
+    """
+    Test if a board rebuilt from its ship cells matches the original, on the sparse backend.
+    """
+    board = place_battleships(initialise_board(10, config.BOARD_SPARSE), create_battleships(),
+                              config.ALGORITHM_RANDOM)
+    rebuilt = board_from_cells(10, ship_cells(board), config.BOARD_SPARSE)
+    assert ship_cells(rebuilt) == ship_cells(board)
+    assert rebuilt.cell(*next(iter(board.occupied_cells()))) is not None
+
+def test_persistence_batches_saves(tmp_path):
+    """
+    Test if queued saves are written in batches and loaded back in order.
+    """
+    persistence = GamePersistence(str(tmp_path / 'games.db'), batch_size=100, interval=1.0)
+    board = place_battleships(initialise_board(10), create_battleships(), config.ALGORITHM_SIMPLE)
+    persistence.save_game('game', 10, config.BOARD_LIST, 'no_repeat', create_battleships(),
+                          board, board)
+    for sequence in range(20):
+        persistence.save_move('game', sequence, (sequence % 10, sequence // 10),
+                              None if sequence == 19 else (0, sequence))
+    saved = persistence.load('game')
+    persistence.close()
+    assert persistence.writes == 21 and persistence.batches == 1
+    assert saved['player_board'] == board and saved['ships'] == create_battleships()
+    assert saved['moves'][1] == (1, 0, 0, 1) and saved['moves'][19] == (9, 1, None, None)
+
+def test_persistence_load_waits_only_for_its_game(tmp_path):
+    """
+    Test if loading a game does not wait for the queued saves of other games.
+    """
+    persistence = GamePersistence(str(tmp_path / 'games.db'), interval=30.0)
+    board = place_battleships(initialise_board(10), create_battleships(), config.ALGORITHM_SIMPLE)
+    persistence.save_game('busy', 10, config.BOARD_LIST, 'no_repeat', create_battleships(),
+                          board, board)
+    start = time.perf_counter()
+    assert persistence.load('other') is None
+    assert time.perf_counter() - start < 5.0 and persistence.writes == 0
+    persistence.close()
+    assert persistence.writes == 1
+
+def test_game_store_skips_loader_for_new_sessions():
+    """
+    Test if a session id which has just been created is not looked up with the loader.
+    """
+    looked_up = []
+    def loader(session_id):
+        looked_up.append(session_id)
+    store = GameStore(lambda session_id: {}, loader=loader)
+    store.get('minted', new=True)
+    store.get('returning')
+    assert looked_up == ['returning'] and 'minted' in store
+
+def test_persistence_without_secret_key_warns(monkeypatch, caplog):
+    """
+    Test if saving games without a fixed secret key logs a warning.
+    """
+    monkeypatch.setattr(config, 'DATABASE', 'battleships.db')
+    monkeypatch.setattr(config, 'SECRET_KEY', None)
+    assert main.check_persistence_config() is False
+    assert 'SECRET_KEY' in caplog.text
+    monkeypatch.setattr(config, 'SECRET_KEY', 'fixed')
+    assert main.check_persistence_config() is True
+
+def test_game_restored_after_eviction(tmp_path, monkeypatch, placements):
+    """
+    Test if a game dropped from memory is restored from the database with the same
+    boards, moves and events, and the AI does not repeat its earlier attacks.
+    """
+    persistence = GamePersistence(str(tmp_path / 'games.db'))
+    monkeypatch.setattr(main, 'persistence', persistence)
+    monkeypatch.setattr(main, 'games', GameStore(main.BattleshipsGame, loader=main.restore_game))
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    for x_coordinate in range(5):
+        client.get(f'/attack?x={x_coordinate}&y=0')
+    game = session_game(client)
+    with client.session_transaction() as flask_session:
+        game_id = flask_session['game_id']
+
+    monkeypatch.setattr(main, 'games', GameStore(main.BattleshipsGame, loader=main.restore_game))
+    assert client.get('/state').get_json()['moves'] == 5
+    restored = session_game(client)
+    assert restored is not game and main.games.restored == 1 and restored.game_id == game_id
+    assert restored.state.ai_board == game.state.ai_board
+    assert restored.state.player_board == game.state.player_board
+    assert restored.events == game.events
+    client.get('/attack?x=5&y=0')
+    persistence.close()
+    assert restored.state.moves == 6
+    ai_attacks = [(event['data']['x'], event['data']['y'])
+                  for event in restored.events if event['event'] == 'ai_shot']
+    assert len(set(ai_attacks)) == len(ai_attacks) == 6
+
+# Added tests for cached pages and ETags
+import os
+
+def test_main_page_cached_until_turn(placements, fresh_games):
+    """
+    Test if the main page is only rendered again after a turn, and a browser with
+    the current ETag gets 304 Not Modified.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    first = client.get('/')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    revalidated = client.get('/', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304 and revalidated.data == b''
+
+    renders = []
+    def render(template, **context):
+        renders.append(template)
+        return main.render_template(template, **context)
+    game = session_game(client)
+    with main.app.app_context():
+        assert game.main_page(render)[1] == etag.strip('"') and not renders
+        ship_cell = next((x, y) for y, row in enumerate(game.player_board)
+                         for x, cell in enumerate(row) if cell is not None)
+        with game.lock:
+            game._turn((0, 0), ship_cell) # pylint: disable=protected-access
+        assert game.main_page(render)[1] != etag.strip('"') and len(renders) == 1
+        assert game.main_page(render)[1] != etag.strip('"') and len(renders) == 1
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 200
+
+def test_placement_page_cached_until_fleet_changes(tmp_path, monkeypatch):
+    """
+    Test if the placement page is only rendered again once the fleet file changes.
+    """
+    fleet_file = tmp_path / 'battleships.txt'
+    fleet_file.write_text('Destroyer:2\n', encoding='utf-8')
+    monkeypatch.setattr(config, 'BATTLESHIPS', str(fleet_file))
+    renders = []
+    def render(template, **context):
+        renders.append(context['ships'])
+        return main.render_template(template, **context)
+    with main.app.app_context():
+        page, etag = main.placement_page(render)
+        assert main.placement_page(render) == (page, etag) and len(renders) == 1
+        fleet_file.write_text('Destroyer:2\nSubmarine:3\n', encoding='utf-8')
+        os.utime(fleet_file, ns=(0, 0))
+        assert main.placement_page(render)[1] != etag
+    assert renders == [{'Destroyer': 2}, {'Destroyer': 2, 'Submarine': 3}]
+
+def test_asgi_pages_not_modified(fresh_games):
+    """
+    Test if the ASGI app sends ETags and answers a matching If-None-Match with 304.
+    """
+    cookie = f'{config.ASGI_COOKIE}=cached'
+    status, headers, _ = asyncio.run(asgi_request('GET', '/placement', cookie=cookie))
+    etag = headers[b'etag'].decode()
+    status, _, body = asyncio.run(asgi_request('GET', '/placement', cookie=cookie,
+                                               headers=[(b'if-none-match', etag.encode())]))
+    assert status == 304 and body == b''
+
+# Added tests for cell_codec and the '/state' route
+from cell_codec import encode_cells, decode_cells
+
+def test_cell_codec_round_trip():
+    """
+    Test if cells survive encoding, including long runs, and sparse cells stay small.
+    """
+    cells = [0, 1, 127, 128, 300, 999_999]
+    assert decode_cells(encode_cells(reversed(cells + [1]))) == cells
+    assert encode_cells([]) == '' and decode_cells('') == []
+    assert len(encode_cells([5, 500_000, 999_999])) <= 12
+    with pytest.raises(ValueError):
+        decode_cells(encode_cells([300])[:2] + '==')
+
+def test_encode_cells_rejects_negative_cells():
+    """
+    Test if a negative cell index raises a ValueError naming it.
+    """
+    with pytest.raises(ValueError, match='-1'):
+        encode_cells([3, -1])
+
+def test_state_returns_changes_since_move(placements, fresh_games):
+    """
+    Test if '/state' returns only the cells shot and ships sunk after the given move.
+    """
+    client = main.app.test_client()
+    assert client.get('/state').status_code == 400
+    client.post('/placement', json=placements)
+    one_ship_game(session_game(client))
+    client.get('/attack?x=5&y=5')
+    client.get('/attack?x=0&y=0')
+
+    full = client.get('/state').get_json()
+    assert full['moves'] == 2 and full['size'] == 10
+    assert decode_cells(full['hits']) == [0] and decode_cells(full['misses']) == [55]
+    assert len(decode_cells(full['AI_hits']) + decode_cells(full['AI_misses'])) == 2
+    client.get('/attack?x=1&y=0')
+    delta = client.get('/state?since=2').get_json()
+    assert decode_cells(delta['hits']) == [1] and delta['misses'] == ''
+    assert delta['sunk'] == ['Destroyer'] and delta['finished'] == 'Game Over Player wins'
+    assert delta['AI_hits'] == delta['AI_misses'] == ''
+    assert client.get('/state?since=4').status_code == 400
+    assert client.get('/state?since=x').status_code == 400
+
+def test_state_repeat_shot_on_hit_cell_is_not_a_miss(placements, fresh_games):
+    """
+    Test if shooting a hit cell again after the given move does not report it as a miss.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    one_ship_game(session_game(client))
+    client.get('/attack?x=0&y=0')
+    client.get('/attack?x=0&y=0')
+    delta = client.get('/state?since=1').get_json()
+    assert delta['moves'] == 2 and delta['hits'] == delta['misses'] == ''
+    full = client.get('/state').get_json()
+    assert decode_cells(full['hits']) == [0] and full['misses'] == ''
+
+def test_state_after_negative_attack(placements, fresh_games):
+    """
+    Test if an attack with a negative coordinate is rejected before it is logged,
+    so '/state' keeps working for the session.
+    """
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    assert client.get('/attack?x=-1&y=0').status_code == 400
+    client.get('/attack?x=0&y=0')
+    response = client.get('/state')
+    assert response.status_code == 200 and response.get_json()['moves'] == 1
+
+# Added tests for metrics and the '/metrics' route
+import threading
+import metrics
+
+def test_metrics_counts_across_threads(monkeypatch):
+    """
+    Test if counts made on many threads, including finished ones, are all added up,
+    and histogram buckets are cumulative in the text format.
+    """
+    monkeypatch.setattr(metrics, 'registry', [])
+    counter = metrics.Counter('test_total', 'Test counter.', label='kind')
+    histogram = metrics.Histogram('test_seconds', 'Test histogram.', buckets=(0.1, 1.0))
+    def work():
+        for _ in range(1000):
+            counter.inc(label_value='a')
+        histogram.observe(0.5)
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    work()
+    histogram.observe(0.01)
+    histogram.observe(5)
+    assert counter.value('a') == 9000 and histogram.count() == 11
+    assert metrics.exposition().splitlines() == [
+        '# HELP test_total Test counter.', '# TYPE test_total counter',
+        'test_total{kind="a"} 9000',
+        '# HELP test_seconds Test histogram.', '# TYPE test_seconds histogram',
+        'test_seconds_bucket{le="0.1"} 1', 'test_seconds_bucket{le="1.0"} 10',
+        'test_seconds_bucket{le="+Inf"} 11', 'test_seconds_sum 9.51', 'test_seconds_count 11']
+
+def test_metrics_route_reports_games(placements, fresh_games):
+    """
+    Test if '/metrics' reports the timed routes, turns, AI decisions, placement
+    draws and games in memory, without creating a game for the scraper.
+    """
+    attacks = metrics.request_seconds.count('/attack')
+    decisions = metrics.ai_decision_seconds.count()
+    placed = metrics.placements.value()
+    client = main.app.test_client()
+    client.post('/placement', json=placements)
+    client.get('/attack?x=0&y=0')
+    client.get('/attack?x=1&y=0')
+    scraped = main.app.test_client().get('/metrics')
+    text = scraped.get_data(as_text=True)
+    assert scraped.content_type == metrics.CONTENT_TYPE
+    assert 'battleships_active_games 1\n' in text and len(main.games) == 1
+    assert metrics.request_seconds.count('/attack') == attacks + 2
+    assert metrics.ai_decision_seconds.count() == decisions + 2
+    assert metrics.placements.value() == placed + len(create_battleships())
+    assert 'battleships_request_duration_seconds_bucket{route="/attack",le="+Inf"}' in text
+    assert '# TYPE battleships_placement_retries_total counter' in text
+    assert '# TYPE battleships_moves_per_second gauge' in text